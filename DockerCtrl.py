@@ -327,6 +327,16 @@ class DockerCtrl:
             self._interactive_session(InteractMode.ATTACHING, cmd)
             # Container intentionally left running — it's a service
 
+    @staticmethod
+    def _container_health(container) -> dict | None:
+        """Return the HEALTHCHECK status and last probe output of a container, or None without a health check."""
+        health = container.attrs.get('State', {}).get('Health')
+        if not isinstance(health, dict):
+            return None
+        last_probe = (health.get('Log') or [{}])[-1]
+        return {"status": health.get('Status'), "output": (last_probe.get('Output') or '').strip(),
+                "failing_streak": health.get('FailingStreak', 0)}
+
     def status(self):
         current_image = self._image_exist()
         current_container = self._container_exist()
@@ -343,6 +353,13 @@ class DockerCtrl:
                     session_status = f'{text_color_green}{current_container.status}{text_color_reset}'
                 else:
                     session_status = f'{text_color_yellow}{current_container.status}{text_color_reset}'
+
+                health = self._container_health(current_container)
+                if health is not None:
+                    health_color = {'healthy': text_color_green, 'unhealthy': text_color_red}.get(
+                        health["status"], text_color_yellow)
+                    session_status += f' ({health_color}{health["status"]}{text_color_reset}'
+                    session_status += f': {health["output"]})' if health["output"] else ')'
             else:
                 status_container_name = "N/A"
                 status_container_id = "N/A"
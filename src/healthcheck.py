@@ -0,0 +1,60 @@
+"""
+Docker HEALTHCHECK probe for the scheduler process.
+
+Reads the heartbeat file written by Scheduler.write_heartbeat and exits 0 if it is fresh, 1 otherwise. Standard
+library only, so a probe costs a few milliseconds and does not import the utilities.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+
+DEFAULT_HEARTBEAT_FILE = os.path.join(tempfile.gettempdir(), 'heartbeat.json')  # Per container, never on DATA/
+DEFAULT_MAX_AGE = 90  # Seconds, when the heartbeat does not carry its own limit
+
+
+def check(file_name: str = None, max_age: float = None, now: float = None) -> tuple[bool, str]:
+    """
+    Check the heartbeat.
+
+    :param file_name: Heartbeat file (default: $HEARTBEAT_FILE, or /tmp/heartbeat.json).
+    :param max_age: Seconds after which the last tick is stale (default: the heartbeat's own max_age).
+    :return: (healthy, one-line reason).
+    """
+    file_name = file_name or os.environ.get("HEARTBEAT_FILE") or DEFAULT_HEARTBEAT_FILE
+    try:
+        with open(file_name, 'r') as heartbeat_file:
+            heartbeat = json.load(heartbeat_file)
+    except FileNotFoundError:
+        return False, f"No heartbeat file: {file_name}"
+    except (OSError, ValueError) as e:
+        return False, f"Unreadable heartbeat file {file_name}: {e}"
+
+    if heartbeat.get("state") == "stopped":
+        return False, "Scheduler stopped"
+
+    age = (now or time.time()) - float(heartbeat.get("tick", 0))
+    limit = float(max_age or heartbeat.get("max_age") or DEFAULT_MAX_AGE)
+    if age > limit:
+        return False, f"Stale heartbeat: last tick {age:.0f} s ago (limit {limit:.0f} s)"
+
+    # Failed jobs are reported but do not make the process unhealthy: a restart would not fix them
+    failed = [job_id for job_id, job in heartbeat.get("jobs", {}).items() if job.get("last_status") == "failed"]
+    message = (f"{heartbeat.get('state', 'running').capitalize()}: last tick {age:.0f} s ago, "
+               f"{heartbeat.get('running', 0)} jobs running")
+    if failed:
+        message += f", last run failed: {', '.join(failed)}"
+    return True, message
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Exit 0 if the scheduler heartbeat is fresh, 1 otherwise")
+    parser.add_argument("--file", help="Heartbeat file (default: $HEARTBEAT_FILE, or /tmp/heartbeat.json)")
+    parser.add_argument("--max-age", type=float, help="Seconds before the heartbeat is stale (default: from file)")
+    args = parser.parse_args()
+
+    healthy, message = check(args.file, args.max_age)
+    print(message)
+    sys.exit(0 if healthy else 1)
@@ -1,14 +1,21 @@
 import datetime
 import os
 import sys
+import signal
+import asyncio
 import logging
 import argparse
-import time
-from utilities import Log4Me, Telegram, ConsoleTitle, ConfigManager, InputHelper, Scheduler
+import threading
+from utilities import Log4Me, Telegram, ConsoleTitle, ConfigManager, InputHelper, Scheduler, DNS_Resolver, \
+    DNS_Monitor, DDNS_Sync
 
 # Configuration variables
 config_path = "config.json"
 config = None
+http_client = None  # The scheduler loop's httpx client in asyncio mode, shared by coroutine jobs
+ddns = None
+stop_event = threading.Event()
+stop_signal = None
 
 
 def setup_config():
@@ -40,6 +47,54 @@ def main(trigger_notification: bool = False):
         print(f'[{main_title}][template_main] Message: {result_message}')
 
 
+async def main_async(trigger_notification: bool = False):
+    """main() for scheduler_mode "asyncio": the Telegram call awaits on the event loop instead of a thread."""
+    global config, http_client
+    main_title = ConfigManager.get(config, "title")
+    notification = ConfigManager.get(config, "notification")
+    telegram_chatroom = ConfigManager.get(config, "telegram")
+
+    result_message = f'{datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")} Function "main" called'
+
+    if notification.lower() == 'y' or notification.lower() == 'a' or trigger_notification:
+        telegram_message = f"[{main_title}] {result_message}"
+        Log4Me.log_and_print(f'[main_async] telegram_message: {telegram_message}', "debug")
+        telegram_instance = await asyncio.to_thread(Telegram, telegram_chatroom)  # Key store read and chat lookup
+
+        if await telegram_instance.send_message_async(telegram_message, http_client):
+            Log4Me.log_and_print(f'[main_async] Telegram: message sent successfully.')
+        else:
+            Log4Me.log_and_print(f'[main_async] Telegram: Failed to send message.')
+    else:
+        print(f'[{main_title}][template_main] Message: {result_message}')
+
+
+def ddns_sync():
+    global config, ddns
+    if ddns is None:
+        ddns = DDNS_Sync(config)
+
+    result = ddns.run()
+    sent = [update for update in result["updates"] if not update.get("skipped")]
+    if sent or not result["success"]:
+        summary = ", ".join(f'{update["host"]}={update.get("code") or update.get("error")}' for update in sent)
+        result_message = (f'DDNS sync: IP {result["ip"]}, {len(sent)} updated '
+                          f'({result.get("error") or summary or "no change"}), {result["timings"]["total"]} ms')
+        Log4Me.log_and_print(f'[ddns_sync] {result_message}', "info" if result["success"] else "error")
+
+        notification = ConfigManager.get(config, "notification", "n")
+        if notification.lower() in ('y', 'a'):
+            telegram_message = f'[{ConfigManager.get(config, "title")}] {result_message}'
+            if not Telegram(ConfigManager.get(config, "telegram")).send_message(telegram_message):
+                Log4Me.log_and_print(f'[ddns_sync] Telegram: Failed to send message.')
+
+
+def handle_stop_signal(signum, frame):
+    global stop_signal
+    stop_signal = signal.Signals(signum).name
+    stop_event.set()
+
+
 if __name__ == "__main__":
     try:
         if not os.path.exists(config_path):
@@ -54,9 +109,13 @@ if __name__ == "__main__":
         Log4Me.init_logging(log_name=log_file_name)
         logging.info(f'[Main] Load Config: {config}')
 
+        if ConfigManager.get(config, "dns_cache", "n").lower() == "y":
+            DNS_Resolver.enable_persistent_cache(serve_stale=int(ConfigManager.get(config, "dns_serve_stale", 0)))
+
         parser = argparse.ArgumentParser(description=f"{title}")
         parser.add_argument('--setup', action="store_true", help="Setup configuration")
         parser.add_argument('--run', action="store_true", help="Execute now without schedule")
+        parser.add_argument('--ddns', action="store_true", help="Run one DDNS sync cycle now without schedule")
 
         args = parser.parse_args()
 
@@ -64,33 +123,61 @@ if __name__ == "__main__":
             setup_config()
         elif args.run:
             main()
+        elif args.ddns:
+            ddns_sync()
         else:
-            job_schedule = Scheduler()
+            job_schedule = Scheduler(config)
+            http_client = job_schedule.http_client
+            main_job = main_async if job_schedule.mode == "asyncio" else main
 
             if int(ConfigManager.get(config, "interval", 0)) > 0:
-                job_schedule.add(main,
+                job_schedule.add(main_job,
                                  schedule_type='interval',
                                  interval=int(ConfigManager.get(config, "interval")),
                                  misfire_grace_time=ConfigManager.get(config, "schedule_misfire_grace_time"))
 
-            if ConfigManager.get(config, "schedule"):
+            if ConfigManager.get(config, "schedule") or ConfigManager.get(config, "schedule_cron"):
                 cp_notification = ConfigManager.get(config, "checkpoint_notification", "n").lower() == "y"
-                job_schedule.add(main,
+                job_schedule.add(main_job,
                                  schedule_type='cron',
                                  schedule_time=ConfigManager.get(config, "schedule"),
+                                 cron=ConfigManager.get(config, "schedule_cron"),
                                  checkpoint_notification=cp_notification,
+                                 business_days=ConfigManager.get(config, "schedule_business_days"),
                                  misfire_grace_time=int(ConfigManager.get(config, "schedule_misfire_grace_time", 30)))
 
+            if int(ConfigManager.get(config, "ddns_interval", 0)) > 0:
+                job_schedule.add(ddns_sync,
+                                 schedule_type='interval',
+                                 interval=int(ConfigManager.get(config, "ddns_interval")),
+                                 misfire_grace_time=int(ConfigManager.get(config, "schedule_misfire_grace_time", 30)),
+                                 job_id="ddns_sync")
+
+            if int(ConfigManager.get(config, "dns_monitor_interval", 0)) > 0:
+                dns_monitor = DNS_Monitor.from_config(config)
+                job_schedule.add(dns_monitor.probe,
+                                 schedule_type='interval',
+                                 interval=int(ConfigManager.get(config, "dns_monitor_interval")),
+                                 misfire_grace_time=int(ConfigManager.get(config, "schedule_misfire_grace_time", 30)),
+                                 job_id="dns_monitor")
+
+            signal.signal(signal.SIGTERM, handle_stop_signal)  # docker stop
+            signal.signal(signal.SIGINT, handle_stop_signal)  # Ctrl-C
+
             job_schedule.show_jobs()
             job_schedule.start()
-
-            try:
-                while True:
-                    time.sleep(1)  # Sleep to reduce CPU usage
-            except KeyboardInterrupt:
-                keyboard_interrupt_message = "Ctrl-C pressed. Stopping the scheduler..."
-                Log4Me.log_and_print(keyboard_interrupt_message, "error")
-                job_schedule.shutdown()
-                sys.exit(1)  # Exit the program gracefully
+            stop_event.wait()
+            Log4Me.log_and_print(f"{stop_signal} received. Stopping the scheduler...", "warning")
+
+            # No new runs, let running jobs (and their notifications) finish, then flush state and logs
+            drained = job_schedule.stop(float(ConfigManager.get(config, "shutdown_drain_timeout", 8)))
+            job_schedule.show_metrics()
+            DNS_Resolver.save_persistent_cache()
+            Log4Me.log_and_print("Scheduler stopped." if drained else "Scheduler stopped with jobs still running.")
+            logging.shutdown()
+            sys.stdout.flush()
+            if not drained:
+                os._exit(1)  # Worker threads of unfinished jobs would otherwise block interpreter exit
+            sys.exit(0)
     except Exception as e:
         print(str(e))
@@ -0,0 +1,85 @@
+import logging
+from datetime import date, datetime, time, timedelta
+from apscheduler.triggers.base import BaseTrigger
+
+
+class BusinessDayTrigger(BaseTrigger):
+    """
+    Wraps another trigger so that it only fires on business days.
+
+    Holidays are precomputed per year (see Calendarific.get_holiday_dates) and kept in the trigger, so computing
+    the next fire time is pure date arithmetic with no I/O. Years without a precomputed calendar only skip
+    weekends.
+
+    :param trigger: The wrapped trigger (cron, interval, combined...).
+    :param holidays: {year: set of holiday dates}.
+    :param policy: What happens to a run falling on a weekend or holiday:
+        - "skip": the run is dropped.
+        - "shift": the run moves to the same time on the next business day. Runs landing on one another
+          (e.g. Saturday's and Sunday's both moved to Monday) are merged into one.
+    :param weekend_days: Non-business weekdays, Monday = 0 (default: Saturday and Sunday).
+    """
+
+    POLICIES = ("skip", "shift")
+    MAX_LOOKAHEAD = timedelta(days=3660)  # Give up on a wrapped trigger with no business day run within ~10 years
+
+    def __init__(self, trigger: BaseTrigger, holidays: dict = None, policy: str = "skip",
+                 weekend_days=(5, 6)):
+        if policy not in self.POLICIES:
+            raise KeyError(f"[BusinessDayTrigger] Invalid policy (allowed: {' / '.join(self.POLICIES)}): {policy}")
+
+        self.trigger = trigger
+        self.holidays = {int(year): frozenset(dates) for year, dates in (holidays or {}).items()}
+        self.policy = policy
+        self.weekend_days = frozenset(weekend_days)
+        if len(self.weekend_days) >= 7:
+            raise ValueError("[BusinessDayTrigger] At least one weekday must be a business day.")
+
+    def is_business_day(self, day: date) -> bool:
+        return day.weekday() not in self.weekend_days and day not in self.holidays.get(day.year, ())
+
+    def next_business_day(self, day: date) -> date:
+        day += timedelta(days=1)
+        while not self.is_business_day(day):
+            day += timedelta(days=1)
+        return day
+
+    def _next_business_run(self, fire_time: datetime, until: datetime = None) -> datetime | None:
+        """
+        First fire time of the wrapped trigger on a business day after `fire_time`, which is not on one. None if
+        there is none up to `until`.
+
+        Instead of stepping through every run of the wrapped trigger (a 10-second interval fires 17280 times over a
+        weekend), it is asked for its first run from 00:00 of the next business day. That run may land on a later
+        non-business day (e.g. a weekly cron), in which case the jump is repeated from there.
+        """
+        start = fire_time
+        while fire_time is not None and not self.is_business_day(fire_time.date()):
+            if until is not None and fire_time > until:
+                return None
+            if fire_time - start > self.MAX_LOOKAHEAD:
+                logging.error(f"[BusinessDayTrigger] No business day run within {self.MAX_LOOKAHEAD.days} days: {self}")
+                return None
+            midnight = datetime.combine(self.next_business_day(fire_time.date()), time(0), tzinfo=fire_time.tzinfo)
+            # No previous fire time: interval and cron triggers would count from it and ignore `now`
+            next_fire_time = self.trigger.get_next_fire_time(None, midnight)
+            fire_time = next_fire_time if next_fire_time is None or next_fire_time > fire_time else None
+        return fire_time
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        fire_time = self.trigger.get_next_fire_time(previous_fire_time, now)
+        if fire_time is None or self.is_business_day(fire_time.date()):
+            return fire_time
+        if self.policy == "skip":
+            return self._next_business_run(fire_time)
+
+        shifted = datetime.combine(self.next_business_day(fire_time.date()), fire_time.timetz())
+        following = self._next_business_run(fire_time, until=shifted)
+        return min(shifted, following) if following else shifted
+
+    def __str__(self):
+        return f"business_days[{self.policy}, {self.trigger}]"
+
+    def __repr__(self):
+        return (f"<{self.__class__.__name__} (policy='{self.policy}', trigger={self.trigger!r}, "
+                f"years={sorted(self.holidays)})>")
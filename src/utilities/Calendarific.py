@@ -4,17 +4,74 @@ import ssl
 import os
 import time
 import json
+import lzma
 from tabulate import tabulate
 from datetime import datetime, date
+from functools import cached_property
 from urllib.request import urlopen, Request
 from urllib.parse import urlencode
 from urllib.error import URLError, HTTPError
 from .KeyManager import KeyManager
 from .config_manager import ConfigManager
+from .file_helper import FileHelper
+
+
+class HolidayResult:
+    """
+    Holiday lookup result. The table, text and JSON renderings are built on first access and then reused.
+
+    :param target_date: Date the lookup was made for.
+    :param target_year: Year the lookup was made for.
+    :param holidays: Holiday rows as returned by Calendarific.transform_holiday_data / check_holidays.
+    """
+
+    def __init__(self, target_date: date, target_year: int, holidays: list[dict]):
+        self.target_date = target_date
+        self.target_year = target_year
+        self.holidays = holidays
+
+    def __bool__(self):
+        return bool(self.holidays)
+
+    def __len__(self):
+        return len(self.holidays)
+
+    @cached_property
+    def sorted_holidays(self) -> list[dict]:
+        return sorted(self.holidays, key=lambda x: x["Country ID"])
+
+    @cached_property
+    def country_ids_string(self) -> str:
+        return ", ".join(dict.fromkeys(h["Country ID"] for h in self.sorted_holidays))
+
+    @property
+    def word_country(self) -> str:
+        return "Countries" if len(self.holidays) > 1 else "Country"
+
+    @property
+    def summary(self) -> str:
+        return f'{self.target_date.strftime("%Y-%m-%d")} - {self.word_country} with Holidays : {self.country_ids_string}'
+
+    @property
+    def text_summary(self) -> str:
+        return f'Country: {self.country_ids_string} / Year: {self.target_year}'
+
+    @cached_property
+    def table(self) -> str:
+        return Calendarific.create_holiday_table(self.sorted_holidays)
+
+    @cached_property
+    def text(self) -> str:
+        return Calendarific.format_holiday_text(self.sorted_holidays)
+
+    @cached_property
+    def json(self) -> str:
+        return json.dumps(self.sorted_holidays, separators=(',', ':'), ensure_ascii=False)
 
 
 class Calendarific:
     USER_AGENT = "Mozilla/5.0"
+    RESULT_CACHE_SIZE = 64  # Memoized HolidayResult objects per instance
 
     def __init__(self, config: dict):
         self.key_manager = KeyManager()
@@ -34,6 +91,9 @@ class Calendarific:
         self.data_folder = config["data_folder"]
         self.countries = config["calendarific_country"]
         self.default_type = config["calendarific_default_type"]
+        self.cache_compression = config.get("calendarific_cache_compression")  # None, "gzip" or "lzma"
+        FileHelper.compression_suffix(self.cache_compression)  # Validate early
+        self._holiday_results: dict[tuple, HolidayResult] = {}
 
         os.makedirs(self.data_folder, exist_ok=True)  # Ensure the data folder exists
 
@@ -45,6 +105,11 @@ class Calendarific:
 
         return self.key_manager.get(token_name)
 
+    def get_cache_file_name(self, country_code: str, selected_year: int) -> str:
+        """Return the cache path for a country and year, including the compression suffix."""
+        suffix = FileHelper.compression_suffix(self.cache_compression)
+        return os.path.join(self.data_folder, f"calendar_data_{selected_year}_{country_code}.json{suffix}")
+
     def get_data_from_calendarific(self, country_code, selected_year, holiday_type=None) -> json:
         logging.info(f'[get_holidays_from_calendarific] Download calendar for {country_code} / {selected_year} / '
                      f'{"None" if not holiday_type else holiday_type}')
@@ -52,7 +117,7 @@ class Calendarific:
         params = {"api_key": self.calendarific_api_token, "country": country_code, "year": selected_year}
         query_string = urlencode(params)
 
-        file_name = os.path.join(self.data_folder, f"calendar_data_{selected_year}_{country_code}.json")
+        file_name = self.get_cache_file_name(country_code, selected_year)
 
         url = f"{self.calendarific_endpoint}?&{query_string}"
         if holiday_type:
@@ -79,8 +144,7 @@ class Calendarific:
             if result["success"]:
                 logging.info(f'[Calendarific.get_holidays] Download holiday success (Duration: {response_time:.2f} ms)')
 
-                with open(file_name, 'w') as file:
-                    json.dump(result["response"], file, indent=2)
+                FileHelper.write_json_atomic(file_name, result["response"], self.cache_compression)
                 logging.info(f'[get_holidays_from_calendarific] Downloaded and saved to local - {file_name}')
             else:
                 logging.error(f'[Calendarific.get_holidays] {result["error"]} (Duration: {response_time:.2f} ms)')
@@ -108,6 +172,16 @@ class Calendarific:
                 return country.get("locations", None)
         return None
 
+    @staticmethod
+    def matches_location(locations: str, location_filter: str | None) -> bool:
+        """Return True if a holiday's 'Locations' value applies to the configured location filter."""
+        return (
+            location_filter is None
+            or not locations
+            or locations.strip().lower() == "all"
+            or location_filter.lower() in {loc.strip().lower() for loc in locations.split(",")}
+        )
+
     @staticmethod
     def transform_holiday_data(holidays):
         count_width = len(str(len(holidays)))
@@ -138,7 +212,7 @@ class Calendarific:
         """
         country_code = country_code.upper()
         holiday_type = self.get_holiday_type(country_code)
-        file_name = os.path.join(self.data_folder, f"calendar_data_{selected_year}_{country_code}.json")
+        file_name = self.get_cache_file_name(country_code, selected_year)
 
         # Try to load holidays from the cache
         data = self.load_cached_file(file_name)
@@ -161,14 +235,13 @@ class Calendarific:
 
     @staticmethod
     def load_cached_file(file_name: str):
-        """Load a cached JSON file if it exists."""
+        """Load a cached JSON file (plain, '.gz' or '.xz') if it exists."""
         if not os.path.exists(file_name):
             return None
 
         try:
-            with open(file_name, 'r') as file:
-                return json.load(file)
-        except (json.JSONDecodeError, IOError) as e:
+            return FileHelper.read_json(file_name)
+        except (json.JSONDecodeError, EOFError, lzma.LZMAError, IOError) as e:
             logging.error(f"[load_cached_file] Error loading {file_name}: {e}")
             return None
 
@@ -209,14 +282,7 @@ class Calendarific:
                 matching_holidays = [
                     holiday for holiday in holidays
                     if holiday.get("Date ISO") == target_date.strftime("%Y-%m-%d")
-                    and (
-                        location_filter is None
-                        or not holiday.get("Locations")
-                        or holiday.get("Locations", "").strip().lower() == "all"
-                        or location_filter.lower() in {
-                            loc.strip().lower() for loc in holiday.get("Locations", "").split(",")
-                        }
-                    )
+                    and self.matches_location(holiday.get("Locations", ""), location_filter)
                 ]
                 result_array.extend(matching_holidays)
             except Exception as e:
@@ -229,6 +295,26 @@ class Calendarific:
         logging.info(f"[check_holidays] Found {len(result_array)} matching holidays.")
         return result_array
 
+    def get_holiday_dates(self, selected_year: int) -> frozenset[date]:
+        """
+        Return the dates that are a holiday in any configured country (honouring its locations filter), e.g. to
+        precompute a business day calendar for BusinessDayTrigger.
+        """
+        holiday_dates = set()
+        for country_code in self.get_countries():
+            try:
+                holidays = self.get_holidays_by_country(country_code, selected_year)
+            except Exception as e:
+                logging.error(f"[get_holiday_dates] Failed to retrieve holidays for {country_code}: {e}")
+                continue
+            location_filter = self.get_location_filter(country_code)
+            holiday_dates.update(date.fromisoformat(holiday["Date ISO"]) for holiday in holidays
+                                 if self.matches_location(holiday.get("Locations", ""), location_filter))
+
+        logging.info(f"[get_holiday_dates] {len(holiday_dates)} holiday dates in {selected_year} "
+                     f"for {', '.join(self.get_countries())}")
+        return frozenset(holiday_dates)
+
     @staticmethod
     def create_holiday_table(holidays: list[dict]) -> str:
         """Create a table of holiday data."""
@@ -254,9 +340,34 @@ class Calendarific:
 
         return "\n".join(formatted_lines)
 
+    def get_holiday_result(self, target_date: date = None, target_year: int = None,
+                           country: str = None) -> HolidayResult:
+        """
+        Look up holidays and return a HolidayResult. Results are memoized per (date, year, country set),
+        so repeated identical queries reuse the data and any rendering already built.
+        """
+        target_date = target_date or datetime.now().date()
+        target_year = target_year or target_date.year
+        countries = (country.upper(),) if country else tuple(self.get_countries())
+        key = (target_date, target_year, countries)
+
+        result = self._holiday_results.get(key)
+        if result is None:
+            data = self.get_holidays_by_country(country, target_year) if country else self.check_holidays(target_date)
+            result = HolidayResult(target_date, target_year, data)
+
+            if len(self._holiday_results) >= self.RESULT_CACHE_SIZE:
+                self._holiday_results.pop(next(iter(self._holiday_results)))
+            self._holiday_results[key] = result
+
+        return result
+
     def show_holiday(self, target_date: date = None, target_year: int = None,
-                     country: str = None, text_mode=False) -> str:
-        """Display the holiday results in a table format."""
+                     country: str = None, text_mode=False, show_table: bool = False) -> str:
+        """
+        Print and return the holiday summary. The table is only rendered when it is printed (show_table) or
+        logged (INFO level).
+        """
         target_date = target_date or datetime.now().date()
         target_year = target_year or target_date.year
 
@@ -267,29 +378,27 @@ class Calendarific:
             logging.info(f'[show_holiday_result] {target_date.strftime("%Y-%m-%d")} falls on a Sunday.')
             return f'{target_date.strftime("%Y-%m-%d")} falls on a Sunday.'
 
-        data = self.get_holidays_by_country(country, target_year) if country else self.check_holidays(target_date)
+        result = self.get_holiday_result(target_date, target_year, country)
 
-        if not data:
+        if not result:
             logging.info(f'[show_holiday_result] No holiday for {target_date.strftime("%Y-%m-%d")}')
             return f'No holiday for {target_date.strftime("%Y-%m-%d")}'
 
-        result_array = sorted(data, key=lambda x: x["Country ID"])
-        table = self.create_holiday_table(result_array)
-        word_country = "Countries" if len(result_array) > 1 else "Country"
-        unique_country_ids = {info["Country ID"] for info in result_array}
-        country_ids_string = ", ".join(unique_country_ids)
-
-        logging.info(f"[show_holiday_result] Found {len(result_array)} holidays. {word_country}: {country_ids_string}")
-        logging.info(f'[show_holiday_result] Summary table:\n\n{table}')
+        logging.info(f"[show_holiday_result] Found {len(result)} holidays. "
+                     f"{result.word_country}: {result.country_ids_string}")
+        if logging.getLogger().isEnabledFor(logging.INFO):
+            logging.info(f'[show_holiday_result] Summary table:\n\n{result.table}')
 
         if text_mode:
-            summary_result = f'Country: {country_ids_string} / Year: {target_year}'
+            summary_result = result.text_summary
             print(summary_result)
-            summary_result += "\n\n" + self.format_holiday_text(result_array)
-            print(table + '\n')
+            summary_result += "\n\n" + result.text
         else:
-            summary_result = f'{target_date.strftime("%Y-%m-%d")} - {word_country} with Holidays : {country_ids_string}'
-            print(summary_result + '\n\n' + table + '\n')
+            summary_result = result.summary
+            print(summary_result)
+
+        if show_table:
+            print('\n' + result.table + '\n')
 
         return summary_result
 
@@ -301,5 +410,5 @@ if __name__ == '__main__':
     date_selected = datetime.strptime("2025-01-03", "%Y-%m-%d").date()
     holiday = Calendarific(input_config)
 
-    print(holiday.show_holiday(target_date=date_selected, text_mode=False))
-    holiday.show_holiday(country="HK", target_year=2027, text_mode=False)
+    print(holiday.show_holiday(target_date=date_selected, text_mode=False, show_table=True))
+    holiday.show_holiday(country="HK", target_year=2027, text_mode=False, show_table=True)
@@ -0,0 +1,96 @@
+import time
+import logging
+import argparse
+import validators
+from .DNS_Resolver import DNS_Resolver
+from .Dyn import Dyn_Updater
+from .Dyn_Providers import Dyn_Providers
+from .config_manager import ConfigManager
+
+
+class DDNS_Sync:
+    """
+    Keep managed hostnames pointed at the current public IP.
+
+    One run discovers the public IP, resolves every managed hostname concurrently, and batch-updates
+    only the hostnames that do not resolve to it yet. Each stage is timed.
+
+    :param config: A dictionary containing configuration data:
+        - ddns_hostnames: Hostnames to keep up to date.
+        - ddns_ip_resolvers: Echo URLs used to discover the public IP (see DNS_Resolver.get_current_ip).
+        - ddns_ip_quorum: Optional number of echo URLs that must agree (default: majority).
+        - ddns_dns_servers: Nameservers used to check the hostnames (default: ['1.1.1.1']).
+        - Dyn_Providers settings (dyn_providers, dyn_hosts, ...) or, without 'dyn_providers', Dyn_Updater
+          settings (dyn_endpoint, ...), unless an updater is given.
+    :param updater: Optional Dyn_Updater or Dyn_Providers to use instead of building one from the config.
+    """
+
+    def __init__(self, config: dict, updater: Dyn_Updater | Dyn_Providers = None):
+        self.hosts = ConfigManager.get(config, "ddns_hostnames", [])
+        self.ip_resolvers = ConfigManager.get(config, "ddns_ip_resolvers", [])
+        self.ip_quorum = config.get("ddns_ip_quorum")
+        self.dns_servers = config.get("ddns_dns_servers", ['1.1.1.1'])
+
+        if not self.hosts or not self.ip_resolvers:
+            raise KeyError("[DDNS_Sync] The configuration must include 'ddns_hostnames' and 'ddns_ip_resolvers'.")
+
+        if updater is None:
+            updater = Dyn_Providers(config) if config.get("dyn_providers") else Dyn_Updater(config)
+        self.updater = updater
+
+    def find_stale(self, ip_address: str) -> list[str]:
+        """Resolve every managed hostname concurrently and return those not resolving to ip_address."""
+        rdtype = 'AAAA' if validators.ipv6(ip_address) else 'A'
+        current = {result["host"] for result in DNS_Resolver.resolve_many(self.hosts, self.dns_servers, [rdtype])
+                   if ip_address in result["addresses"]}
+        return [host for host in self.hosts if host not in current]
+
+    def run(self) -> dict:
+        """
+        Run one sync cycle.
+
+        :return: {"success", "ip", "stale", "updates", "timings"}, plus "error" when the cycle stopped early.
+            timings holds the duration in ms of the 'discover', 'resolve' and 'update' stages and the 'total'.
+        """
+        timings = {}
+        cycle_start = stage_start = time.time()
+        result = {"success": False, "ip": None, "stale": [], "updates": [], "timings": timings}
+
+        result["ip"] = DNS_Resolver.get_current_ip(self.ip_resolvers, self.ip_quorum)
+        timings["discover"] = round((time.time() - stage_start) * 1000, 2)
+
+        if result["ip"]:
+            stage_start = time.time()
+            result["stale"] = self.find_stale(result["ip"])
+            timings["resolve"] = round((time.time() - stage_start) * 1000, 2)
+
+            stage_start = time.time()
+            if result["stale"]:
+                result["updates"] = self.updater.update_many(result["stale"], result["ip"])
+            timings["update"] = round((time.time() - stage_start) * 1000, 2)
+            result["success"] = all(update["success"] for update in result["updates"])
+        else:
+            result["error"] = "Public IP could not be determined."
+
+        timings["total"] = round((time.time() - cycle_start) * 1000, 2)
+        sent = [update["host"] for update in result["updates"] if not update.get("skipped")]
+        log_message = (f"[DDNS_Sync.run] IP: {result['ip']}, hosts: {len(self.hosts)}, stale: {len(result['stale'])}, "
+                       f"sent: {len(sent)}, timings (ms): {timings}")
+        if result["success"]:
+            logging.info(log_message)
+        else:
+            logging.error(f"{log_message}, error: {result.get('error', 'update failed')}")
+        return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run one DDNS sync cycle using the settings in config.json")
+    parser.add_argument("--config", default="config.json", help="Configuration file (default: config.json)")
+    parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format="%(asctime)s - %(levelname)s - %(message)s")
+
+    sync_result = DDNS_Sync(ConfigManager.load_config(args.config)).run()
+    print(sync_result)
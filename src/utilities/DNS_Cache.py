@@ -0,0 +1,94 @@
+import os
+import json
+import time
+import logging
+import threading
+from .file_helper import FileHelper
+
+
+class DNS_Cache:
+    """
+    DNS answers persisted under DATA/ with absolute expiry times, so a restarted container starts warm.
+
+    :param file_name: Cache file path. Defaults to DATA/dns_cache.json next to Token.key.
+    :param serve_stale: Seconds past expiry an answer may still be served when upstream servers fail (0 = never).
+    :param flush_interval: Minimum seconds between automatic flushes to disk.
+    """
+
+    def __init__(self, file_name: str = None, serve_stale: int = 0, flush_interval: int = 60):
+        data_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '../DATA'))
+        self.file_name = file_name or os.path.join(data_folder, 'dns_cache.json')
+        self.serve_stale = serve_stale
+        self.flush_interval = flush_interval
+        self._entries: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_flush = time.time()
+
+    @staticmethod
+    def _key(host: str, rdtype: str, dns_srv: str) -> str:
+        return f"{host.lower().rstrip('.')}|{rdtype.upper()}|{dns_srv}"
+
+    def load(self) -> int:
+        """Load answers from disk, dropping those past the serve-stale window. Returns the number loaded."""
+        if not os.path.exists(self.file_name):
+            return 0
+
+        try:
+            entries = FileHelper.read_json(self.file_name)
+        except (json.JSONDecodeError, IOError) as e:
+            logging.error(f"[DNS_Cache.load] Error loading {self.file_name}: {e}")
+            return 0
+
+        now = time.time()
+        with self._lock:
+            self._entries = {key: entry for key, entry in entries.items()
+                             if entry["expires"] + self.serve_stale > now}
+        logging.info(f"[DNS_Cache.load] Loaded {len(self._entries)} answers from {self.file_name}")
+        return len(self._entries)
+
+    def get(self, host: str, rdtype: str, dns_srv: str, allow_stale: bool = False) -> dict | None:
+        """
+        Return {"addresses", "ttl", "stale"} for a cached answer, or None.
+        Expired answers are only returned with allow_stale, within the serve-stale window.
+        """
+        entry = self._entries.get(self._key(host, rdtype, dns_srv))
+        if entry is None:
+            return None
+
+        remaining = entry["expires"] - time.time()
+        if remaining > 0:
+            return {"addresses": entry["addresses"], "ttl": int(remaining), "stale": False}
+        if allow_stale and remaining + self.serve_stale > 0:
+            return {"addresses": entry["addresses"], "ttl": 0, "stale": True}
+        return None
+
+    def put(self, host: str, rdtype: str, dns_srv: str, addresses: list[str], ttl: int) -> None:
+        """Store an answer valid for `ttl` seconds, flushing to disk when the flush interval has passed."""
+        with self._lock:
+            self._entries[self._key(host, rdtype, dns_srv)] = {"addresses": addresses, "expires": time.time() + ttl}
+            self._dirty = True
+        self.flush()
+
+    def flush(self, force: bool = False) -> bool:
+        """Write the cache to disk if it changed. Returns True if a write happened."""
+        now = time.time()
+        if not self._dirty or (not force and now - self._last_flush < self.flush_interval):
+            return False
+
+        with self._lock:
+            entries = {key: entry for key, entry in self._entries.items()
+                       if entry["expires"] + self.serve_stale > now}
+            self._entries = entries
+            self._dirty = False
+            self._last_flush = now
+
+        try:
+            FileHelper.write_json_atomic(self.file_name, entries)
+        except OSError as e:
+            logging.error(f"[DNS_Cache.flush] Error writing {self.file_name}: {e}")
+            self._dirty = True
+            return False
+
+        logging.debug(f"[DNS_Cache.flush] Saved {len(entries)} answers to {self.file_name}")
+        return True
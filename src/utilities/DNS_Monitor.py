@@ -0,0 +1,131 @@
+import time
+import logging
+import argparse
+import threading
+from .DNS_Resolver import DNS_Resolver
+from .Histogram import StreamingHistogram
+from .config_manager import ConfigManager
+from .file_helper import FileHelper
+
+
+class DNS_Monitor:
+    """
+    Periodically probe hosts against nameservers and keep per-server latency histograms and error rates.
+
+    :param hosts: Hostnames to probe.
+    :param servers: Nameservers to measure.
+    :param rdtypes: Record types to query (default: ['A']).
+    :param export_file: Optional JSON file the snapshot is written to after every probe.
+    """
+
+    def __init__(self, hosts: list[str], servers: list[str], rdtypes: list[str] = None, export_file: str = None):
+        if not hosts or not servers:
+            raise ValueError("[DNS_Monitor] hosts and servers must be non-empty lists.")
+
+        self.hosts = hosts
+        self.servers = servers
+        self.rdtypes = rdtypes or ['A']
+        self.export_file = export_file
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._stats = {dns_srv: self._new_stats() for dns_srv in servers}
+
+    @staticmethod
+    def _new_stats() -> dict:
+        return {"latency": StreamingHistogram(), "queries": 0, "timeouts": 0, "nxdomain": 0, "errors": 0}
+
+    @classmethod
+    def from_config(cls, config: dict) -> "DNS_Monitor":
+        """Build a monitor from the 'dns_monitor_*' keys of config.json."""
+        return cls(ConfigManager.get(config, "dns_monitor_hosts", []),
+                   ConfigManager.get(config, "dns_monitor_servers", []),
+                   ConfigManager.get(config, "dns_monitor_rdtypes", ['A']),
+                   ConfigManager.get(config, "dns_monitor_export"))
+
+    def record(self, result: dict) -> None:
+        """Fold one resolve_many result into the server statistics."""
+        with self._lock:
+            stats = self._stats.setdefault(result["server"], self._new_stats())
+            stats["queries"] += 1
+            if result["error"] == "timeout":
+                stats["timeouts"] += 1
+            elif result["error"] == "nxdomain":
+                stats["nxdomain"] += 1
+            elif result["error"] not in (None, "no_answer"):
+                stats["errors"] += 1
+
+        if result["error"] != "timeout" and result["duration_ms"] is not None:
+            stats["latency"].record(result["duration_ms"])
+
+    def probe(self) -> list[dict]:
+        """Query every host against every server once, bypassing caches, and record the results."""
+        results = DNS_Resolver.resolve_many(self.hosts, self.servers, self.rdtypes, use_cache=False)
+        for result in results:
+            self.record(result)
+
+        if self.export_file:
+            self.export(self.export_file)
+        return results
+
+    def snapshot(self) -> dict:
+        """Return per-server latency percentiles (ms) and timeout / NXDOMAIN / error rates."""
+        with self._lock:
+            servers = {}
+            for dns_srv, stats in self._stats.items():
+                queries = stats["queries"]
+                servers[dns_srv] = {
+                    "queries": queries,
+                    "latency_ms": stats["latency"].snapshot(),
+                    "timeout_rate": round(stats["timeouts"] / queries, 4) if queries else None,
+                    "nxdomain_rate": round(stats["nxdomain"] / queries, 4) if queries else None,
+                    "error_rate": round(stats["errors"] / queries, 4) if queries else None,
+                }
+        return {"since": self.started, "generated": time.time(), "servers": servers}
+
+    def ranked_servers(self) -> list[str]:
+        """Servers ordered by p95 latency, with timeouts counted against them. Unmeasured servers go last."""
+        def score(item):
+            stats = item[1]
+            p95 = stats["latency_ms"]["p95"]
+            if p95 is None:
+                return float("inf")
+            return p95 + (stats["timeout_rate"] or 0) * DNS_Resolver.RESOLVER_LIFETIME * 1000
+
+        return [dns_srv for dns_srv, _ in sorted(self.snapshot()["servers"].items(), key=score)]
+
+    def export(self, file_name: str) -> None:
+        """Write the snapshot atomically as JSON."""
+        FileHelper.write_json_atomic(file_name, self.snapshot())
+
+    def reset(self) -> None:
+        """Drop every statistic."""
+        with self._lock:
+            self._stats = {dns_srv: self._new_stats() for dns_srv in self.servers}
+            self.started = time.time()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Probe DNS servers and report latency percentiles and error rates.")
+    parser.add_argument("--hosts", nargs="+", default=["github.com"], help="Domains to probe")
+    parser.add_argument("--servers", nargs="+", default=["1.1.1.1", "8.8.8.8", "9.9.9.9"], help="DNS servers")
+    parser.add_argument("--rdtypes", nargs="+", default=["A"], help="Record types (default: A)")
+    parser.add_argument("--interval", type=float, default=10, help="Seconds between probes (default: 10)")
+    parser.add_argument("--count", type=int, default=6, help="Number of probes (default: 6)")
+    parser.add_argument("--export", help="Write the snapshot as JSON to this file after every probe")
+    parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING,
+                        format="%(asctime)s - %(levelname)s - %(message)s")
+
+    monitor = DNS_Monitor(args.hosts, args.servers, args.rdtypes, args.export)
+    for probe_count in range(args.count):
+        if probe_count:
+            time.sleep(args.interval)
+        monitor.probe()
+
+    for server, server_stats in monitor.snapshot()["servers"].items():
+        latency = server_stats["latency_ms"]
+        print(f"{server:<16} queries={server_stats['queries']:<5} p50={latency['p50']} p95={latency['p95']} "
+              f"p99={latency['p99']} timeout={server_stats['timeout_rate']} nxdomain={server_stats['nxdomain_rate']}")
+    print(f"Fastest first: {', '.join(monitor.ranked_servers())}")
@@ -1,19 +1,164 @@
+import asyncio
 import dns.resolver
+import dns.asyncresolver
+import dns.inet
 import dns.exception
 import requests
+import requests.adapters
 import logging
 import time
+import threading
+import contextlib
+import collections
+import concurrent.futures
 import argparse
+import atexit
+import httpx
 import validators
+from .DNS_Cache import DNS_Cache
 
 
 class DNS_Resolver:
+    RESOLVER_LIFETIME = 5  # Timeout for the entire query
+    RESOLVER_TIMEOUT = 2   # Timeout per server
+    CACHE_SIZE = 1024      # Cached answers per nameserver
+    MAX_CONCURRENCY = 50   # Queries in flight for resolve_many
+    RACE_STAGGER = 0.1     # Seconds before the next server joins a race
+    LATENCY_ALPHA = 0.3    # Weight of the newest sample in the per-server latency average
+    IP_CACHE_TTL = 30      # Seconds a discovered public IP is reused
+
+    _resolvers: dict[str, dns.resolver.Resolver] = {}
+    _async_resolvers: dict[tuple[str, bool], dns.asyncresolver.Resolver] = {}
+    _resolvers_lock = threading.Lock()
+    _server_latency: dict[str, float] = {}
+    _latency_lock = threading.Lock()
+    _http_session: requests.Session = None
+    _current_ip_cache: dict[tuple, tuple[str, float]] = {}
+    _current_ip_lock = threading.Lock()
+    _current_ip_discoveries: dict[tuple, threading.Lock] = {}  # cache_key -> lock held by the running discovery
+    _persistent_cache: DNS_Cache = None
+
+    @classmethod
+    def get_resolver(cls, dns_srv: str) -> dns.resolver.Resolver:
+        """
+        Return the pooled resolver for a nameserver, creating it on first use.
+
+        Each nameserver keeps its own TTL-respecting LRU cache, shared by every thread that queries it,
+        so answers are reused across calls without mixing results from different servers.
+        """
+        dns_resolver = cls._resolvers.get(dns_srv)
+        if dns_resolver is None:
+            with cls._resolvers_lock:
+                dns_resolver = cls._resolvers.get(dns_srv)
+                if dns_resolver is None:
+                    dns_resolver = dns.resolver.Resolver(configure=False)
+                    dns_resolver.nameservers = [dns_srv]
+                    dns_resolver.cache = dns.resolver.LRUCache(cls.CACHE_SIZE)
+                    dns_resolver.lifetime = cls.RESOLVER_LIFETIME
+                    dns_resolver.timeout = cls.RESOLVER_TIMEOUT
+                    cls._resolvers[dns_srv] = dns_resolver
+        return dns_resolver
+
+    @classmethod
+    def get_async_resolver(cls, dns_srv: str, use_cache: bool = True) -> dns.asyncresolver.Resolver:
+        """
+        Return the pooled async resolver for a nameserver. It shares the cache of the sync resolver,
+        unless use_cache is False, in which case a separate cache-less resolver is returned.
+        """
+        key = (dns_srv, use_cache)
+        dns_resolver = cls._async_resolvers.get(key)
+        if dns_resolver is None:
+            cache = cls.get_resolver(dns_srv).cache if use_cache else None
+            with cls._resolvers_lock:
+                dns_resolver = cls._async_resolvers.get(key)
+                if dns_resolver is None:
+                    dns_resolver = dns.asyncresolver.Resolver(configure=False)
+                    dns_resolver.nameservers = [dns_srv]
+                    dns_resolver.cache = cache
+                    dns_resolver.lifetime = cls.RESOLVER_LIFETIME
+                    dns_resolver.timeout = cls.RESOLVER_TIMEOUT
+                    cls._async_resolvers[key] = dns_resolver
+        return dns_resolver
+
     @staticmethod
-    def resolve_ip(host='github.com', dns_srv='1.1.1.1'):
-        dns_resolver = dns.resolver.Resolver(configure=False)
-        dns_resolver.cache = dns.resolver.Cache()
-        dns_resolver.lifetime = 5  # Timeout for the entire query
-        dns_resolver.timeout = 2   # Timeout per server
+    def error_category(error: Exception) -> str:
+        """Map a dnspython exception to a short error category."""
+        if isinstance(error, dns.resolver.NXDOMAIN):
+            return "nxdomain"
+        if isinstance(error, dns.resolver.NoAnswer):
+            return "no_answer"
+        if isinstance(error, dns.resolver.LifetimeTimeout):
+            return "timeout"
+        if isinstance(error, dns.resolver.NoNameservers):
+            return "no_nameservers"
+        return "error"
+
+    @classmethod
+    def record_latency(cls, dns_srv: str, duration_ms: float, success: bool) -> None:
+        """Fold a query latency into the server's moving average. Failed queries count as a full lifetime."""
+        sample = duration_ms if success else cls.RESOLVER_LIFETIME * 1000
+        with cls._latency_lock:
+            previous = cls._server_latency.get(dns_srv)
+            cls._server_latency[dns_srv] = sample if previous is None else \
+                previous + cls.LATENCY_ALPHA * (sample - previous)
+
+    @classmethod
+    def rank_servers(cls, servers: list[str]) -> list[str]:
+        """Order servers by average latency, fastest first. Servers without samples go first to be measured."""
+        return sorted(servers, key=lambda dns_srv: cls._server_latency.get(dns_srv, 0.0))
+
+    @classmethod
+    def enable_persistent_cache(cls, file_name: str = None, serve_stale: int = 0,
+                                flush_interval: int = 60) -> DNS_Cache:
+        """
+        Load the on-disk answer cache (see DNS_Cache) and consult it before querying upstream servers.
+        The cache is flushed every `flush_interval` seconds as answers arrive, and once more at exit.
+        """
+        cache = DNS_Cache(file_name, serve_stale, flush_interval)
+        cache.load()
+        atexit.register(cache.flush, True)
+        cls._persistent_cache = cache
+        return cache
+
+    @classmethod
+    def save_persistent_cache(cls) -> bool:
+        """Write the persistent cache to disk now, e.g. on shutdown. Returns True if a write happened."""
+        return cls._persistent_cache.flush(force=True) if cls._persistent_cache is not None else False
+
+    @classmethod
+    def _cached_answer(cls, host: str, rdtype: str, dns_srv: str, allow_stale: bool = False) -> dict | None:
+        if cls._persistent_cache is None:
+            return None
+
+        cached = cls._persistent_cache.get(host, rdtype, dns_srv, allow_stale)
+        if cached and cached["stale"]:
+            logging.warning(f"[DNS_Resolver] {dns_srv} unavailable, serving stale {host} {rdtype}: "
+                            f"{', '.join(cached['addresses'])}")
+        return cached
+
+    @classmethod
+    def _store_answer(cls, host: str, rdtype: str, dns_srv: str, addresses: list[str], ttl: int) -> None:
+        if cls._persistent_cache is not None:
+            cls._persistent_cache.put(host, rdtype, dns_srv, addresses, ttl)
+
+    @classmethod
+    def flush_cache(cls) -> None:
+        """Drop every cached answer in the resolver pool."""
+        with cls._resolvers_lock:
+            for dns_resolver in cls._resolvers.values():
+                dns_resolver.cache.flush()
+
+    @classmethod
+    def resolve_ip(cls, host='github.com', dns_srv='1.1.1.1'):
+        """
+        Resolve the A records of a host.
+
+        :param host: Hostname to resolve.
+        :param dns_srv: Nameserver address, or a list of addresses to race (see resolve_race).
+        :return: List of IP addresses, empty on failure.
+        """
+        if isinstance(dns_srv, (list, tuple)):
+            return cls.resolve_race(host, list(dns_srv))["addresses"]
 
         # Validate DNS server and host
         if not dns.inet.is_address(dns_srv):
@@ -24,17 +169,21 @@ class DNS_Resolver:
             logging.error(f"[DNS_Resolver] Invalid host: {host}")
             return []
 
+        cached = cls._cached_answer(host, 'A', dns_srv)
+        if cached:
+            return cached["addresses"]
+
         # Use only the specified DNS server for the query
-        dns_resolver.nameservers = [dns_srv]
+        dns_resolver = cls.get_resolver(dns_srv)
 
         try:
-            dns.resolver.override_system_resolver(dns_resolver)
             start_time = time.time()
             answer = dns_resolver.resolve(host, 'A')
             end_time = time.time()
 
             ip_array = [str(ip) for ip in answer]
             response_time = (end_time - start_time) * 1000  # in ms
+            cls._store_answer(host, 'A', dns_srv, ip_array, max(0, int(answer.expiration - time.time())))
 
             logging.info(f"[DNS_Resolver] Resolved {host} in {response_time:.2f} ms via {dns_srv}: {', '.join(ip_array)}")
             return ip_array
@@ -43,84 +192,444 @@ class DNS_Resolver:
             logging.warning(f"[DNS_Resolver] {host} does not exist.")
             return []
 
-        except dns.resolver.Timeout:
-            logging.warning(f"[DNS_Resolver] {dns_srv} timed out for {host}.")
-            return []
+        except (dns.resolver.Timeout, dns.resolver.NoNameservers) as e:
+            logging.warning(f"[DNS_Resolver] {dns_srv} failed for {host}: {e}")
+            stale = cls._cached_answer(host, 'A', dns_srv, allow_stale=True)
+            return stale["addresses"] if stale else []
 
         except dns.exception.DNSException as e:
             logging.error(f"[DNS_Resolver] DNS error for {host} via {dns_srv}: {e}")
             return []
 
+    @classmethod
+    async def resolve_ip_async(cls, host='github.com', dns_srv='1.1.1.1') -> list[str]:
+        """resolve_ip for coroutines: the A records of a host, or an empty list on failure."""
+        if isinstance(dns_srv, (list, tuple)):
+            return (await cls.resolve_race_async(host, list(dns_srv)))["addresses"]
+        return (await cls._query_async(host, dns_srv, 'A'))["addresses"]
+
+    @classmethod
+    async def _query_async(cls, host: str, dns_srv: str, rdtype: str,
+                           semaphore: asyncio.Semaphore = None, use_cache: bool = True) -> dict:
+        result = {"host": host, "rdtype": rdtype, "server": dns_srv, "success": False,
+                  "addresses": [], "ttl": None, "duration_ms": None, "error": None, "source": "network"}
+
+        if not dns.inet.is_address(dns_srv):
+            result["error"] = "invalid"
+            logging.error(f"[DNS_Resolver.resolve_many] Invalid DNS server: {dns_srv}")
+            return result
+
+        if not validators.domain(host):
+            result["error"] = "invalid"
+            logging.error(f"[DNS_Resolver.resolve_many] Invalid host: {host}")
+            return result
+
+        cached = cls._cached_answer(host, rdtype, dns_srv) if use_cache else None
+        if cached:
+            result.update(success=True, addresses=cached["addresses"], ttl=cached["ttl"], duration_ms=0.0,
+                          source="cache")
+            return result
+
+        async with semaphore or contextlib.nullcontext():
+            start_time = time.time()
+            try:
+                answer = await cls.get_async_resolver(dns_srv, use_cache).resolve(host, rdtype)
+                result["addresses"] = [str(ip) for ip in answer]
+                result["ttl"] = max(0, int(answer.expiration - time.time()))
+                result["success"] = True
+                cls._store_answer(host, rdtype, dns_srv, result["addresses"], result["ttl"])
+            except dns.exception.DNSException as e:
+                result["error"] = cls.error_category(e)
+                logging.warning(f"[DNS_Resolver.resolve_many] {host} {rdtype} via {dns_srv}: {result['error']} ({e})")
+            finally:
+                result["duration_ms"] = round((time.time() - start_time) * 1000, 2)
+                cls.record_latency(dns_srv, result["duration_ms"], result["error"] in (None, "nxdomain", "no_answer"))
+
+        if use_cache and result["error"] in ("timeout", "no_nameservers"):
+            stale = cls._cached_answer(host, rdtype, dns_srv, allow_stale=True)
+            if stale:
+                result.update(success=True, addresses=stale["addresses"], ttl=0, source="stale")
+
+        return result
+
+    @classmethod
+    async def resolve_many_async(cls, hosts: list[str], servers: list[str] = None, rdtypes: list[str] = None,
+                                 concurrency: int = None, use_cache: bool = True) -> list[dict]:
+        """
+        Resolve every (host, server, rdtype) combination concurrently.
+
+        :param hosts: Hostnames to resolve.
+        :param servers: Nameservers to query (default: ['1.1.1.1']).
+        :param rdtypes: Record types to query (default: ['A']).
+        :param concurrency: Maximum queries in flight (default: MAX_CONCURRENCY).
+        :param use_cache: False to always query the servers (e.g. to measure them).
+        :return: One dict per query with host, rdtype, server, success, addresses, ttl, duration_ms and
+            error ('nxdomain', 'no_answer', 'timeout', 'no_nameservers', 'invalid', 'error' or None).
+        """
+        servers = servers or ['1.1.1.1']
+        rdtypes = rdtypes or ['A']
+        semaphore = asyncio.Semaphore(concurrency or cls.MAX_CONCURRENCY)
+
+        start_time = time.time()
+        results = await asyncio.gather(*(cls._query_async(host, dns_srv, rdtype, semaphore, use_cache)
+                                         for host in hosts for dns_srv in servers for rdtype in rdtypes))
+        response_time = (time.time() - start_time) * 1000
+
+        succeeded = sum(1 for result in results if result["success"])
+        logging.info(f"[DNS_Resolver.resolve_many] {succeeded}/{len(results)} queries succeeded "
+                     f"in {response_time:.2f} ms")
+        return list(results)
+
+    @classmethod
+    def resolve_many(cls, hosts: list[str], servers: list[str] = None, rdtypes: list[str] = None,
+                     concurrency: int = None, use_cache: bool = True) -> list[dict]:
+        """Blocking wrapper around resolve_many_async for threads without a running event loop."""
+        return asyncio.run(cls.resolve_many_async(hosts, servers, rdtypes, concurrency, use_cache))
+
+    @classmethod
+    async def resolve_race_async(cls, host: str, servers: list[str], rdtype: str = 'A', stagger: float = None,
+                                 verify: bool = False) -> dict:
+        """
+        Query several nameservers with staggered starts and return the first valid answer.
+
+        Servers start in rank_servers order. The next server joins after `stagger` seconds, or at once
+        when a running query fails. Outstanding queries are cancelled once the race is decided.
+
+        :param host: Hostname to resolve.
+        :param servers: Nameservers to race.
+        :param rdtype: Record type to query.
+        :param stagger: Seconds between server starts (default: RACE_STAGGER).
+        :param verify: Wait for a second valid answer and report whether both agree.
+        :return: The winning query result (see resolve_many_async) plus 'consistent' (True / False, or None
+            when not verified or no second answer arrived) and 'attempts' (servers started).
+        """
+        stagger = cls.RACE_STAGGER if stagger is None else stagger
+        queue = cls.rank_servers(servers)
+        pending = set()
+        winner = None
+        last_failure = None
+        consistent = None
+        attempts = 0
+
+        try:
+            while queue or pending:
+                if queue:
+                    pending.add(asyncio.create_task(cls._query_async(host, queue.pop(0), rdtype)))
+                    attempts += 1
+
+                done, pending = await asyncio.wait(pending, timeout=stagger if queue else None,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if not result["success"]:
+                        last_failure = result
+                    elif winner is None:
+                        winner = result
+                    else:
+                        consistent = sorted(winner["addresses"]) == sorted(result["addresses"])
+
+                if winner is not None and (not verify or consistent is not None):
+                    break
         finally:
-            dns.resolver.restore_system_resolver()
+            for task in pending:
+                task.cancel()
+
+        result = winner or last_failure
+        if result is None:
+            result = {"host": host, "rdtype": rdtype, "server": None, "success": False, "addresses": [],
+                      "ttl": None, "duration_ms": None, "error": "invalid"}
+        result["consistent"] = consistent
+        result["attempts"] = attempts
+
+        if consistent is False:
+            logging.warning(f"[DNS_Resolver.resolve_race] Servers disagree on {host} {rdtype}")
+        if winner:
+            logging.info(f"[DNS_Resolver.resolve_race] {host} {rdtype} won by {winner['server']} in "
+                         f"{winner['duration_ms']} ms ({attempts} started): {', '.join(winner['addresses'])}")
+        else:
+            logging.warning(f"[DNS_Resolver.resolve_race] No server answered {host} {rdtype} ({attempts} started)")
+        return result
+
+    @classmethod
+    def resolve_race(cls, host: str, servers: list[str], rdtype: str = 'A', stagger: float = None,
+                     verify: bool = False) -> dict:
+        """Blocking wrapper around resolve_race_async for threads without a running event loop."""
+        return asyncio.run(cls.resolve_race_async(host, servers, rdtype, stagger, verify))
+
+    @classmethod
+    async def resolve_dual_stack_async(cls, host: str, dns_srv='1.1.1.1') -> list[dict]:
+        """
+        Query A and AAAA records concurrently and merge the answers.
+
+        :param host: Hostname to resolve.
+        :param dns_srv: Nameserver address, or a list of addresses to race per record type.
+        :return: [{"address", "family" (4 or 6), "ttl"}, ...], IPv4 first. Empty on failure.
+        """
+        if isinstance(dns_srv, (list, tuple)):
+            queries = [cls.resolve_race_async(host, list(dns_srv), rdtype) for rdtype in ('A', 'AAAA')]
+        else:
+            queries = [cls._query_async(host, dns_srv, rdtype) for rdtype in ('A', 'AAAA')]
+
+        addresses = []
+        for result in await asyncio.gather(*queries):
+            family = 4 if result["rdtype"] == 'A' else 6
+            addresses.extend({"address": address, "family": family, "ttl": result["ttl"]}
+                             for address in result["addresses"])
+
+        logging.info(f"[DNS_Resolver.resolve_dual_stack] {host}: "
+                     f"{', '.join(a['address'] for a in addresses) or 'no addresses'}")
+        return addresses
+
+    @classmethod
+    def resolve_dual_stack(cls, host: str, dns_srv='1.1.1.1') -> list[dict]:
+        """Blocking wrapper around resolve_dual_stack_async for threads without a running event loop."""
+        return asyncio.run(cls.resolve_dual_stack_async(host, dns_srv))
+
+    @classmethod
+    def get_http_session(cls) -> requests.Session:
+        """Return the shared HTTP session used for public IP discovery (keep-alive connection pool)."""
+        if cls._http_session is None:
+            with cls._resolvers_lock:
+                if cls._http_session is None:
+                    session = requests.Session()
+                    adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=16)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    cls._http_session = session
+        return cls._http_session
 
     @staticmethod
-    def get_current_ip(resolvers):
+    def _public_ip_from_response(url: str, response, response_time: float) -> str | None:
+        """Extract the 'ip' field of an echo service response (requests or httpx)."""
+        if response.status_code != 200:
+            logging.error(f"[get_current_ip] Failed to retrieve IP. Status code: {response.status_code} from {url}")
+            return None
+
+        try:
+            data = response.json()
+        except ValueError:
+            logging.error(f"[get_current_ip] Invalid JSON response from: {url}")
+            return None
+
+        # Validate the JSON structure
+        if 'ip' not in data:
+            logging.error(f"[get_current_ip] Missing 'ip' field in response from: {url}")
+            return None
+
+        public_ip = data['ip']
+        logging.info(f"[get_current_ip] Retrieved IP: {public_ip} in {response_time:.2f} ms from {url}")
+        return public_ip
+
+    @classmethod
+    def _fetch_public_ip(cls, url: str, timeout: float) -> str | None:
+        try:
+            # Make a secure GET request with timeout
+            start_time = time.time()
+            response = cls.get_http_session().get(url, timeout=timeout)
+            return cls._public_ip_from_response(url, response, (time.time() - start_time) * 1000)
+
+        except requests.Timeout:
+            logging.error(f"[get_current_ip] Request timed out for: {url}")
+        except requests.exceptions.SSLError:
+            logging.warning(f"[get_current_ip] {url} has an invalid SSL certificate")
+        except requests.RequestException as e:
+            logging.error(f"[get_current_ip] An error occurred: {e}")
+        return None
+
+    @classmethod
+    async def _fetch_public_ip_async(cls, client: httpx.AsyncClient, url: str, timeout: float) -> str | None:
+        try:
+            start_time = time.time()
+            response = await client.get(url, timeout=timeout)
+            return cls._public_ip_from_response(url, response, (time.time() - start_time) * 1000)
+
+        except httpx.TimeoutException:
+            logging.error(f"[get_current_ip] Request timed out for: {url}")
+        except httpx.HTTPError as e:
+            logging.error(f"[get_current_ip] An error occurred: {e}")
+        return None
+
+    @classmethod
+    def _current_ip_request(cls, resolvers, quorum: int | None, cache_ttl: float | None) -> dict | None:
+        """
+        Validate a public IP discovery request.
+
+        :return: None if the request cannot succeed, else {"urls", "quorum", "cache_key", "cache_ttl", "cached"}
+            where "cached" holds a still valid cached IP.
+        """
         if not isinstance(resolvers, list) or not resolvers:
             logging.error("[get_current_ip] Resolvers must be a non-empty list of URLs.")
             return None
 
-        ip_results = []
+        quorum = quorum or len(resolvers) // 2 + 1
+        request = {"urls": [], "quorum": quorum, "cache_key": (tuple(resolvers), quorum),
+                   "cache_ttl": cls.IP_CACHE_TTL if cache_ttl is None else cache_ttl, "cached": None}
+
+        request["cached"] = cls._cached_current_ip(request["cache_key"])
+        if request["cached"]:
+            return request
 
         for url in resolvers:
-            if not validators.url(url):
+            if validators.url(url):
+                request["urls"].append(url)
+            else:
                 logging.error(f"[get_current_ip] Invalid URL: {url}")
-                continue
 
-            try:
-                # Make a secure GET request with timeout
-                start_time = time.time()
-                response = requests.get(url, timeout=10)
-                end_time = time.time()
-
-                response_time = (end_time - start_time) * 1000  # in ms
-
-                # Check for successful status code
-                if response.status_code == 200:
-                    try:
-                        data = response.json()
-                    except ValueError:
-                        logging.error(f"[get_current_ip] Invalid JSON response from: {url}")
-                        continue
-
-                    # Validate the JSON structure
-                    if 'ip' not in data:
-                        logging.error(f"[get_current_ip] Missing 'ip' field in response from: {url}")
-                        continue
-
-                    public_ip = data['ip']
-                    logging.info(f"[get_current_ip] Retrieved IP: {public_ip} in {response_time:.2f} ms from {url}")
-                    ip_results.append(public_ip)
-                else:
-                    logging.error(
-                        f"[get_current_ip] Failed to retrieve IP. Status code: {response.status_code} from {url}")
-
-            except requests.Timeout:
-                logging.error(f"[get_current_ip] Request timed out for: {url}")
-            except requests.exceptions.SSLError:
-                logging.warning(f"[get_current_ip] {url} has an invalid SSL certificate")
-            except requests.RequestException as e:
-                logging.error(f"[get_current_ip] An error occurred: {e}")
+        if len(request["urls"]) < request["quorum"]:
+            logging.error(f"[get_current_ip] Quorum {request['quorum']} cannot be reached with "
+                          f"{len(request['urls'])} valid resolvers.")
+            return None
+        return request
+
+    @classmethod
+    def _cached_current_ip(cls, cache_key: tuple) -> str | None:
+        with cls._current_ip_lock:
+            cached = cls._current_ip_cache.get(cache_key)
+        if cached and cached[1] > time.time():
+            logging.debug(f"[get_current_ip] Using cached IP: {cached[0]}")
+            return cached[0]
+        return None
+
+    @staticmethod
+    def _vote(votes: collections.Counter, public_ip: str | None, remaining: int, quorum: int) -> tuple[bool, str]:
+        """Count one answer. Returns (decided, agreed IP or None)."""
+        if public_ip:
+            votes[public_ip] += 1
+        top = votes.most_common(1)[0] if votes else (None, 0)
+        if top[1] >= quorum:
+            return True, top[0]
+        return top[1] + remaining < quorum, None  # Decided once the quorum can no longer be reached
 
+    @classmethod
+    def _current_ip_result(cls, request: dict, votes: collections.Counter, consistent_ip: str | None,
+                           resolvers: list) -> str | None:
         # Check for consistency in IP results
-        if ip_results:
-            if len(set(ip_results)) == 1 and len(ip_results) == len(resolvers):
-                consistent_ip = ip_results[0]
-                logging.info(f"[get_current_ip] All resolvers returned consistent IP: {consistent_ip}")
-                return consistent_ip
-            else:
-                logging.error(f"[get_current_ip] Inconsistent results from resolvers: {ip_results} ({len(ip_results)} /"
-                              f" {len(resolvers)})")
-                return None
+        quorum = request["quorum"]
+        if consistent_ip:
+            logging.info(f"[get_current_ip] {votes[consistent_ip]} resolvers agreed on IP: {consistent_ip} "
+                         f"(quorum: {quorum} / {len(resolvers)})")
+            if request["cache_ttl"] > 0:
+                with cls._current_ip_lock:
+                    cls._current_ip_cache[request["cache_key"]] = (consistent_ip, time.time() + request["cache_ttl"])
+            return consistent_ip
+        elif votes:
+            logging.error(f"[get_current_ip] Inconsistent results from resolvers: {dict(votes)} "
+                          f"({sum(votes.values())} / {len(resolvers)}, quorum: {quorum})")
+            return None
         else:
             logging.error("[get_current_ip] No valid responses from any resolvers.")
             return None
 
+    @classmethod
+    def get_current_ip(cls, resolvers, quorum: int = None, timeout: float = 10, cache_ttl: float = None):
+        """
+        Discover the public IP by querying every echo URL concurrently.
+
+        Returns as soon as `quorum` endpoints agree; slower endpoints are abandoned. A result is cached for
+        `cache_ttl` seconds so several jobs in one cycle share a single discovery.
+
+        :param resolvers: Echo URLs returning JSON with an 'ip' field.
+        :param quorum: Number of identical answers required (default: majority of the resolvers).
+        :param timeout: Per-request timeout in seconds.
+        :param cache_ttl: Seconds to reuse a result (default: IP_CACHE_TTL, 0 disables).
+        :return: The agreed public IP, or None.
+        """
+        request = cls._current_ip_request(resolvers, quorum, cache_ttl)
+        if request is None or request["cached"]:
+            return request and request["cached"]
+
+        # One discovery per set of resolvers: concurrent callers for the same key wait for it and share the
+        # result, while other discoveries (e.g. IPv4 and IPv6) run in parallel
+        with cls._current_ip_lock:
+            discovery_lock = cls._current_ip_discoveries.setdefault(request["cache_key"], threading.Lock())
+        with discovery_lock:
+            cached = cls._cached_current_ip(request["cache_key"])
+            if cached:
+                return cached
+
+            votes = collections.Counter()
+            consistent_ip = None
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(request["urls"]))
+            try:
+                futures = [executor.submit(cls._fetch_public_ip, url, timeout) for url in request["urls"]]
+                remaining = len(futures)
+                for future in concurrent.futures.as_completed(futures):
+                    remaining -= 1
+                    decided, consistent_ip = cls._vote(votes, future.result(), remaining, request["quorum"])
+                    if decided:
+                        break
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+            return cls._current_ip_result(request, votes, consistent_ip, resolvers)
+
+    @classmethod
+    async def get_current_ip_async(cls, resolvers, quorum: int = None, timeout: float = 10,
+                                   cache_ttl: float = None, client: httpx.AsyncClient = None) -> str | None:
+        """
+        get_current_ip for coroutines: the echo URLs are queried on the running event loop, and outstanding
+        requests are cancelled once the quorum is decided.
+
+        :param client: httpx client to reuse, e.g. Scheduler.http_client. A short-lived one is used otherwise.
+        """
+        request = cls._current_ip_request(resolvers, quorum, cache_ttl)
+        if request is None or request["cached"]:
+            return request and request["cached"]
+
+        votes = collections.Counter()
+        consistent_ip = None
+        async with contextlib.AsyncExitStack() as stack:
+            if client is None:
+                client = await stack.enter_async_context(httpx.AsyncClient())
+            tasks = [asyncio.create_task(cls._fetch_public_ip_async(client, url, timeout)) for url in request["urls"]]
+            try:
+                remaining = len(tasks)
+                for next_done in asyncio.as_completed(tasks):
+                    remaining -= 1
+                    decided, consistent_ip = cls._vote(votes, await next_done, remaining, request["quorum"])
+                    if decided:
+                        break
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)  # Before a short-lived client is closed
+
+        return cls._current_ip_result(request, votes, consistent_ip, resolvers)
+
+    @classmethod
+    def get_current_ips(cls, resolvers_v4: list = None, resolvers_v6: list = None, quorum: int = None,
+                        timeout: float = 10) -> dict:
+        """
+        Discover the public IPv4 and IPv6 addresses in parallel (see get_current_ip).
+
+        :param resolvers_v4: Echo URLs reachable over IPv4 only.
+        :param resolvers_v6: Echo URLs reachable over IPv6 only.
+        :return: {"ipv4": str | None, "ipv6": str | None}. An answer of the wrong family counts as None.
+        """
+        families = {"ipv4": (resolvers_v4, validators.ipv4), "ipv6": (resolvers_v6, validators.ipv6)}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            futures = {family: executor.submit(cls.get_current_ip, resolvers, quorum, timeout)
+                       for family, (resolvers, _) in families.items() if resolvers}
+
+        result = {"ipv4": None, "ipv6": None}
+        for family, future in futures.items():
+            public_ip = future.result()
+            if public_ip and not families[family][1](public_ip):
+                logging.error(f"[get_current_ips] {family} resolvers returned an address of another family: "
+                              f"{public_ip}")
+                public_ip = None
+            result[family] = public_ip
+        return result
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Resolve a domain to its IP address using a specific DNS server.")
     parser.add_argument("--host", default="github.com", help="Domain to resolve (default: github.com)")
     parser.add_argument("--dns_server", default="1.1.1.1", help="DNS server to use (default: 1.1.1.1)")
+    parser.add_argument("--hosts", nargs="+", help="Resolve several domains concurrently instead of --host")
+    parser.add_argument("--rdtypes", nargs="+", default=["A"], help="Record types for --hosts (default: A)")
+    parser.add_argument("--race", nargs="+", help="Race these DNS servers for --host and verify the answers agree")
+    parser.add_argument("--dual_stack", action="store_true", help="Resolve A and AAAA records of --host together")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
     args = parser.parse_args()
 
@@ -133,6 +642,21 @@ if __name__ == "__main__":
     logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
                         format="%(asctime)s - %(levelname)s - %(message)s")
 
+    if args.hosts:
+        for query in DNS_Resolver.resolve_many(args.hosts, [args.dns_server], args.rdtypes):
+            print(f"{query['host']} {query['rdtype']} via {query['server']}: "
+                  f"{', '.join(query['addresses']) or query['error']} "
+                  f"(TTL: {query['ttl']}, {query['duration_ms']} ms)")
+
+    if args.race:
+        race = DNS_Resolver.resolve_race(args.host, args.race, verify=True)
+        print(f"Race for {args.host}: {', '.join(race['addresses']) or race['error']} via {race['server']} "
+              f"({race['duration_ms']} ms, consistent: {race['consistent']})")
+
+    if args.dual_stack:
+        for item in DNS_Resolver.resolve_dual_stack(args.host, args.dns_server):
+            print(f"{args.host} IPv{item['family']}: {item['address']} (TTL: {item['ttl']})")
+
     result = DNS_Resolver.resolve_ip(args.host, args.dns_server)
     if result:
         print(f"Resolved IPs for {args.host} via {args.dns_server}: {', '.join(result)}")
@@ -143,4 +667,4 @@ if __name__ == "__main__":
     if current_ip:
         print(f"Public IP: {current_ip}")
     else:
-        print("Failed to determine public IP.")
\ No newline at end of file
+        print("Failed to determine public IP.")
@@ -1,14 +1,17 @@
-import ssl
+import os
+import json
 import logging
+import threading
 import argparse
-import base64
 import certifi
 import time
+import requests
+import requests.adapters
 import validators
-from urllib.request import urlopen, Request
-from urllib.error import URLError, HTTPError
 from .config_manager import ConfigManager
 from .KeyManager import KeyManager
+from .DNS_Resolver import DNS_Resolver
+from .file_helper import FileHelper
 
 
 class Dyn_Updater:
@@ -17,21 +20,62 @@ class Dyn_Updater:
 
     :param dyn_config: A dictionary containing configuration data. Must include:
         - dyn_endpoint: The API endpoint for the dynamic DNS update.
+        Optional:
+        - dyn_state_file: Where the last pushed IP per hostname and address family is kept
+          (default: DATA/dyn_state.json).
+        - dyn_verify_dns: Nameserver (or list of nameservers) used to check whether a hostname already
+          resolves to the new IP before sending an update.
+        - dyn_batch_size: Maximum hostnames per update request (default: 20).
+        - dyn_connect_timeout / dyn_read_timeout: HTTP timeouts in seconds (default: 5 / 15).
+        - dyn_911_backoff: Seconds to suspend updates after '911' / 'dnserr' or HTTP 429 / 503 (default: 1800).
+        - dyn_abuse_backoff: Seconds to suspend updates after 'abuse', 'badauth', 'badagent' or '!donator'
+          (default: 86400).
+        - dyn_min_interval: Minimum seconds between two requests to the provider (default: 0).
     :type dyn_config: dict
+    :param credentials: Optional (username, token) pair. When omitted, 'dyn_username' and 'dyn_token' are read
+        from KeyManager.
     :raises KeyError: If 'dyn_endpoint' is not present in the configuration.
     """
 
-    def __init__(self, dyn_config: dict):
-        self.key_manager = KeyManager()
-        self.context = ssl.create_default_context(cafile=certifi.where())
-        self.dyn_username = self.__get_key('dyn_username')
-        self.dyn_token = self.__get_key('dyn_token')
+    SUCCESS_CODES = ("good", "nochg")
+    RETRY_CODES = ("911", "dnserr")
+    ABUSE_CODES = ("abuse", "badauth", "badagent", "!donator")
+    SUSPENSION_KEY = "__suspension__"
+    USER_AGENT = "template_python_on_docker-Dyn_Updater-1.0"
+
+    def __init__(self, dyn_config: dict, credentials: tuple[str, str] = None):
+        if credentials:
+            self.dyn_username, self.dyn_token = credentials
+        else:
+            self.key_manager = KeyManager()
+            self.dyn_username = self.__get_key('dyn_username')
+            self.dyn_token = self.__get_key('dyn_token')
 
         # Validate the required key
         if "dyn_endpoint" not in dyn_config:
             raise KeyError("[Dyn_Updater] The configuration dictionary must include a 'dyn_endpoint' key.")
 
         self.dyn_endpoint = dyn_config["dyn_endpoint"]
+        self.verify_dns = dyn_config.get("dyn_verify_dns")
+        self.batch_size = int(dyn_config.get("dyn_batch_size", 20))  # dyndns2 allows up to 20 hostnames per request
+        self.timeout = (float(dyn_config.get("dyn_connect_timeout", 5)), float(dyn_config.get("dyn_read_timeout", 15)))
+        self.retry_backoff = int(dyn_config.get("dyn_911_backoff", 1800))
+        self.abuse_backoff = int(dyn_config.get("dyn_abuse_backoff", 86400))
+        self.min_interval = float(dyn_config.get("dyn_min_interval", 0))
+        self._send_lock = threading.Lock()
+        self._last_send = 0.0
+
+        # Persistent keep-alive connections to the provider
+        self.session = requests.Session()
+        self.session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.verify = certifi.where()
+        self.session.auth = (self.dyn_username, self.dyn_token)
+        self.session.headers["User-Agent"] = self.USER_AGENT
+
+        data_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '../DATA'))
+        self.state_file = dyn_config.get("dyn_state_file") or os.path.join(data_folder, 'dyn_state.json')
+        self._state_lock = threading.Lock()
+        self.state = self._load_state()
 
     def __get_key(self, token_name: str) -> str:
         if not self.key_manager.exists(token_name):
@@ -41,31 +85,136 @@ class Dyn_Updater:
 
         return self.key_manager.get(token_name)
 
-    def update(self, host: str, ip_address: str) -> dict:
-        if not validators.domain(host):
-            return {"success": False, "error": f"Invalid host: {host}"}
-        if not (validators.ipv4(ip_address) or validators.ipv6(ip_address)):
-            return {"success": False, "error": f"Invalid IP address: {ip_address}"}
+    def _load_state(self) -> dict:
+        if not os.path.exists(self.state_file):
+            return {}
 
-        url = f"{self.dyn_endpoint}?hostname={host}&myip={ip_address}"
-        logging.debug(f"[dyn.update] URL prepared")
+        try:
+            return FileHelper.read_json(self.state_file)
+        except (json.JSONDecodeError, IOError) as e:
+            logging.error(f"[dyn._load_state] Error loading {self.state_file}: {e}")
+            return {}
+
+    def _save_state(self) -> None:
+        try:
+            FileHelper.write_json_atomic(self.state_file, self.state)
+        except OSError as e:
+            logging.error(f"[dyn._save_state] Error writing {self.state_file}: {e}")
+
+    @staticmethod
+    def _state_key(host: str, ip_address: str) -> str:
+        """State entry of a hostname for the IP's family, so its A and AAAA records do not overwrite each other."""
+        return f"{host}/{'AAAA' if validators.ipv6(ip_address) else 'A'}"
+
+    def _record_state(self, host: str | list[str], ip_address: str, status: str) -> None:
+        with self._state_lock:
+            for hostname in [host] if isinstance(host, str) else host:
+                self.state[self._state_key(hostname, ip_address)] = {"ip": ip_address, "status": status,
+                                                                     "updated": time.time()}
+            self._save_state()
+
+    def suspended_until(self) -> float | None:
+        """Return the epoch time updates are suspended until, or None if updates are allowed."""
+        suspension = self.state.get(self.SUSPENSION_KEY)
+        if suspension and suspension["until"] > time.time():
+            return suspension["until"]
+        return None
 
-        credentials = f"{self.dyn_username}:{self.dyn_token}"
-        encoded_credentials = base64.b64encode(credentials.encode('utf-8')).decode('utf-8')
-        headers = {"Authorization": f"Basic {encoded_credentials}"}
+    def _suspend(self, seconds: int, reason: str) -> None:
+        until = time.time() + seconds
+        with self._state_lock:
+            self.state[self.SUSPENSION_KEY] = {"until": until, "reason": reason}
+            self._save_state()
+        logging.error(f"[dyn._suspend] Provider answered '{reason}'. Updates suspended for {seconds} s "
+                      f"(until {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(until))}).")
+
+    def _apply_backoff(self, response_text: str) -> None:
+        codes = {line.split()[0] for line in response_text.splitlines() if line.strip()}
+        abuse = codes.intersection(self.ABUSE_CODES)
+        if abuse:
+            self._suspend(self.abuse_backoff, ", ".join(sorted(abuse)))
+        elif codes.intersection(self.RETRY_CODES):
+            self._suspend(self.retry_backoff, ", ".join(sorted(codes.intersection(self.RETRY_CODES))))
+
+    def _throttle(self) -> None:
+        """Wait until dyn_min_interval has passed since the previous request to this provider."""
+        with self._send_lock:
+            wait = self._last_send + self.min_interval - time.time()
+            if wait > 0:
+                logging.debug(f"[dyn._throttle] Waiting {wait:.2f} s before the next request")
+                time.sleep(wait)
+            self._last_send = time.time()
+
+    def _already_pushed(self, host: str, ip_address: str) -> bool:
+        return self.state.get(self._state_key(host, ip_address), {}).get("ip") == ip_address
+
+    def resolve_hosts(self, hosts: list[str], ip_address: str) -> dict[str, list[str]]:
+        """
+        Resolve the hostnames on the dyn_verify_dns nameservers in one concurrent batch, for the record type of
+        the IP only (A or AAAA).
+
+        :return: {host: addresses answered by any of the nameservers}
+        """
+        servers = [self.verify_dns] if isinstance(self.verify_dns, str) else list(self.verify_dns)
+        resolved = {host: [] for host in hosts}
+        for result in DNS_Resolver.resolve_many(hosts, servers, ['AAAA' if validators.ipv6(ip_address) else 'A']):
+            if result["success"]:
+                resolved[result["host"]].extend(result["addresses"])
+        return resolved
+
+    def is_current(self, host: str, ip_address: str, resolved: dict = None) -> bool:
+        """
+        Return True if the hostname already points to the IP: either it was the last IP pushed,
+        or (when dyn_verify_dns is set) DNS already resolves the hostname to it.
+
+        :param resolved: {host: addresses} from resolve_hosts, to check many hostnames with one batch of queries.
+        """
+        if self._already_pushed(host, ip_address):
+            logging.info(f"[dyn.is_current] {host} already pushed as {ip_address}")
+            return True
+
+        if self.verify_dns:
+            if resolved is None:
+                resolved = self.resolve_hosts([host], ip_address)
+            if ip_address in resolved.get(host, ()):
+                logging.info(f"[dyn.is_current] {host} already resolves to {ip_address}")
+                self._record_state(host, ip_address, "verified")
+                return True
+
+        return False
+
+    def _send(self, hosts: list[str], ip_address: str) -> dict:
+        """Send one dyndns2 request for one or more hostnames and return the raw result."""
+        suspended_until = self.suspended_until()
+        if suspended_until:
+            reason = self.state[self.SUSPENSION_KEY]["reason"]
+            error = (f"Updates suspended until {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(suspended_until))}"
+                     f" ({reason})")
+            logging.warning(f'[dyn.update] {error}')
+            return {"success": False, "error": error, "suspended": True, "duration_ms": 0}
+
+        url = f"{self.dyn_endpoint}?hostname={','.join(hosts)}&myip={ip_address}"
+        logging.debug(f"[dyn.update] URL prepared")
 
+        self._throttle()
         start_time = time.time()
         result = None
 
         try:
-            request = Request(url, headers=headers)
-            response = urlopen(request, context=self.context)
-            response_text = response.read().decode('utf-8')
-            result = {"success": True, "response": response_text}
-        except HTTPError as e:
-            result = {"success": False, "error": f"HTTPError: {e.code} - {e.reason}"}
-        except URLError as e:
-            result = {"success": False, "error": f"URLError: {e.reason}"}
+            response = self.session.get(url, timeout=self.timeout)
+            if response.status_code == 200:
+                result = {"success": True, "response": response.text}
+                self._apply_backoff(response.text)
+            else:
+                result = {"success": False, "error": f"HTTPError: {response.status_code} - {response.reason}"}
+                if response.status_code in (429, 503):
+                    retry_after = response.headers.get("Retry-After", "")
+                    self._suspend(int(retry_after) if retry_after.isdigit() else self.retry_backoff,
+                                  f"HTTP {response.status_code}")
+        except requests.Timeout as e:
+            result = {"success": False, "error": f"Timeout: {e}"}
+        except requests.RequestException as e:
+            result = {"success": False, "error": f"RequestException: {e}"}
         except Exception as e:
             result = {"success": False, "error": f"Unexpected error: {e}"}
         finally:
@@ -73,13 +222,124 @@ class Dyn_Updater:
             response_time = round((end_time - start_time) * 1000) # Convert to milliseconds
             # Add duration to the log message and result
             if result["success"]:
-                logging.info(f'[dyn.update] Update Status: {result["response"]} (Duration: {response_time:.2f} ms)')
+                logging.info(f'[dyn.update] Update Status: {result["response"].strip()} '
+                             f'(Hosts: {len(hosts)}, Duration: {response_time:.2f} ms)')
             else:
                 logging.error(f'[dyn.update] {result["error"]} (Duration: {response_time:.2f} ms)')
             result["duration_ms"] = response_time
 
         return result
 
+    @staticmethod
+    def parse_response(response_text: str, hosts: list[str]) -> list[dict]:
+        """
+        Split a dyndns2 response into one result per hostname.
+
+        The provider answers one line per hostname, in request order (e.g. "good 1.2.3.4", "nochg 1.2.3.4",
+        "nohost", "abuse", "911"). A single line for several hostnames applies to all of them.
+
+        :return: [{"host", "success", "code", "ip", "response"}, ...]
+        """
+        lines = [line.strip() for line in response_text.strip().splitlines() if line.strip()] or [""]
+        if len(lines) < len(hosts):
+            lines = lines + [lines[-1]] * (len(hosts) - len(lines))
+
+        results = []
+        for host, line in zip(hosts, lines):
+            parts = line.split()
+            code = parts[0] if parts else ""
+            results.append({
+                "host": host,
+                "success": code in Dyn_Updater.SUCCESS_CODES,
+                "code": code,
+                "ip": parts[1] if len(parts) > 1 else None,
+                "response": line,
+            })
+        return results
+
+    def update(self, host: str, ip_address: str, force: bool = False) -> dict:
+        """
+        Push an IP for a hostname, unless it is already current (see is_current).
+
+        :param host: Hostname to update.
+        :param ip_address: IPv4 or IPv6 address.
+        :param force: Send the update even if the IP did not change.
+        :return: {"success", "response" or "error", "duration_ms"}, plus "skipped": True when nothing was sent.
+        """
+        if not validators.domain(host):
+            return {"success": False, "error": f"Invalid host: {host}"}
+        if not (validators.ipv4(ip_address) or validators.ipv6(ip_address)):
+            return {"success": False, "error": f"Invalid IP address: {ip_address}"}
+
+        if not force and self.is_current(host, ip_address):
+            return {"success": True, "response": f"skipped {ip_address}", "skipped": True, "duration_ms": 0}
+
+        result = self._send([host], ip_address)
+        if result["success"]:
+            status = self.parse_response(result["response"], [host])[0]
+            if status["success"]:
+                self._record_state(host, ip_address, status["code"])
+
+        return result
+
+    def update_many(self, hosts: list[str], ip_address: str, force: bool = False) -> list[dict]:
+        """
+        Push one IP for many hostnames using as few requests as the provider allows (dyn_batch_size per request).
+
+        :param hosts: Hostnames to update.
+        :param ip_address: IPv4 or IPv6 address.
+        :param force: Send updates even for hostnames whose IP did not change.
+        :return: One dict per hostname: {"host", "success", "code", "ip", "response" or "error",
+            "skipped", "duration_ms"}. Skipped hostnames have code "skipped".
+        """
+        if not (validators.ipv4(ip_address) or validators.ipv6(ip_address)):
+            return [{"host": host, "success": False, "code": None, "error": f"Invalid IP address: {ip_address}",
+                     "skipped": False, "duration_ms": 0} for host in hosts]
+
+        results = {}
+        pending = []
+        resolved = None
+        if self.verify_dns and not force:
+            unverified = [host for host in dict.fromkeys(hosts)
+                          if validators.domain(host) and not self._already_pushed(host, ip_address)]
+            resolved = self.resolve_hosts(unverified, ip_address) if unverified else {}
+
+        for host in dict.fromkeys(hosts):
+            if not validators.domain(host):
+                results[host] = {"host": host, "success": False, "code": None, "error": f"Invalid host: {host}",
+                                 "skipped": False, "duration_ms": 0}
+            elif not force and self.is_current(host, ip_address, resolved):
+                results[host] = {"host": host, "success": True, "code": "skipped", "ip": ip_address,
+                                 "response": f"skipped {ip_address}", "skipped": True, "duration_ms": 0}
+            else:
+                pending.append(host)
+
+        for index in range(0, len(pending), self.batch_size):
+            batch = pending[index:index + self.batch_size]
+            sent = self._send(batch, ip_address)
+
+            if not sent["success"]:
+                for host in batch:
+                    results[host] = {"host": host, "success": False, "code": None, "error": sent["error"],
+                                     "skipped": False, "duration_ms": sent["duration_ms"]}
+                continue
+
+            updated = []
+            for status in self.parse_response(sent["response"], batch):
+                status.update(skipped=False, duration_ms=sent["duration_ms"])
+                if status["success"]:
+                    updated.append(status["host"])
+                else:
+                    status["error"] = status["response"]
+                results[status["host"]] = status
+
+            if updated:
+                self._record_state(updated, ip_address, "updated")
+
+        logging.info(f"[dyn.update_many] {sum(1 for r in results.values() if r['success'])}/{len(results)} hosts "
+                     f"current or updated to {ip_address} ({len(pending)} sent)")
+        return [results[host] for host in dict.fromkeys(hosts)]
+
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="User input for the Dyn username and token generation")
@@ -93,4 +353,7 @@ if __name__ == '__main__':
 
     dyn = Dyn_Updater(config)
     update_result = dyn.update("kityan-hgc.dyndns.org", "223.19.132.251")
-    print(update_result)
\ No newline at end of file
+    print(update_result)
+
+    for host_result in dyn.update_many(["kityan-hgc.dyndns.org"], "223.19.132.251"):
+        print(host_result)
\ No newline at end of file
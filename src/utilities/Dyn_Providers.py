@@ -0,0 +1,120 @@
+import os
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from .config_manager import ConfigManager
+from .KeyManager import KeyManager
+from .Dyn import Dyn_Updater
+
+
+class Dyn_Providers:
+    """
+    Dynamic DNS updates across several providers.
+
+    Every provider gets its own Dyn_Updater (connection pool, rate limit, backoff and state file), and a batch of
+    hostnames is split by provider and dispatched concurrently, so a slow or suspended provider does not delay
+    the others. All credentials are decrypted with a single KeyManager unlock.
+
+    :param config: A dictionary containing configuration data:
+        - dyn_providers: {name: provider settings}. Each provider takes the Dyn_Updater keys (dyn_endpoint,
+          dyn_min_interval, dyn_batch_size, ...), falling back to the top-level values, plus:
+            - username_key / token_key: KeyManager items holding the credentials
+              (default: '<name>_username' / '<name>_token').
+        - dyn_hosts: {hostname: provider name}.
+        - dyn_default_provider: Optional provider used for hostnames missing from dyn_hosts.
+    :param key_manager: Optional KeyManager to read credentials from.
+    :raises KeyError: If 'dyn_providers' is missing or a hostname maps to an unknown provider.
+    """
+
+    def __init__(self, config: dict, key_manager: KeyManager = None):
+        providers = ConfigManager.get(config, "dyn_providers", {})
+        if not providers:
+            raise KeyError("[Dyn_Providers] The configuration must include a non-empty 'dyn_providers' mapping.")
+
+        self.hosts = {host.lower(): name for host, name in ConfigManager.get(config, "dyn_hosts", {}).items()}
+        self.default_provider = config.get("dyn_default_provider")
+        mapped = set(self.hosts.values()) | ({self.default_provider} if self.default_provider else set())
+        unknown = mapped - set(providers)
+        if unknown:
+            raise KeyError(f"[Dyn_Providers] Hostnames map to unknown providers: {', '.join(sorted(unknown))}")
+
+        credential_keys = {name: (settings.get("username_key", f"{name}_username"),
+                                  settings.get("token_key", f"{name}_token"))
+                           for name, settings in providers.items()}
+        credentials = self._unlock(key_manager or KeyManager(),
+                                   [item for pair in credential_keys.values() for item in pair])
+
+        data_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '../DATA'))
+        shared = {key: value for key, value in config.items() if key.startswith("dyn_") and key not in
+                  ("dyn_providers", "dyn_hosts", "dyn_default_provider", "dyn_state_file")}
+        self.updaters = {}
+        for name, settings in providers.items():
+            provider_config = {**shared,
+                               "dyn_state_file": os.path.join(data_folder, f'dyn_state_{name}.json'),
+                               **settings}
+            username_key, token_key = credential_keys[name]
+            self.updaters[name] = Dyn_Updater(provider_config, (credentials[username_key], credentials[token_key]))
+
+        logging.info(f"[Dyn_Providers] {len(self.updaters)} providers, {len(self.hosts)} mapped hostnames")
+
+    @staticmethod
+    def _unlock(key_manager: KeyManager, items: list[str]) -> dict:
+        """Decrypt every credential in one pass, prompting only for the ones not stored yet."""
+        values = key_manager.get_many(items)
+        for item in items:
+            if values[item] is None and not key_manager.exists(item):
+                logging.error(f"[Dyn_Providers._unlock] Key '{item}' not found. Preparing to create a new one...")
+                key_manager.add(item)
+                values[item] = key_manager.get(item)
+        return values
+
+    def provider_for(self, host: str) -> str | None:
+        """Return the provider name for a hostname, or None if it is not mapped."""
+        return self.hosts.get(host.lower(), self.default_provider)
+
+    def update_many(self, hosts: list[str], ip_address: str, force: bool = False) -> list[dict]:
+        """
+        Push one IP for many hostnames, one concurrent Dyn_Updater.update_many call per provider.
+
+        :return: One dict per hostname, as Dyn_Updater.update_many, with an extra "provider" key.
+        """
+        start_time = time.time()
+        groups: dict[str, list[str]] = {}
+        results = {}
+        for host in dict.fromkeys(hosts):
+            provider = self.provider_for(host)
+            if provider is None:
+                results[host] = {"host": host, "provider": None, "success": False, "code": None,
+                                 "error": f"No provider configured for {host}", "skipped": False, "duration_ms": 0}
+            else:
+                groups.setdefault(provider, []).append(host)
+
+        if groups:
+            with ThreadPoolExecutor(max_workers=len(groups), thread_name_prefix="dyn_provider") as executor:
+                futures = {name: executor.submit(self.updaters[name].update_many, group, ip_address, force)
+                           for name, group in groups.items()}
+                for name, future in futures.items():
+                    for result in future.result():
+                        results[result["host"]] = {**result, "provider": name}
+
+        logging.info(f"[Dyn_Providers.update_many] {len(results)} hosts across {len(groups)} providers "
+                     f"(Duration: {round((time.time() - start_time) * 1000, 2)} ms)")
+        return [results[host] for host in dict.fromkeys(hosts)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Push an IP for every hostname in dyn_hosts")
+    parser.add_argument("ip", help="IP address to push")
+    parser.add_argument("--config", default="config.json", help="Configuration file (default: config.json)")
+    parser.add_argument("--force", action="store_true", help="Send updates even if the IP did not change")
+    parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format="%(asctime)s - %(levelname)s - %(message)s")
+
+    config = ConfigManager.load_config(args.config)
+    providers = Dyn_Providers(config)
+    for host_result in providers.update_many(list(providers.hosts), args.ip, args.force):
+        print(host_result)
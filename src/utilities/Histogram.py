@@ -0,0 +1,72 @@
+import bisect
+import threading
+
+
+class StreamingHistogram:
+    """
+    Fixed-size histogram over log-spaced buckets, for percentiles of an unbounded stream of samples.
+
+    Memory stays constant whatever the number of samples. Percentiles are reported as the upper bound
+    of the bucket holding the requested rank (relative error ~ growth - 1), clamped to the observed max.
+
+    :param min_value: Upper bound of the first bucket.
+    :param max_value: Values above this land in the overflow bucket.
+    :param growth: Ratio between consecutive bucket bounds.
+    """
+
+    def __init__(self, min_value: float = 0.1, max_value: float = 600_000, growth: float = 1.2):
+        bounds = [min_value]
+        while bounds[-1] < max_value:
+            bounds.append(bounds[-1] * growth)
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    def record(self, value: float) -> None:
+        """Add one sample."""
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            self.min = value if self.min is None or value < self.min else self.min
+            self.max = value if self.max is None or value > self.max else self.max
+
+    def percentile(self, percent: float) -> float | None:
+        """Return the approximate value below which `percent` % of the samples fall."""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = max(1, round(self.count * percent / 100))
+            seen = 0
+            for index, bucket_count in enumerate(self.counts):
+                seen += bucket_count
+                if seen >= rank:
+                    bound = self.bounds[index] if index < len(self.bounds) else self.max
+                    return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        """Return count, mean, min, max, p50, p95 and p99."""
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 2) if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+    def reset(self) -> None:
+        """Drop every sample."""
+        with self._lock:
+            self.counts = [0] * (len(self.bounds) + 1)
+            self.count = 0
+            self.total = 0.0
+            self.min = None
+            self.max = None
@@ -0,0 +1,230 @@
+import os
+import re
+import csv
+import json
+import logging
+import argparse
+import numpy as np
+from datetime import date
+from typing import Iterator
+from .Calendarific import Calendarific
+
+
+class HolidayCorpus:
+    """
+    Columnar view over every cached Calendarific year/country file.
+
+    Rows are held as a NumPy structured array of small fixed-width fields (date, country, primary type,
+    type bitmask, location code). Repeated strings are stored once in vocabularies, and names are kept
+    in a parallel object array. Filters are evaluated as vectorized boolean masks.
+
+    :param records: Structured array with RECORD_DTYPE.
+    :param names: Holiday names, aligned with records.
+    :param type_names: Vocabulary for the bits of the 'type_mask' field and codes of 'primary_type'.
+    :param location_names: Vocabulary for the codes of the 'location' field.
+    :param country_names: Country code to country name mapping.
+    """
+
+    FILE_PATTERN = re.compile(r"^calendar_data_(\d{4})_([A-Za-z0-9-]+)\.json(\.gz|\.xz)?$")
+    CSV_HEADERS = ["Country ID", "Country Name", "Name", "Date ISO", "Type", "Primary Type", "Locations"]
+    RECORD_DTYPE = np.dtype([
+        ("date", "datetime64[D]"),
+        ("country", "U3"),
+        ("primary_type", "u2"),
+        ("type_mask", "u8"),
+        ("location", "u4"),
+    ])
+    MAX_TYPES = 64  # One bit per holiday type in 'type_mask'
+
+    def __init__(self, records: np.ndarray, names: np.ndarray, type_names: list[str],
+                 location_names: list[str], country_names: dict[str, str]):
+        self.records = records
+        self.names = names
+        self.type_names = type_names
+        self.location_names = location_names
+        self.country_names = country_names
+
+    def __len__(self):
+        return len(self.records)
+
+    @staticmethod
+    def iter_cache_files(data_folder: str) -> Iterator[tuple[int, str, str]]:
+        """
+        Yield (year, country_code, file_name) for every cache file in the data folder.
+        If a year/country is cached in several formats, only the newest file is used.
+        """
+        latest = {}
+        for entry in os.scandir(data_folder):
+            match = HolidayCorpus.FILE_PATTERN.match(entry.name)
+            if not match or not entry.is_file():
+                continue
+            key = (int(match.group(1)), match.group(2).upper())
+            mtime = entry.stat().st_mtime
+            if key not in latest or mtime > latest[key][0]:
+                latest[key] = (mtime, entry.path)
+
+        for (year, country_code), (_, file_name) in sorted(latest.items()):
+            yield year, country_code, file_name
+
+    @staticmethod
+    def iter_records(data_folder: str) -> Iterator[tuple]:
+        """
+        Stream every cached holiday as a tuple in CSV_HEADERS order, one file at a time.
+        """
+        for year, country_code, file_name in HolidayCorpus.iter_cache_files(data_folder):
+            data = Calendarific.load_cached_file(file_name)
+            if not data or not Calendarific.is_valid_json(data):
+                logging.warning(f"[HolidayCorpus.iter_records] Skipping invalid cache file: {file_name}")
+                continue
+
+            for holiday_item in data['response']['holidays']:
+                yield (
+                    holiday_item['country']['id'].upper(),
+                    holiday_item['country']['name'],
+                    holiday_item['name'],
+                    holiday_item['date']['iso'][:10],
+                    ', '.join(holiday_item['type']),
+                    holiday_item.get('primary_type', ""),
+                    holiday_item.get('locations', ""),
+                )
+
+    @staticmethod
+    def export_csv(data_folder: str, file_name: str) -> int:
+        """Stream every cached holiday into a CSV file. Returns the number of rows written."""
+        count = 0
+        with open(file_name, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(HolidayCorpus.CSV_HEADERS)
+            for row in HolidayCorpus.iter_records(data_folder):
+                writer.writerow(row)
+                count += 1
+
+        logging.info(f"[HolidayCorpus.export_csv] Exported {count} holidays to {file_name}")
+        return count
+
+    @staticmethod
+    def export_jsonl(data_folder: str, file_name: str) -> int:
+        """Stream every cached holiday into a JSON-lines file. Returns the number of rows written."""
+        count = 0
+        with open(file_name, 'w', encoding='utf-8') as file:
+            for row in HolidayCorpus.iter_records(data_folder):
+                file.write(json.dumps(dict(zip(HolidayCorpus.CSV_HEADERS, row)), ensure_ascii=False) + "\n")
+                count += 1
+
+        logging.info(f"[HolidayCorpus.export_jsonl] Exported {count} holidays to {file_name}")
+        return count
+
+    @classmethod
+    def load(cls, data_folder: str) -> "HolidayCorpus":
+        """Load every cached holiday in one pass into a columnar HolidayCorpus."""
+        type_codes: dict[str, int] = {}
+        location_codes: dict[str, int] = {}
+        country_names: dict[str, str] = {}
+        dates, countries, primary_types, type_masks, locations, names = [], [], [], [], [], []
+
+        for country_id, country_name, name, date_iso, types, primary_type, location in cls.iter_records(data_folder):
+            mask = 0
+            for type_name in types.split(', ') if types else ():
+                mask |= 1 << type_codes.setdefault(type_name, len(type_codes))
+            primary_code = type_codes.setdefault(primary_type, len(type_codes))
+            if len(type_codes) > cls.MAX_TYPES:
+                raise ValueError(f"[HolidayCorpus.load] More than {cls.MAX_TYPES} distinct holiday types.")
+
+            country_names.setdefault(country_id, country_name)
+            dates.append(date_iso)
+            countries.append(country_id)
+            primary_types.append(primary_code)
+            type_masks.append(mask)
+            locations.append(location_codes.setdefault(location, len(location_codes)))
+            names.append(name)
+
+        records = np.empty(len(dates), dtype=cls.RECORD_DTYPE)
+        records["date"] = np.array(dates, dtype="datetime64[D]")
+        records["country"] = countries
+        records["primary_type"] = primary_types
+        records["type_mask"] = np.array(type_masks, dtype="u8")
+        records["location"] = locations
+
+        logging.info(f"[HolidayCorpus.load] Loaded {len(records)} holidays for {len(country_names)} countries.")
+        return cls(records, np.array(names, dtype=object), list(type_codes), list(location_codes), country_names)
+
+    def filter(self, types: list[str] = None, countries: list[str] = None, location: str = None,
+               start: date = None, end: date = None) -> "HolidayCorpus":
+        """
+        Return the subset matching every given criterion.
+
+        :param types: Keep holidays having any of these types (e.g. ["National holiday"]).
+        :param countries: Keep holidays of these country codes.
+        :param location: Keep holidays applying to this location (same rule as Calendarific.check_holidays).
+        :param start: Keep holidays on or after this date.
+        :param end: Keep holidays on or before this date.
+        """
+        mask = np.ones(len(self.records), dtype=bool)
+
+        if types is not None:
+            bits = 0
+            for type_name in types:
+                if type_name in self.type_names:
+                    bits |= 1 << self.type_names.index(type_name)
+            mask &= (self.records["type_mask"] & np.uint64(bits)) != 0
+
+        if countries is not None:
+            mask &= np.isin(self.records["country"], [country.upper() for country in countries])
+
+        if location is not None:
+            location_ok = np.array([Calendarific.matches_location(name, location) for name in self.location_names],
+                                   dtype=bool)
+            mask &= location_ok[self.records["location"]]
+
+        if start is not None:
+            mask &= self.records["date"] >= np.datetime64(start, "D")
+
+        if end is not None:
+            mask &= self.records["date"] <= np.datetime64(end, "D")
+
+        return HolidayCorpus(self.records[mask], self.names[mask], self.type_names, self.location_names,
+                             self.country_names)
+
+    def count_by_country(self) -> dict[str, int]:
+        """Return the number of holidays per country code."""
+        values, counts = np.unique(self.records["country"], return_counts=True)
+        return {str(value): int(count) for value, count in zip(values, counts)}
+
+    def unique_dates(self) -> list[date]:
+        """Return the sorted distinct holiday dates."""
+        return [day.item() for day in np.unique(self.records["date"])]
+
+    def iter_rows(self) -> Iterator[dict]:
+        """Yield rows as dictionaries keyed like Calendarific.transform_holiday_data (without 'Count Id')."""
+        for record, name in zip(self.records, self.names):
+            country_id = str(record["country"])
+            mask = int(record["type_mask"])
+            yield {
+                "Country ID": country_id,
+                "Country Name": self.country_names.get(country_id, ""),
+                "Name": name,
+                "Date ISO": str(record["date"]),
+                "Type": ', '.join(t for i, t in enumerate(self.type_names) if mask >> i & 1),
+                "Primary Type": self.type_names[record["primary_type"]],
+                "Locations": self.location_names[record["location"]],
+            }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export and summarize the cached Calendarific holiday corpus")
+    parser.add_argument("--data_folder", default="DATA", help="Folder holding calendar_data_* cache files")
+    parser.add_argument("--csv", help="Export all holidays to this CSV file")
+    parser.add_argument("--jsonl", help="Export all holidays to this JSON-lines file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    if args.csv:
+        HolidayCorpus.export_csv(args.data_folder, args.csv)
+    if args.jsonl:
+        HolidayCorpus.export_jsonl(args.data_folder, args.jsonl)
+
+    corpus = HolidayCorpus.load(args.data_folder)
+    national = corpus.filter(types=["National holiday"])
+    print(f"Holidays: {len(corpus)}, National holidays: {len(national)}")
+    print(f"Per country: {national.count_by_country()}")
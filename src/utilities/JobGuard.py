@@ -0,0 +1,213 @@
+import time
+import asyncio
+import logging
+import threading
+
+
+class JobTimeoutError(TimeoutError):
+    """Raised by a guarded run that passed its hard timeout."""
+
+
+class JobGuard:
+    """
+    Timeouts, overrun detection and overlap policy for one scheduled job.
+
+    The job body runs in its own daemon thread while the scheduler's worker waits for it. Python threads cannot
+    be killed, so a run past its hard timeout is abandoned: the worker returns with JobTimeoutError, freeing the
+    job's max_instances slot, and the stuck thread is left to finish or die with the process.
+
+    :param job_id: ID of the guarded job.
+    :param soft_timeout: Seconds after which a still running job is logged as slow.
+    :param hard_timeout: Seconds after which the run is abandoned and reported as failed.
+    :param overlap: What happens when a run is due while the previous one is still active:
+        - "skip": the new run is skipped (APScheduler max_instances=1).
+        - "queue": the new run waits for the previous one, then runs. One run at most waits.
+        - "replace": the previous run is abandoned and the new one starts.
+    :param interval: Seconds between runs, for overrun detection (interval triggers only).
+
+    Coroutine jobs go through run_async instead, where a hard timeout or a replacement really cancels the run.
+    """
+
+    OVERLAP_POLICIES = ("skip", "queue", "replace")
+
+    _registry: dict[str, "JobGuard"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, job_id: str, soft_timeout: float = None, hard_timeout: float = None, overlap: str = "skip",
+                 interval: float = None):
+        if overlap not in self.OVERLAP_POLICIES:
+            raise KeyError(f"[JobGuard] Invalid overlap policy for '{job_id}' "
+                           f"(allowed: {' / '.join(self.OVERLAP_POLICIES)}): {overlap}")
+
+        self.job_id = job_id
+        self.soft_timeout = float(soft_timeout) if soft_timeout else None
+        self.hard_timeout = float(hard_timeout) if hard_timeout else None
+        self.overlap = overlap
+        self.interval = interval
+        self.stats = {"soft_timeouts": 0, "hard_timeouts": 0, "overruns": 0, "queued": 0, "replaced": 0}
+        self._lock = threading.Lock()
+        self._queue_lock = threading.Lock()
+        self._current = None
+        self._async_queue_lock = None
+        self._current_task = None
+
+    @property
+    def max_instances(self) -> int:
+        """Instances APScheduler must allow: a second one waits (queue) or takes over (replace)."""
+        return 1 if self.overlap == "skip" else 2
+
+    @classmethod
+    def register(cls, guard: "JobGuard") -> None:
+        with cls._registry_lock:
+            cls._registry[guard.job_id] = guard
+
+    @classmethod
+    def get(cls, job_id: str) -> "JobGuard | None":
+        return cls._registry.get(job_id)
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+
+    def run(self, func, *args, **kwargs):
+        """Run func under the overlap policy and timeouts, returning its result or raising its exception."""
+        if self.overlap == "queue":
+            if self._queue_lock.locked():
+                self._count("queued")
+                logging.warning(f"[JobGuard.run] {self.job_id}: previous run still active, queued")
+            with self._queue_lock:
+                return self._run(func, args, kwargs)
+        return self._run(func, args, kwargs)
+
+    def _run(self, func, args, kwargs):
+        state = {"wake": threading.Event(), "finished": False, "replaced": False, "result": None, "error": None}
+
+        with self._lock:
+            previous, self._current = self._current, state
+        if previous and self.overlap == "replace" and not previous["finished"]:
+            previous["replaced"] = True
+            previous["wake"].set()
+
+        def target():
+            try:
+                state["result"] = func(*args, **kwargs)
+            except BaseException as e:
+                state["error"] = e
+            finally:
+                state["finished"] = True
+                state["wake"].set()
+
+        start_time = time.time()
+        threading.Thread(target=target, name=f"guarded_{self.job_id}", daemon=True).start()
+
+        soft_logged = False
+        while True:
+            deadlines = [limit for limit in (None if soft_logged else self.soft_timeout, self.hard_timeout) if limit]
+            elapsed = time.time() - start_time
+            if state["wake"].wait(max(min(deadlines) - elapsed, 0) if deadlines else None):
+                break
+
+            elapsed = time.time() - start_time
+            if self.hard_timeout and elapsed >= self.hard_timeout:
+                self._count("hard_timeouts")
+                self._release(state)
+                logging.error(f"[JobGuard.run] {self.job_id}: hard timeout after {elapsed:.1f} s, run abandoned")
+                raise JobTimeoutError(f"{self.job_id} exceeded its hard timeout of {self.hard_timeout} s")
+            if self.soft_timeout and elapsed >= self.soft_timeout:
+                soft_logged = True
+                self._count("soft_timeouts")
+                logging.warning(f"[JobGuard.run] {self.job_id}: still running after {elapsed:.1f} s "
+                                f"(soft timeout {self.soft_timeout} s)")
+
+        self._release(state)
+        duration = time.time() - start_time
+        if state["replaced"] and not state["finished"]:
+            self._count("replaced")
+            logging.warning(f"[JobGuard.run] {self.job_id}: run abandoned after {duration:.1f} s, "
+                            f"replaced by a new run")
+            return None
+
+        if self.interval and duration > self.interval:
+            self._count("overruns")
+            logging.warning(f"[JobGuard.run] {self.job_id}: run took {duration:.1f} s, "
+                            f"longer than its {self.interval:.0f} s interval")
+
+        if state["error"] is not None:
+            raise state["error"]
+        return state["result"]
+
+    def _release(self, state: dict) -> None:
+        with self._lock:
+            if self._current is state:
+                self._current = None
+
+    async def run_async(self, func, *args, **kwargs):
+        """Coroutine counterpart of run(), for async def jobs on an asyncio scheduler."""
+        if self.overlap == "queue":
+            if self._async_queue_lock is None:
+                self._async_queue_lock = asyncio.Lock()
+            if self._async_queue_lock.locked():
+                self._count("queued")
+                logging.warning(f"[JobGuard.run_async] {self.job_id}: previous run still active, queued")
+            async with self._async_queue_lock:
+                return await self._run_async(func, args, kwargs)
+        return await self._run_async(func, args, kwargs)
+
+    async def _run_async(self, func, args, kwargs):
+        task = asyncio.ensure_future(func(*args, **kwargs))
+        previous, self._current_task = self._current_task, task
+        if previous and self.overlap == "replace" and not previous.done():
+            self._count("replaced")
+            logging.warning(f"[JobGuard.run_async] {self.job_id}: previous run cancelled, replaced by a new run")
+            previous.cancel()
+
+        start_time = time.time()
+        try:
+            if self.soft_timeout and (not self.hard_timeout or self.soft_timeout < self.hard_timeout):
+                done, _ = await asyncio.wait({task}, timeout=self.soft_timeout)
+                if not done:
+                    self._count("soft_timeouts")
+                    logging.warning(f"[JobGuard.run_async] {self.job_id}: still running after "
+                                    f"{time.time() - start_time:.1f} s (soft timeout {self.soft_timeout} s)")
+            remaining = self.hard_timeout - (time.time() - start_time) if self.hard_timeout else None
+            try:
+                result = await asyncio.wait_for(asyncio.shield(task), max(remaining, 0) if remaining else None)
+            except asyncio.TimeoutError:
+                task.cancel()
+                self._count("hard_timeouts")
+                logging.error(f"[JobGuard.run_async] {self.job_id}: hard timeout after "
+                              f"{time.time() - start_time:.1f} s, run cancelled")
+                raise JobTimeoutError(f"{self.job_id} exceeded its hard timeout of {self.hard_timeout} s")
+        except asyncio.CancelledError:
+            if task.cancelled() and self._current_task is not task:
+                return None
+            raise
+        finally:
+            if self._current_task is task:
+                self._current_task = None
+
+        duration = time.time() - start_time
+        if self.interval and duration > self.interval:
+            self._count("overruns")
+            logging.warning(f"[JobGuard.run_async] {self.job_id}: run took {duration:.1f} s, "
+                            f"longer than its {self.interval:.0f} s interval")
+        return result
+
+
+def run_guarded(job_id: str, func, *args, **kwargs):
+    """
+    Job entry point used by Scheduler for guarded jobs. Module-level so that it can be stored in a persistent
+    job store. Without a registered guard (e.g. in a process pool worker), func runs directly.
+    """
+    guard = JobGuard.get(job_id)
+    if guard is None:
+        return func(*args, **kwargs)
+    return guard.run(func, *args, **kwargs)
+
+
+async def run_guarded_async(job_id: str, func, *args, **kwargs):
+    """Coroutine counterpart of run_guarded, used by Scheduler for async def jobs."""
+    guard = JobGuard.get(job_id)
+    if guard is None:
+        return await func(*args, **kwargs)
+    return await guard.run_async(func, *args, **kwargs)
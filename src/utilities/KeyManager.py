@@ -148,6 +148,33 @@ class KeyManager:
                     return None
         return None
 
+    def get_many(self, items) -> dict:
+        """
+        Decrypt several items with a single read of the key store.
+        Items that are missing or cannot be decrypted map to None.
+
+        Parameters:
+            items (list): The item names.
+        """
+        wanted = set(items)
+        keys_data = {k['Name']: k for k in self._read_keys_from_file() if k['Name'] in wanted}
+        values = {}
+        for item in items:
+            key_data = keys_data.get(item)
+            if key_data is None:
+                values[item] = None
+            elif 'Salt' not in key_data:
+                logging.error(f"[KeyManager][get_many] '{item}' uses old format. Re-run --setup to re-add it.")
+                values[item] = None
+            else:
+                cipher_key = self._get_fernet_key(base64.b64decode(key_data['Salt']))
+                try:
+                    values[item] = Fernet(cipher_key).decrypt(key_data['Key'].encode()).decode('utf-8')
+                except InvalidToken:
+                    logging.error(f"[KeyManager][get_many] Failed to decrypt '{item}'. Wrong master password?")
+                    values[item] = None
+        return values
+
     def list(self) -> list:
         """
         List the names of all saved records.
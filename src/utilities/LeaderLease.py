@@ -0,0 +1,71 @@
+import os
+import time
+import socket
+import sqlite3
+import logging
+import threading
+
+
+class LeaderLease:
+    """
+    Time-limited leadership record in a SQLite file shared by several replicas (e.g. containers on one DATA/ volume).
+
+    A replica is leader while it holds an unexpired lease. The holder renews it well before it expires; any
+    replica may take it over once it has expired, so a replica that dies is replaced after at most `ttl` seconds.
+
+    :param file_name: Database file. Defaults to DATA/scheduler_lease.sqlite next to Token.key.
+    :param name: Lease name, one leader per name.
+    :param ttl: Seconds a lease stays valid without renewal.
+    :param owner: ID of this replica. Defaults to '<hostname>:<pid>' (the container ID in Docker).
+    """
+
+    def __init__(self, file_name: str = None, name: str = "scheduler", ttl: float = 30, owner: str = None):
+        data_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '../DATA'))
+        self.file_name = file_name or os.path.join(data_folder, 'scheduler_lease.sqlite')
+        self.name = name
+        self.ttl = float(ttl)
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.expires = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(self.file_name)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.file_name, timeout=5, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS leases "
+                                 "(name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)")
+        self._connection.commit()
+
+    @property
+    def is_leader(self) -> bool:
+        """True while this replica holds a lease that has not expired."""
+        return self.expires > time.time()
+
+    def acquire(self) -> bool:
+        """Take or renew the lease. Returns True if this replica is the leader."""
+        now = time.time()
+        with self._lock, self._connection:
+            acquired = self._connection.execute(
+                "INSERT INTO leases (name, owner, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires = excluded.expires "
+                "WHERE leases.owner = excluded.owner OR leases.expires < ?",
+                (self.name, self.owner, now + self.ttl, now)).rowcount == 1
+        self.expires = now + self.ttl if acquired else 0.0
+        return acquired
+
+    def release(self) -> None:
+        """Give the lease up so another replica can take over without waiting for it to expire."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (self.name, self.owner))
+        self.expires = 0.0
+        logging.info(f"[LeaderLease.release] {self.owner} released the '{self.name}' lease")
+
+    def holder(self) -> tuple[str, float] | None:
+        """Return (owner, expiry timestamp) of the current lease, or None."""
+        with self._lock:
+            row = self._connection.execute("SELECT owner, expires FROM leases WHERE name = ?",
+                                           (self.name,)).fetchone()
+        return row if row and row[1] > time.time() else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
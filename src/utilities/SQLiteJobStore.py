@@ -0,0 +1,133 @@
+import os
+import pickle
+import sqlite3
+import logging
+import threading
+from apscheduler.job import Job
+from apscheduler.jobstores.base import BaseJobStore, ConflictingIdError, JobLookupError
+from apscheduler.util import datetime_to_utc_timestamp, utc_timestamp_to_datetime
+
+
+class SQLiteJobStore(BaseJobStore):
+    """
+    APScheduler job store persisting jobs in a SQLite file with the standard library sqlite3 module.
+
+    Same table layout as APScheduler's SQLAlchemyJobStore (id, next_run_time, pickled job state), without
+    the SQLAlchemy dependency.
+
+    :param file_name: Database file. Defaults to DATA/jobs.sqlite next to Token.key.
+    :param table_name: Table holding the jobs.
+    """
+
+    def __init__(self, file_name: str = None, table_name: str = "apscheduler_jobs"):
+        super().__init__()
+        data_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '../DATA'))
+        self.file_name = file_name or os.path.join(data_folder, 'jobs.sqlite')
+        self.table_name = table_name
+        os.makedirs(os.path.dirname(os.path.abspath(self.file_name)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.file_name, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(f"CREATE TABLE IF NOT EXISTS {self.table_name} "
+                                 f"(id TEXT PRIMARY KEY, next_run_time REAL, job_state BLOB NOT NULL)")
+        self._connection.execute(f"CREATE INDEX IF NOT EXISTS {self.table_name}_next_run_time "
+                                 f"ON {self.table_name} (next_run_time)")
+        self._connection.commit()
+
+    def _query(self, sql: str, parameters: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def _execute(self, sql: str, parameters: tuple = ()) -> int:
+        """Run one statement in its own transaction and return the number of rows changed."""
+        with self._lock, self._connection:
+            return self._connection.execute(sql, parameters).rowcount
+
+    def next_run_times(self) -> dict:
+        """Return {job_id: next run time} for every stored job that is not paused. Usable before start()."""
+        rows = self._query(f"SELECT id, next_run_time FROM {self.table_name} WHERE next_run_time IS NOT NULL")
+        return {job_id: utc_timestamp_to_datetime(timestamp) for job_id, timestamp in rows}
+
+    def prune(self, keep_ids) -> list[str]:
+        """Delete stored jobs whose ID is not in keep_ids, e.g. jobs removed from config.json. Usable before start()."""
+        keep_ids = set(keep_ids)
+        stale = [job_id for (job_id,) in self._query(f"SELECT id FROM {self.table_name}") if job_id not in keep_ids]
+        for job_id in stale:
+            self._execute(f"DELETE FROM {self.table_name} WHERE id = ?", (job_id,))
+        if stale:
+            logging.info(f"[SQLiteJobStore.prune] Removed stale jobs: {', '.join(stale)}")
+        return stale
+
+    def lookup_job(self, job_id):
+        rows = self._query(f"SELECT job_state FROM {self.table_name} WHERE id = ?", (job_id,))
+        return self._reconstitute_job(rows[0][0]) if rows else None
+
+    def get_due_jobs(self, now):
+        return self._get_jobs("WHERE next_run_time <= ?", (datetime_to_utc_timestamp(now),))
+
+    def get_next_run_time(self):
+        rows = self._query(f"SELECT next_run_time FROM {self.table_name} WHERE next_run_time IS NOT NULL "
+                           f"ORDER BY next_run_time LIMIT 1")
+        return utc_timestamp_to_datetime(rows[0][0]) if rows else None
+
+    def get_all_jobs(self):
+        jobs = self._get_jobs()
+        self._fix_paused_jobs_sorting(jobs)
+        return jobs
+
+    def add_job(self, job):
+        try:
+            self._execute(f"INSERT INTO {self.table_name} (id, next_run_time, job_state) VALUES (?, ?, ?)",
+                          (job.id, datetime_to_utc_timestamp(job.next_run_time), self._dump_job(job)))
+        except sqlite3.IntegrityError:
+            raise ConflictingIdError(job.id)
+
+    def update_job(self, job):
+        updated = self._execute(f"UPDATE {self.table_name} SET next_run_time = ?, job_state = ? WHERE id = ?",
+                                (datetime_to_utc_timestamp(job.next_run_time), self._dump_job(job), job.id))
+        if updated == 0:
+            raise JobLookupError(job.id)
+
+    def remove_job(self, job_id):
+        if self._execute(f"DELETE FROM {self.table_name} WHERE id = ?", (job_id,)) == 0:
+            raise JobLookupError(job_id)
+
+    def remove_all_jobs(self):
+        self._execute(f"DELETE FROM {self.table_name}")
+
+    def shutdown(self):
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def _dump_job(job) -> bytes:
+        return pickle.dumps(job.__getstate__(), pickle.HIGHEST_PROTOCOL)
+
+    def _reconstitute_job(self, job_state):
+        job_state = pickle.loads(job_state)
+        job_state["jobstore"] = self
+        job = Job.__new__(Job)
+        job.__setstate__(job_state)
+        job._scheduler = self._scheduler
+        job._jobstore_alias = self._alias
+        return job
+
+    def _get_jobs(self, condition: str = "", parameters: tuple = ()):
+        jobs = []
+        failed_job_ids = []
+        rows = self._query(f"SELECT id, job_state FROM {self.table_name} {condition} ORDER BY next_run_time",
+                           parameters)
+        for job_id, job_state in rows:
+            try:
+                jobs.append(self._reconstitute_job(job_state))
+            except BaseException:
+                self._logger.exception(f'Unable to restore job "{job_id}" -- removing it')
+                failed_job_ids.append(job_id)
+
+        for job_id in failed_job_ids:
+            self._execute(f"DELETE FROM {self.table_name} WHERE id = ?", (job_id,))
+        return jobs
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} (file={self.file_name})>"
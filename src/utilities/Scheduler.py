@@ -1,41 +1,349 @@
+import os
+import re
 import sys
+import asyncio
+import sqlite3
 import logging
+import threading
 import time
+import tempfile
+import concurrent.futures
+import httpx
+from datetime import datetime, timezone
 from tzlocal import get_localzone
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, EVENT_JOB_MISSED
+from apscheduler.executors.asyncio import AsyncIOExecutor
+from apscheduler.executors.pool import ThreadPoolExecutor, ProcessPoolExecutor
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.triggers.base import BaseTrigger
+from apscheduler.triggers.combining import AndTrigger, OrTrigger
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.events import EVENT_JOB_ADDED, EVENT_JOB_MODIFIED, EVENT_JOB_REMOVED, EVENT_JOB_SUBMITTED, \
+    EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES
+from apscheduler.util import obj_to_ref
+from .Histogram import StreamingHistogram
+from .JobGuard import JobGuard, run_guarded, run_guarded_async
 from .TimeToolkit import TimeToolkit
+from .SQLiteJobStore import SQLiteJobStore
+from .LeaderLease import LeaderLease
+from .BusinessDayTrigger import BusinessDayTrigger
+from .file_helper import FileHelper
 
 
 class Scheduler:
-    def __init__(self):
-        self.scheduler = BackgroundScheduler(
-            timezone=str(get_localzone()),
-            job_defaults={"coalesce": False, "max_instances": 1}
-        )
-        self.scheduler.add_listener(self.__job_listener, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED)
+    """
+    Wrapper around APScheduler's BackgroundScheduler, or AsyncIOScheduler in asyncio mode.
+
+    :param config: Optional dictionary with scheduler settings:
+        - scheduler_mode: "background" (default) or "asyncio". In asyncio mode the scheduler runs on an event loop
+          in a background thread: coroutine jobs (async def) all run on that loop, plain functions in its
+          default thread pool. The loop owns one httpx client (http_client) for the jobs to share, closed on stop.
+        - scheduler_executors: {name: {"type": "thread" | "process" | "asyncio", "max_workers": int}}. A "default"
+          executor (10 threads, or the event loop in asyncio mode) is added when not configured. Jobs on a process
+          pool must be module-level functions.
+        - scheduler_job_defaults: Defaults for every job (default: {"coalesce": false, "max_instances": 1}).
+        - scheduler_jobs: {job_id: {"executor", "max_instances", "coalesce", "soft_timeout", "hard_timeout",
+          "overlap"}} overrides for single jobs (see JobGuard for the timeouts and overlap policies).
+        - scheduler_jitter: Default maximum random delay in seconds added to every run (default: 0), so many
+          jobs on the same schedule do not all fire on the same second.
+        - scheduler_job_store: "y" to persist jobs and their next run times in SQLite (default: "n").
+        - scheduler_job_store_file: Database file (default: DATA/jobs.sqlite).
+        - scheduler_catchup_concurrency: Maximum catch-up runs executing at once after a restart (default: 2).
+        - scheduler_coordination: "y" to run jobs on one replica only when several share the DATA/ volume
+          (default: "n"). Replicas compete for a lease (see LeaderLease); standby replicas keep the scheduler
+          paused and take over once the leader stops renewing it.
+        - scheduler_lease_file: Lease database (default: DATA/scheduler_lease.sqlite).
+        - scheduler_lease_ttl: Seconds before an unrenewed lease can be taken over (default: 30).
+        - scheduler_replica_id: ID of this replica (default: '<hostname>:<pid>').
+        - scheduler_weekend_days: Non-business weekdays for business_days jobs, Monday = 0 (default: [5, 6]).
+          Holidays come from Calendarific (calendarific_country, with locations) when calendarific_endpoint is
+          configured.
+        - scheduler_heartbeat_interval: Seconds between heartbeat writes (default: 30, 0 disables). The heartbeat is
+          written by a job of the scheduler itself, so a wedged scheduler or saturated default executor stops it.
+        - scheduler_heartbeat_file: Heartbeat file read by healthcheck.py (default: $HEARTBEAT_FILE, or
+          /tmp/heartbeat.json). Keep it out of the shared DATA/ volume: a replica must only report its own health.
+    """
+
+    EXECUTOR_TYPES = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor, "asyncio": AsyncIOExecutor}
+    MODES = ("background", "asyncio")
+    JOB_OPTIONS = ("executor", "max_instances", "coalesce")
+    GUARD_OPTIONS = ("soft_timeout", "hard_timeout", "overlap")
+    SCHEDULE_TYPES = ("interval", "cron", "combined")
+    HEARTBEAT_JOB_ID = "scheduler_heartbeat"
+
+    def __init__(self, config: dict = None):
+        config = config or {}
+        self.config = config
+        self.job_settings = config.get("scheduler_jobs", {})
+        self.jitter = int(config.get("scheduler_jitter", 0)) or None
+        self.weekend_days = tuple(config.get("scheduler_weekend_days", (5, 6)))
+        self.holidays: dict[int, frozenset] | None = None  # Business day calendar, loaded with the first such job
+        self.heartbeat_interval = float(config.get("scheduler_heartbeat_interval", 30))
+        self.heartbeat_file = (config.get("scheduler_heartbeat_file") or os.environ.get("HEARTBEAT_FILE")
+                               or os.path.join(tempfile.gettempdir(), 'heartbeat.json'))
+        self.mode = str(config.get("scheduler_mode", "background")).lower()
+        if self.mode not in self.MODES:
+            raise KeyError(f"[Scheduler] Invalid scheduler_mode (allowed: {' / '.join(self.MODES)}): {self.mode}")
+        executors = self.build_executors(config.get("scheduler_executors", {}),
+                                         "asyncio" if self.mode == "asyncio" else "thread")
+        jobstores = {"default": MemoryJobStore()}
+
+        # Persistent store: remember when every job was due before the restart, to catch up missed runs on start
+        self.job_store = None
+        self.persisted_run_times = {}
+        self.added_jobs = {}  # job_id -> (misfire_grace_time, job store alias)
+        self.catchup_concurrency = int(config.get("scheduler_catchup_concurrency", 2))
+        if str(config.get("scheduler_job_store", "n")).lower() == "y":
+            self.job_store = SQLiteJobStore(config.get("scheduler_job_store_file"))
+            self.persisted_run_times = self.job_store.next_run_times()
+            jobstores = {"default": self.job_store, "memory": MemoryJobStore()}
+            logging.info(f"[Scheduler] Job store: {self.job_store.file_name} "
+                         f"({len(self.persisted_run_times)} persisted jobs)")
+
+        # Coordination between replicas: only the lease holder runs jobs
+        self.lease = None
+        self._lease_stop = threading.Event()
+        if str(config.get("scheduler_coordination", "n")).lower() == "y":
+            self.lease = LeaderLease(config.get("scheduler_lease_file"),
+                                     ttl=float(config.get("scheduler_lease_ttl", 30)),
+                                     owner=config.get("scheduler_replica_id"))
+            logging.info(f"[Scheduler] Coordination: replica {self.lease.owner}, lease {self.lease.file_name} "
+                         f"(ttl {self.lease.ttl:.0f} s)")
+
+        self.executor_names = set(executors)
+        self._max_workers = {name: int(config.get("scheduler_executors", {}).get(name, {}).get("max_workers", 10))
+                             for name, executor in executors.items() if not isinstance(executor, AsyncIOExecutor)}
+        scheduler_options = {
+            "timezone": str(get_localzone()),
+            "executors": executors,
+            "jobstores": jobstores,
+            "job_defaults": {"coalesce": False, "max_instances": 1, **config.get("scheduler_job_defaults", {})}
+        }
+        self.loop = None
+        self.http_client: httpx.AsyncClient | None = None
+        if self.mode == "asyncio":
+            self.loop = asyncio.new_event_loop()
+            self.http_client = httpx.AsyncClient(limits=httpx.Limits(max_connections=16,
+                                                                     max_keepalive_connections=16))
+            self.scheduler = AsyncIOScheduler(event_loop=self.loop, **scheduler_options)
+        else:
+            self.scheduler = BackgroundScheduler(**scheduler_options)
+
+        # Metrics, updated by the job listener
+        self._metrics_lock = threading.Lock()
+        self._metrics: dict[str, dict] = {}
+        self._submitted: dict[tuple, datetime] = {}  # (job_id, scheduled run time) -> submission time
+        self._finished: set[tuple] = set()  # (job_id, scheduled run time) finished before their submission event
+        self._triggers: dict[str, str] = {}
+        self._next_runs: dict[str, tuple] = {}  # job_id -> (trigger, next run time), read by the heartbeat
+        self._job_executors: dict[str, str] = {}
+        self._running = 0
+        self._max_running = 0
+        self._catchups: set[str] = set()  # Jobs whose catch-up run was queued and has not finished yet
+        self._catchup_slots = threading.Condition(self._metrics_lock)
+        self.scheduler.add_listener(self.__job_listener,
+                                    EVENT_JOB_ADDED | EVENT_JOB_MODIFIED | EVENT_JOB_REMOVED | EVENT_JOB_SUBMITTED |
+                                    EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
+
+    @staticmethod
+    def _new_metrics() -> dict:
+        return {"runs": 0, "failures": 0, "missed": 0, "max_instances_skipped": 0, "running": 0, "max_running": 0,
+                "duration": StreamingHistogram(), "lag": StreamingHistogram(), "last_status": None, "last_run": None}
 
     def __job_listener(self, event):
-        """Handle job events and log details."""
-        job = self.scheduler.get_job(event.job_id)  # Use self.scheduler to get the job
-        if not job:
-            logging.error(f"[Scheduler.job_listener] Job not found for ID: {event.job_id}")
+        """Keep trigger descriptions and per-job metrics up to date, and log job outcomes."""
+        if event.code in (EVENT_JOB_ADDED, EVENT_JOB_MODIFIED):
+            job = self.scheduler.get_job(event.job_id, event.jobstore)
+            if job:
+                self._triggers[event.job_id] = str(job.trigger)
+                self._next_runs[event.job_id] = (job.trigger, job.next_run_time)
+                self._job_executors[event.job_id] = job.executor
             return
+        if event.code == EVENT_JOB_REMOVED:
+            self._next_runs.pop(event.job_id, None)
+            return
+        if event.code == EVENT_JOB_SUBMITTED and event.job_id in self._next_runs:
+            trigger = self._next_runs[event.job_id][0]
+            self._next_runs[event.job_id] = (trigger, trigger.get_next_fire_time(event.scheduled_run_times[-1],
+                                                                                 datetime.now(timezone.utc)))
+        if event.job_id == self.HEARTBEAT_JOB_ID:
+            return  # Logs its own failures, and would otherwise flood the log and the metrics
+
+        now = datetime.now(timezone.utc)
+        event_job_details = f"ID={event.job_id}, Trigger={self._triggers.get(event.job_id, 'unknown')}"
+
+        with self._metrics_lock:
+            metrics = self._metrics.setdefault(event.job_id, self._new_metrics())
+            if event.code != EVENT_JOB_SUBMITTED and event.job_id in self._catchups:
+                self._catchups.discard(event.job_id)  # Ran, failed, missed or skipped: the catch-up slot is free
+                self._catchup_slots.notify_all()
 
-        # Centralized details
-        trigger_details = str(job.trigger)
-        next_run_time = getattr(job, 'next_run_time', None)
-        next_run_time_str = next_run_time.strftime('%Y-%m-%d %H:%M:%S') if next_run_time else "Not Scheduled"
-        event_job_details = f"ID={event.job_id}, Trigger={trigger_details}, Next Run={next_run_time_str}"
+            if event.code == EVENT_JOB_SUBMITTED:
+                # APScheduler dispatches this event after submit_job returns, so a fast run may already be done
+                pending = 0
+                for run_time in event.scheduled_run_times:
+                    metrics["lag"].record((now - run_time).total_seconds() * 1000)
+                    if (event.job_id, run_time) in self._finished:
+                        self._finished.discard((event.job_id, run_time))
+                    else:
+                        self._submitted[(event.job_id, run_time)] = now
+                        pending += 1
+                if not pending:
+                    return
+                metrics["running"] += 1
+                metrics["max_running"] = max(metrics["max_running"], metrics["running"])
+                self._running += 1
+                self._max_running = max(self._max_running, self._running)
+                return
 
-        if event.exception:
-            logging.error(f"[Scheduler.job_listener] Job failed: {event_job_details}")
-        elif event.code == EVENT_JOB_EXECUTED:
+            if event.code == EVENT_JOB_MAX_INSTANCES:
+                metrics["max_instances_skipped"] += 1
+            else:
+                # Executed, failed or dropped as misfired by the executor: one event per submitted run time
+                submitted = self._submitted.pop((event.job_id, event.scheduled_run_time), None)
+                if submitted is None:
+                    self._finished.add((event.job_id, event.scheduled_run_time))
+                else:
+                    if event.code != EVENT_JOB_MISSED:
+                        metrics["duration"].record((now - submitted).total_seconds() * 1000)
+                    # A submission of several run times is finished after the last one
+                    if not any(key[0] == event.job_id and value == submitted for key, value in self._submitted.items()):
+                        metrics["running"] -= 1
+                        self._running -= 1
+            if event.code == EVENT_JOB_MISSED:
+                metrics["missed"] += 1
+            elif event.code != EVENT_JOB_MAX_INSTANCES:
+                metrics["runs"] += 1
+                metrics["failures"] += 1 if event.exception else 0
+                metrics["last_status"] = "failed" if event.exception else "success"
+                metrics["last_run"] = now.timestamp()
+
+        if event.code == EVENT_JOB_MAX_INSTANCES:
+            logging.warning(f"[Scheduler.job_listener] Job skipped, previous run still active: {event_job_details}")
+        elif event.code == EVENT_JOB_MISSED:
+            logging.warning(f"[Scheduler.job_listener] Job missed: {event_job_details}")
+        elif event.exception:
+            logging.error(f"[Scheduler.job_listener] Job failed: {event_job_details}, Error={event.exception}")
+        else:
             event_job_executed_message = f"[Scheduler.job_listener] Job executed: {event_job_details}"
             logging.info(event_job_executed_message)
             print(event_job_executed_message)
-        elif event.code == EVENT_JOB_MISSED:
-            logging.warning(f"[Scheduler.job_listener] Job missed: {event_job_details}")
+
+    def get_metrics(self, job_id: str = None) -> dict:
+        """
+        Return execution metrics, for one job or for every job.
+
+        Per job: runs, failures, missed, max_instances_skipped, running, max_running, last_status, last_run and
+        histograms (count, mean, min, max, p50, p95, p99 in ms) of
+            - lag_ms: submission to the executor minus the scheduled run time,
+            - duration_ms: submission until completion (queueing in a saturated executor included).
+        Jobs run under a JobGuard also report "guard": soft_timeouts, hard_timeouts, overruns, queued and replaced.
+        The totals hold the number of jobs running now and the highest number running at once.
+        """
+        with self._metrics_lock:
+            jobs = {name: {**{key: value for key, value in metrics.items() if key not in ("duration", "lag")},
+                           "lag_ms": metrics["lag"].snapshot(),
+                           "duration_ms": metrics["duration"].snapshot()}
+                    for name, metrics in self._metrics.items() if job_id is None or name == job_id}
+        for name, metrics in jobs.items():
+            guard = JobGuard.get(name)
+            if guard:
+                metrics["guard"] = dict(guard.stats)
+        totals = {"running": self._running, "max_running": self._max_running}
+
+        if job_id is not None:
+            return jobs.get(job_id, {})
+        return {"jobs": jobs, "totals": totals}
+
+    def reset_metrics(self) -> None:
+        """Drop every metric, keeping the count of runs in progress."""
+        with self._metrics_lock:
+            for metrics in self._metrics.values():
+                running = metrics["running"]
+                metrics.update(self._new_metrics(), running=running, max_running=running)
+            self._max_running = self._running
+
+    def show_metrics(self):
+        """Log and print a one-line summary of the metrics of every job."""
+        for job_id, metrics in self.get_metrics()["jobs"].items():
+            metrics_message = (f"[Scheduler.show_metrics] Job ID: {job_id}, Runs: {metrics['runs']}, "
+                               f"Failures: {metrics['failures']}, Missed: {metrics['missed']}, "
+                               f"Skipped: {metrics['max_instances_skipped']}, Max running: {metrics['max_running']}, "
+                               f"Duration p50/p95: {metrics['duration_ms']['p50']}/{metrics['duration_ms']['p95']} ms, "
+                               f"Lag p95: {metrics['lag_ms']['p95']} ms")
+            print(metrics_message)
+            logging.info(metrics_message)
+
+    @classmethod
+    def build_executors(cls, executors_config: dict, default_type: str = "thread") -> dict:
+        """Create the named executor pools, making sure a 'default' one exists."""
+        executors = {}
+        for name, settings in {"default": {"type": default_type, "max_workers": 10}, **executors_config}.items():
+            executor_type = settings.get("type", "thread").lower()
+            if executor_type not in cls.EXECUTOR_TYPES:
+                raise KeyError(f"[Scheduler.build_executors] Invalid executor type for '{name}' "
+                               f"(allowed: {' / '.join(cls.EXECUTOR_TYPES)}): {executor_type}")
+            if executor_type == "asyncio":
+                executors[name] = AsyncIOExecutor()
+                logging.info(f"[Scheduler.build_executors] Executor '{name}': asyncio event loop")
+                continue
+            executors[name] = cls.EXECUTOR_TYPES[executor_type](int(settings.get("max_workers", 10)))
+            logging.info(f"[Scheduler.build_executors] Executor '{name}': {executor_type} pool, "
+                         f"max_workers={settings.get('max_workers', 10)}")
+        return executors
+
+    def job_options(self, job_id: str, **overrides) -> dict:
+        """Merge executor / max_instances / coalesce for a job: explicit arguments, then scheduler_jobs."""
+        options = {key: value for key, value in self.job_settings.get(job_id, {}).items() if key in self.JOB_OPTIONS}
+        options.update({key: value for key, value in overrides.items() if value is not None})
+        if options.get("executor", "default") not in self.executor_names:
+            raise KeyError(f"[Scheduler.job_options] Unknown executor for job '{job_id}': {options['executor']}")
+        return options
+
+    def queue_depths(self) -> dict:
+        """
+        Per executor: job runs in flight, and how many of them wait for a free worker (thread and process pools).
+        Derived from the job listener's counts and the configured pool sizes, not from APScheduler internals.
+        """
+        with self._metrics_lock:
+            running = {job_id: metrics["running"] for job_id, metrics in self._metrics.items() if metrics["running"]}
+        depths = {name: {"instances": 0, "queued": 0} for name in self.executor_names}
+        for job_id, count in running.items():
+            depths[self._job_executors.get(job_id, "default")]["instances"] += count
+        for name, depth in depths.items():
+            depth["queued"] = max(0, depth["instances"] - self._max_workers.get(name, depth["instances"]))
+        return depths
+
+    def write_heartbeat(self, state: str = None) -> None:
+        """
+        Atomically write the liveness file: last tick, last outcome of every job and executor queue depths.
+
+        Runs as a scheduler job, so it must not take the job store lock (shutdown(wait=True) holds it while waiting
+        for running jobs): next run times come from the job listener instead of get_jobs().
+        """
+        metrics = self.get_metrics()
+        next_runs = {job_id: next_run for job_id, (_, next_run) in dict(self._next_runs).items()}
+        heartbeat = {
+            "state": state or ("running" if self.is_leader else "standby"),
+            "tick": time.time(),
+            "tick_iso": datetime.now().astimezone().isoformat(timespec="seconds"),
+            "max_age": self.heartbeat_interval * 3,
+            "pid": os.getpid(),
+            "running": metrics["totals"]["running"],
+            "queues": self.queue_depths(),
+            "jobs": {job_id: {"last_status": metrics["jobs"].get(job_id, {}).get("last_status"),
+                              "last_run": metrics["jobs"].get(job_id, {}).get("last_run"),
+                              "failures": metrics["jobs"].get(job_id, {}).get("failures", 0),
+                              "next_run": next_run.isoformat(timespec="seconds") if next_run else None}
+                     for job_id, next_run in next_runs.items() if job_id != self.HEARTBEAT_JOB_ID}
+        }
+        try:
+            FileHelper.write_json_atomic(self.heartbeat_file, heartbeat)
+        except OSError as e:
+            logging.error(f"[Scheduler.write_heartbeat] Failed to write {self.heartbeat_file}: {e}")
 
     def show_jobs(self):
         """Display all scheduled jobs."""
@@ -52,61 +360,342 @@ class Scheduler:
                     f"[Scheduler.show_jobs] Job ID: {job.id}, Trigger: {job.trigger}, Next Run Time: {next_run_str}"
                 )
 
+    def build_trigger(self, spec: dict, jitter: int = None) -> BaseTrigger:
+        """
+        Build an APScheduler trigger from a schedule spec:
+            {"type": "interval", "minutes": 5, "seconds": 30}
+            {"type": "cron", "time": "08:00,12:30"}  (one or more HH:MM, as a string or a list)
+            {"type": "cron", "expression": "*/15 8-18 * * mon-fri"}
+            {"type": "combined", "triggers": [spec, ...], "mode": "or" | "and"}
+
+        :param jitter: Maximum random delay in seconds added to every fire time.
+        """
+        trigger_type = spec.get("type", "").lower()
+        timezone = self.scheduler.timezone
+
+        if trigger_type == "interval":
+            minutes, seconds = int(spec.get("minutes", 0)), int(spec.get("seconds", 0))
+            if minutes <= 0 and seconds <= 0:
+                raise ValueError("interval must be a positive integer for 'interval' jobs.")
+            return IntervalTrigger(minutes=minutes, seconds=seconds, timezone=timezone, jitter=jitter)
+
+        if trigger_type == "cron":
+            if spec.get("expression"):
+                trigger = CronTrigger.from_crontab(spec["expression"], timezone=timezone)
+                trigger.jitter = jitter
+                return trigger
+
+            times = self.parse_times(spec.get("time"))
+            # One cron trigger per distinct minute, e.g. 08:30 and 12:30 become hour='8,12', minute=30
+            hours_by_minute: dict[int, list[int]] = {}
+            for hour, minute in times:
+                hours_by_minute.setdefault(minute, []).append(hour)
+            triggers = [CronTrigger(hour=",".join(map(str, hours)), minute=minute, timezone=timezone)
+                        for minute, hours in hours_by_minute.items()]
+            if len(triggers) == 1:
+                triggers[0].jitter = jitter
+                return triggers[0]
+            return OrTrigger(triggers, jitter=jitter)
+
+        if trigger_type == "combined":
+            if not spec.get("triggers"):
+                raise ValueError("triggers must be provided for 'combined' jobs.")
+            combinator = {"or": OrTrigger, "and": AndTrigger}.get(spec.get("mode", "or").lower())
+            if combinator is None:
+                raise KeyError(f"[Scheduler.build_trigger] Invalid combine mode (allowed: 'or' / 'and'): "
+                               f"{spec.get('mode')}")
+            return combinator([self.build_trigger(child) for child in spec["triggers"]], jitter=jitter)
+
+        raise KeyError(f"[Scheduler.build_trigger] Invalid schedule_type (allowed: "
+                       f"{' / '.join(repr(item) for item in self.SCHEDULE_TYPES)}): {spec.get('type')}")
+
+    @staticmethod
+    def parse_times(schedule_time: str | list[str]) -> list[list[int]]:
+        """Parse one or more 'HH:MM' times, given as a comma-separated string or a list."""
+        items = schedule_time.split(",") if isinstance(schedule_time, str) else (schedule_time or [])
+        times = [TimeToolkit.parse_time_string(item.strip()) for item in items if item.strip()]
+        if not times or None in times:
+            raise ValueError(f"schedule_time must be one or more HH:MM times for 'cron' jobs: {schedule_time}")
+        return times
+
     def add(self,
             input_main,
             schedule_type: str = 'interval',
             interval: int = 0,
             checkpoint_notification: bool = False,
-            schedule_time: str = None,
-            misfire_grace_time: int = 300) -> None:
-        # Validate the schedule type
-        if schedule_type.lower() not in ['interval', 'cron']:
-            raise KeyError(f"[Scheduler.add] Invalid schedule_type (allowed: 'interval' / 'cron'): {schedule_type}")
-
-        # Parse schedule time if provided
-        schedule_time = TimeToolkit.parse_time_string(schedule_time) if schedule_time else None
+            schedule_time: str | list[str] = None,
+            misfire_grace_time: int = 300,
+            job_id: str = None,
+            executor: str = None,
+            max_instances: int = None,
+            coalesce: bool = None,
+            soft_timeout: float = None,
+            hard_timeout: float = None,
+            overlap: str = None,
+            seconds: int = 0,
+            cron: str = None,
+            triggers: list[dict] = None,
+            combine: str = 'or',
+            jitter: int = None,
+            business_days: str = None) -> None:
+        """
+        Add a job.
+
+        :param schedule_type: 'interval' (interval minutes and/or seconds), 'cron' (schedule_time as one or more
+            HH:MM times, or a crontab expression in cron) or 'combined' (triggers, a list of build_trigger specs,
+            fired when any ('or') or all ('and') of them match).
+        :param jitter: Maximum random delay in seconds added to every run (default: scheduler_jitter).
+        :param soft_timeout / hard_timeout / overlap: Run the job under a JobGuard (default: scheduler_jobs).
+        :param business_days: "skip" or "shift" runs falling on weekends and holidays (see BusinessDayTrigger).
+        """
+        schedule_type = schedule_type.lower()
+        if schedule_type not in self.SCHEDULE_TYPES:
+            raise KeyError(f"[Scheduler.add] Invalid schedule_type (allowed: "
+                           f"{' / '.join(repr(item) for item in self.SCHEDULE_TYPES)}): {schedule_type}")
+
+        jitter = self.jitter if jitter is None else jitter
         extra_args = {"trigger_notification": True} if checkpoint_notification else None
-        schedule_message = ""
-        job_id = ""
 
-        # Add job based on schedule type
-        if schedule_type.lower() == 'cron':
-            job_id = f"cron_task_{schedule_time[0]}_{schedule_time[1]}"
-            schedule_message = f"Time={schedule_time[0]}:{schedule_time[1]}, misfire_grace_time={misfire_grace_time}"
+        # Build the trigger and the default job ID based on schedule type
+        if schedule_type == 'cron' and cron:
+            trigger = self.build_trigger({"type": "cron", "expression": cron}, jitter)
+            default_id = f"cron_task_{re.sub(r'[^0-9A-Za-z]+', '_', cron).strip('_')}"
+        elif schedule_type == 'cron':
             if not schedule_time:
                 raise ValueError("schedule_time must be provided for 'cron' jobs.")
-            self.scheduler.add_job(
-                input_main,
-                trigger=schedule_type,
-                hour=schedule_time[0],
-                minute=schedule_time[1],
-                misfire_grace_time=misfire_grace_time,
-                id=job_id,
-                kwargs=extra_args
-            )
-        elif schedule_type.lower() == 'interval':
-            job_id = f"interval_task_{interval}"
-            schedule_message = f"Minutes={interval}, misfire_grace_time={misfire_grace_time}"
-            if interval == 0:
-                raise ValueError("interval must be a positive integer for 'interval' jobs.")
-            self.scheduler.add_job(
-                input_main,
-                trigger=schedule_type,
-                minutes=interval,
-                misfire_grace_time=misfire_grace_time,
-                id=job_id,
-                kwargs=extra_args
-            )
+            trigger = self.build_trigger({"type": "cron", "time": schedule_time}, jitter)
+            default_id = "cron_task_" + "_".join(f"{hour}_{minute}" for hour, minute in self.parse_times(schedule_time))
+        elif schedule_type == 'interval':
+            trigger = self.build_trigger({"type": "interval", "minutes": interval, "seconds": seconds}, jitter)
+            default_id = f"interval_task_{interval}" + (f"_{seconds}s" if seconds else "")
+        else:
+            trigger = self.build_trigger({"type": "combined", "triggers": triggers, "mode": combine}, jitter)
+            default_id = f"combined_task_{getattr(input_main, '__name__', 'job')}"
+
+        job_id = job_id or default_id
+        options = self.job_options(job_id, executor=executor, max_instances=max_instances, coalesce=coalesce)
+        func, args = input_main, None
+
+        guard_options = {key: value for key, value in self.job_settings.get(job_id, {}).items()
+                         if key in self.GUARD_OPTIONS}
+        guard_options.update({key: value for key, value in (("soft_timeout", soft_timeout),
+                                                           ("hard_timeout", hard_timeout),
+                                                           ("overlap", overlap)) if value is not None})
+        if guard_options:
+            interval_seconds = trigger.interval.total_seconds() if isinstance(trigger, IntervalTrigger) else None
+            guard = JobGuard(job_id, interval=interval_seconds, **guard_options)
+            JobGuard.register(guard)
+            options.setdefault("max_instances", guard.max_instances)
+            func = run_guarded_async if asyncio.iscoroutinefunction(input_main) else run_guarded
+            args = [job_id, input_main]
+
+        business_days = business_days or self.job_settings.get(job_id, {}).get("business_days")
+        if business_days:
+            trigger = BusinessDayTrigger(trigger, self.business_calendar(), business_days, self.weekend_days)
+
+        jobstore = "default"
+        if self.job_store:
+            try:
+                obj_to_ref(input_main)
+            except ValueError:
+                # Bound methods of instances, lambdas and nested functions cannot be pickled
+                logging.warning(f"[Scheduler.add] Job {job_id} cannot be persisted and is kept in memory only")
+                jobstore = "memory"
+
+        self.scheduler.add_job(
+            func,
+            trigger=trigger,
+            misfire_grace_time=misfire_grace_time,
+            id=job_id,
+            args=args,
+            kwargs=extra_args,
+            jobstore=jobstore,
+            replace_existing=self.job_store is not None,
+            **options
+        )
+        self.added_jobs[job_id] = (misfire_grace_time, jobstore)
 
         # Log the added job details
-        logging.info(f"[Scheduler.add] Added job: ID={job_id}, Trigger={schedule_type}, {schedule_message}")
+        logging.info(f"[Scheduler.add] Added job: ID={job_id}, Trigger={trigger}, "
+                     f"misfire_grace_time={misfire_grace_time}, jitter={jitter}"
+                     f"{''.join(f', {key}={value}' for key, value in {**options, **guard_options}.items())}")
+
+    def business_calendar(self) -> dict[int, frozenset]:
+        """
+        Holiday dates of this year and the next, loaded once and shared by every business_days job. A refresh
+        job loads the following year every 1 December, so computing fire times never waits on Calendarific.
+        """
+        if self.holidays is None:
+            this_year = datetime.now().year
+            self.holidays = self._load_holidays([this_year, this_year + 1])
+            refresh_trigger = CronTrigger(month=12, day=1, hour=0, minute=5)
+            self.scheduler.add_job(self.refresh_business_calendar, trigger=refresh_trigger,
+                                   id="business_calendar_refresh", replace_existing=True,
+                                   jobstore="memory" if self.job_store else "default")
+        return self.holidays
+
+    def _load_holidays(self, years: list[int]) -> dict[int, frozenset]:
+        if "calendarific_endpoint" not in self.config:
+            logging.info("[Scheduler.business_calendar] Calendarific not configured, only skipping weekends")
+            return {}
+        from .Calendarific import Calendarific  # Prompts for the key store password, so only when needed
+        calendar = Calendarific(self.config)
+        return {year: calendar.get_holiday_dates(year) for year in years}
+
+    def refresh_business_calendar(self) -> None:
+        """Load next year's holidays and update the trigger of every business_days job."""
+        this_year = datetime.now().year
+        years = [year for year in (this_year, this_year + 1) if year not in (self.holidays or {})]
+        self.holidays = {**{year: dates for year, dates in (self.holidays or {}).items() if year >= this_year},
+                         **self._load_holidays(years)}
+        for job in self.scheduler.get_jobs():
+            if isinstance(job.trigger, BusinessDayTrigger):
+                trigger = BusinessDayTrigger(job.trigger.trigger, self.holidays, job.trigger.policy,
+                                             job.trigger.weekend_days)
+                job.modify(trigger=trigger)
+        logging.info(f"[Scheduler.refresh_business_calendar] Business day calendar: {sorted(self.holidays)}")
+
+    def find_catchups(self) -> list[str]:
+        """
+        Return the IDs of jobs that were due while the process was down and are still within their
+        misfire_grace_time. Missed runs are coalesced into one catch-up per job.
+        """
+        now = datetime.now(timezone.utc)
+        catchups = []
+        for job_id, run_time in self.persisted_run_times.items():
+            if job_id not in self.added_jobs or run_time >= now:
+                continue
+
+            lag = (now - run_time).total_seconds()
+            grace = self.added_jobs[job_id][0]
+            if grace is None or lag <= grace:
+                catchups.append(job_id)
+            else:
+                logging.warning(f"[Scheduler.find_catchups] Job missed during downtime: ID={job_id}, "
+                                f"Due={run_time.astimezone().strftime('%Y-%m-%d %H:%M:%S')}, "
+                                f"Late by {lag:.0f} s (misfire_grace_time={grace})")
+        return catchups
+
+    def run_catchups(self, job_ids: list[str]) -> None:
+        """
+        Run one catch-up of each job, at most scheduler_catchup_concurrency at once.
+
+        A catch-up is the job's own next run moved to now, so its executor, max_instances and JobGuard overlap
+        policy apply and it cannot overlap a regular run. Jobs wait for a free slot in a background thread, and
+        a job whose regular run comes first is not caught up again.
+        """
+        if job_ids:
+            threading.Thread(target=self._dispatch_catchups, args=(list(job_ids),), name="scheduler_catchups",
+                             daemon=True).start()
+
+    def _dispatch_catchups(self, job_ids: list[str]) -> None:
+        queued_at = time.time()
+        for job_id in job_ids:
+            with self._catchup_slots:
+                while len(self._catchups) >= self.catchup_concurrency:
+                    if not self.scheduler.running:
+                        return
+                    self._catchup_slots.wait(0.5)
+                if (self._metrics.get(job_id, {}).get("last_run") or 0) >= queued_at:
+                    logging.info(f"[Scheduler.run_catchups] Catch-up dropped, the job already ran: ID={job_id}")
+                    continue
+                self._catchups.add(job_id)
+
+            try:
+                self.scheduler.modify_job(job_id, next_run_time=datetime.now(timezone.utc))
+            except JobLookupError:
+                with self._catchup_slots:
+                    self._catchups.discard(job_id)
+                continue
+            logging.info(f"[Scheduler.run_catchups] Catch-up queued: ID={job_id}, "
+                         f"Due={self.persisted_run_times[job_id].astimezone().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    def _start_loop(self) -> None:
+        if self.loop is not None and not self.loop.is_running():
+            threading.Thread(target=self.loop.run_forever, name="scheduler_event_loop", daemon=True).start()
+
+    def _stop_loop(self) -> None:
+        if self.loop is not None and self.loop.is_running():
+            if self.http_client is not None and not self.http_client.is_closed:
+                try:
+                    asyncio.run_coroutine_threadsafe(self.http_client.aclose(), self.loop).result(timeout=5)
+                except (concurrent.futures.TimeoutError, httpx.HTTPError) as e:
+                    logging.warning(f"[Scheduler._stop_loop] HTTP client not closed cleanly: {e!r}")
+            # Queued after the scheduler's own shutdown callback, which AsyncIOScheduler runs on the loop
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    @property
+    def is_leader(self) -> bool:
+        """True if this replica runs the jobs: always without coordination, otherwise while it holds the lease."""
+        return self.lease is None or self.lease.is_leader
+
+    def _renew_lease(self) -> None:
+        was_leader = self.lease.is_leader
+        try:
+            leader = self.lease.acquire()
+        except sqlite3.Error as e:
+            # Keep running until the current lease runs out; nobody else can take it over before that
+            logging.error(f"[Scheduler._renew_lease] Lease renewal failed: {e}")
+            leader = self.lease.is_leader
+
+        if leader and not was_leader:
+            self._take_over()
+        elif was_leader and not leader:
+            self.scheduler.pause()
+            logging.warning(f"[Scheduler._renew_lease] {self.lease.owner} lost the lease, standing by")
+        if not leader and self.heartbeat_interval > 0:
+            self.write_heartbeat("standby")  # The heartbeat job does not run while paused
+
+    def _take_over(self) -> None:
+        """Become the leader: skip runs that came due while standing by (the old leader had them), then resume."""
+        now = datetime.now(timezone.utc)
+        for job in self.scheduler.get_jobs():
+            if self.job_store is not None and job._jobstore_alias == "default":
+                continue  # Shared store, next run times are already the old leader's
+            if job.next_run_time is not None and job.next_run_time < now:
+                job.modify(next_run_time=job.trigger.get_next_fire_time(None, now))
+        self.scheduler.resume()
+        holder_message = f"[Scheduler._take_over] {self.lease.owner} is now the leader, running jobs"
+        print(holder_message)
+        logging.info(holder_message)
+
+    def _lease_loop(self) -> None:
+        while not self._lease_stop.wait(self.lease.ttl / 3):
+            self._renew_lease()
+
+    def _release_lease(self) -> None:
+        if self.lease is not None:
+            self._lease_stop.set()
+            if self.lease.is_leader:
+                self.lease.release()
 
     def start(self):
         """Start the scheduler."""
         try:
             print("[Scheduler.start] Starting the scheduler...")
             logging.info("[Scheduler.start] Scheduler is starting...")
-            self.scheduler.start()
+            leader = self.lease is None or self.lease.acquire()
+            if not leader:
+                holder = self.lease.holder()
+                logging.info(f"[Scheduler.start] Standing by, {holder[0] if holder else 'another replica'} "
+                             f"holds the lease")
+
+            catchups = []
+            if self.job_store:
+                self.job_store.prune(job_id for job_id, (_, store) in self.added_jobs.items() if store == "default")
+                catchups = self.find_catchups() if leader else []
+
+            if self.heartbeat_interval > 0:
+                self.scheduler.add_job(self.write_heartbeat, trigger=IntervalTrigger(seconds=self.heartbeat_interval),
+                                       id=self.HEARTBEAT_JOB_ID, next_run_time=datetime.now(timezone.utc),
+                                       jobstore="memory" if self.job_store else "default", coalesce=True,
+                                       misfire_grace_time=None, replace_existing=True)
+
+            self._start_loop()
+            self.scheduler.start(paused=not leader)
+            self.run_catchups(catchups)
+            if self.lease is not None:
+                threading.Thread(target=self._lease_loop, name="scheduler_lease", daemon=True).start()
         except Exception as e:
             print(f"[Scheduler.start] Scheduler stopped due to an unexpected error: {e}")
             logging.error(f"[Scheduler.start] Scheduler stopped due to an unexpected error: {e}")
@@ -116,6 +705,66 @@ class Scheduler:
         print("[Scheduler.shutdown] Shutting down the scheduler...")
         logging.info("[Scheduler.shutdown] Scheduler is Shutting down...")
         self.scheduler.shutdown()
+        self._release_lease()
+        self._stop_loop()
+        if self.heartbeat_interval > 0:
+            self.write_heartbeat("stopped")
+
+    def in_flight(self) -> dict:
+        """
+        Job runs held by the executors, running or waiting for a worker, per job ID.
+
+        Read from the executors rather than from the job listener, whose events arrive after a run has ended.
+        Falls back to the listener's counts if the executors do not expose their instances.
+        """
+        try:
+            runs = {}
+            for executor in self.scheduler._executors.values():
+                for job_id, instances in list(executor._instances.items()):
+                    if instances:
+                        runs[job_id] = runs.get(job_id, 0) + instances
+            return runs
+        except (AttributeError, TypeError) as e:
+            logging.debug(f"[Scheduler.in_flight] Executor instances unavailable, using the job listener: {e}")
+            with self._metrics_lock:
+                return {job_id: metrics["running"] for job_id, metrics in self._metrics.items() if metrics["running"]}
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """Block until no job run is in flight. Returns False if runs were still in flight after `timeout` seconds."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.in_flight():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stop(self, drain_timeout: float = 8) -> bool:
+        """
+        Stop gracefully: pause so no new run starts, wait up to `drain_timeout` seconds for running jobs,
+        then shut down without waiting further.
+
+        :return: True if every running job finished within the drain timeout.
+        """
+        stop_message = f"[Scheduler.stop] Pausing the scheduler and draining running jobs ({drain_timeout} s)..."
+        print(stop_message)
+        logging.info(stop_message)
+        self._lease_stop.set()  # A standby replica must not resume while draining
+        if self.scheduler.running:
+            self.scheduler.pause()
+
+        drained = self.wait_idle(drain_timeout)
+        if not drained:
+            running = list(self.in_flight())
+            logging.error(f"[Scheduler.stop] Jobs still running after {drain_timeout} s: {', '.join(running)}")
+
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+        self._release_lease()  # A standby replica takes over at its next renewal
+        self._stop_loop()
+        if self.heartbeat_interval > 0:
+            self.write_heartbeat("stopped")
+        logging.info("[Scheduler.stop] Scheduler stopped.")
+        return drained
 
 
 if __name__ == "__main__":
@@ -1,3 +1,4 @@
+import httpx
 import requests
 import logging
 import argparse
@@ -164,6 +165,39 @@ class Telegram:
             logging.error(f"[Telegram][send_message] Error sending message: {e}")
             return False
 
+    async def send_message_async(self, message: str, client: httpx.AsyncClient = None):
+        """
+        Send a message like send_message, without blocking the event loop.
+
+        Args:
+            message (str): The message to be sent.
+            client (httpx.AsyncClient): Optional client to reuse. A short-lived one is used otherwise.
+
+        Returns:
+            bool: True if sent successfully, False otherwise.
+        """
+        validated_message = self.validate_message(message)
+        if not validated_message:
+            logging.error("[Telegram][send_message_async] Message validation failed. No message sent.")
+            return False
+
+        url = f"https://api.telegram.org/bot{self.telegram_bot}/sendMessage"
+        data = {
+            'chat_id': self.telegram_token,
+            'text': validated_message
+        }
+        try:
+            if client is None:
+                async with httpx.AsyncClient() as short_lived_client:
+                    response = await short_lived_client.post(url, json=data, timeout=10)
+            else:
+                response = await client.post(url, json=data, timeout=10)
+            response.raise_for_status()
+            return True
+        except httpx.HTTPError as e:
+            logging.error(f"[Telegram][send_message_async] Error sending message: {e}")
+            return False
+
 
 if __name__ == '__main__':
     default_chat = 'TG_TESTING'
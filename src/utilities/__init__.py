@@ -2,25 +2,45 @@
 __all__ = [
     "ConfigManager",
     "ConsoleTitle",
+    "FileHelper",
+    "StreamingHistogram",
     "Dyn_Updater",
+    "Dyn_Providers",
     "DNS_Resolver",
+    "DNS_Cache",
+    "DNS_Monitor",
+    "DDNS_Sync",
     "InputHelper",
     "TimeToolkit",
     "KeyManager",
     "Log4Me",
     "Scheduler",
+    "JobGuard",
+    "SQLiteJobStore",
+    "BusinessDayTrigger",
+    "LeaderLease",
     "Telegram",
     "Calendarific",
 ]
 
 from .config_manager import ConfigManager
 from .ConsoleTitle import ConsoleTitle
+from .file_helper import FileHelper
+from .Histogram import StreamingHistogram
 from .Dyn import Dyn_Updater
+from .Dyn_Providers import Dyn_Providers
 from .DNS_Resolver import DNS_Resolver
+from .DNS_Cache import DNS_Cache
+from .DNS_Monitor import DNS_Monitor
+from .DDNS_Sync import DDNS_Sync
 from .input_helper import InputHelper
 from .TimeToolkit import TimeToolkit
 from .KeyManager import KeyManager
 from .Log4Me import Log4Me
 from .Scheduler import Scheduler
+from .JobGuard import JobGuard
+from .SQLiteJobStore import SQLiteJobStore
+from .BusinessDayTrigger import BusinessDayTrigger
+from .LeaderLease import LeaderLease
 from .Telegram import Telegram
 from .Calendarific import Calendarific
@@ -0,0 +1,72 @@
+import gzip
+import json
+import lzma
+import os
+import tempfile
+
+
+class FileHelper:
+    COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "lzma": ".xz"}
+
+    @staticmethod
+    def compression_suffix(compression: str | None) -> str:
+        """Return the file suffix used for a compression type (None, 'gzip' or 'lzma')."""
+        if compression not in FileHelper.COMPRESSION_SUFFIXES:
+            raise ValueError(f"[FileHelper] Invalid compression (allowed: None / 'gzip' / 'lzma'): {compression}")
+        return FileHelper.COMPRESSION_SUFFIXES[compression]
+
+    @staticmethod
+    def write_atomic(file_name: str, data: bytes) -> None:
+        """
+        Write bytes to a temp file in the target folder and rename it into place,
+        so readers only ever see the old file or the complete new one.
+
+        :param file_name: Final path of the file.
+        :param data: Content to write.
+        """
+        folder = os.path.dirname(os.path.abspath(file_name))
+        os.makedirs(folder, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=folder, prefix=f".{os.path.basename(file_name)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_name, file_name)
+        except BaseException:
+            if os.path.exists(temp_name):
+                os.remove(temp_name)
+            raise
+
+    @staticmethod
+    def write_json_atomic(file_name: str, data, compression: str | None = None) -> None:
+        """
+        Serialize data as compact JSON and write it atomically, optionally compressed.
+
+        :param file_name: Final path of the file.
+        :param data: JSON-serializable object.
+        :param compression: None, 'gzip' or 'lzma'.
+        """
+        payload = json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+        if compression == "gzip":
+            payload = gzip.compress(payload, compresslevel=6, mtime=0)
+        elif compression == "lzma":
+            payload = lzma.compress(payload, preset=6)
+        else:
+            FileHelper.compression_suffix(compression)  # Validate
+
+        FileHelper.write_atomic(file_name, payload)
+
+    @staticmethod
+    def read_json(file_name: str):
+        """Read a JSON file, transparently decompressing '.gz' and '.xz' files."""
+        if file_name.endswith(".gz"):
+            opener = gzip.open
+        elif file_name.endswith(".xz"):
+            opener = lzma.open
+        else:
+            opener = open
+
+        with opener(file_name, 'rt', encoding='utf-8') as file:
+            return json.load(file)
@@ -2,4 +2,6 @@ import sys
 import os
 
 # Allow imports from project root (e.g. DockerCtrl)
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
\ No newline at end of file
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Allow imports of the application package (e.g. utilities)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
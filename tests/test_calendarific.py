@@ -0,0 +1,170 @@
+import os
+import pytest
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+from utilities.file_helper import FileHelper
+from utilities.Calendarific import Calendarific, HolidayResult
+from utilities.HolidayCorpus import HolidayCorpus
+
+
+SAMPLE = {"response": {"holidays": [{"name": "New Year's Day", "date": {"iso": "2025-01-01"}}]}}
+
+
+def make_holiday(country_id, name, iso, locations="All"):
+    return {"Count Id": "1", "Country ID": country_id, "Country Name": country_id, "Name": name,
+            "Date ISO": iso, "Type": "National holiday", "Primary Type": "National holiday",
+            "Locations": locations}
+
+
+@pytest.fixture
+def calendar(tmp_path):
+    config = {
+        "calendarific_endpoint": "https://calendarific.example/api/v2/holidays",
+        "data_folder": str(tmp_path),
+        "calendarific_country": [{"code": "HK"}, {"code": "JP"}],
+        "calendarific_default_type": "national",
+    }
+    with patch('utilities.Calendarific.KeyManager'):
+        return Calendarific(config)
+
+
+# ---------------------------------------------------------------------------
+# FileHelper / cache files
+# ---------------------------------------------------------------------------
+
+class TestCacheFiles:
+    @pytest.mark.parametrize("compression, suffix", [(None, ""), ("gzip", ".gz"), ("lzma", ".xz")])
+    def test_round_trip(self, tmp_path, compression, suffix):
+        file_name = str(tmp_path / f"calendar_data_2025_HK.json{suffix}")
+        FileHelper.write_json_atomic(file_name, SAMPLE, compression)
+        assert Calendarific.load_cached_file(file_name) == SAMPLE
+
+    def test_compact_separators(self, tmp_path):
+        file_name = str(tmp_path / "data.json")
+        FileHelper.write_json_atomic(file_name, SAMPLE)
+        assert b", " not in open(file_name, 'rb').read()
+
+    def test_no_temp_files_left_behind(self, tmp_path):
+        FileHelper.write_json_atomic(str(tmp_path / "data.json.gz"), SAMPLE, "gzip")
+        assert os.listdir(tmp_path) == ["data.json.gz"]
+
+    def test_invalid_compression_raises(self, tmp_path):
+        with pytest.raises(ValueError):
+            FileHelper.write_json_atomic(str(tmp_path / "data.json"), SAMPLE, "zip")
+
+    def test_corrupt_file_is_a_miss(self, tmp_path):
+        file_name = tmp_path / "data.json.gz"
+        file_name.write_bytes(b"not gzip")
+        assert Calendarific.load_cached_file(str(file_name)) is None
+
+    def test_missing_file_is_a_miss(self, tmp_path):
+        assert Calendarific.load_cached_file(str(tmp_path / "missing.json")) is None
+
+
+# ---------------------------------------------------------------------------
+# HolidayResult / get_holiday_result
+# ---------------------------------------------------------------------------
+
+class TestHolidayResult:
+    def test_renderings_are_lazy(self):
+        result = HolidayResult(date(2025, 1, 1), 2025, [make_holiday("JP", "Ganjitsu", "2025-01-01")])
+        with patch.object(Calendarific, 'create_holiday_table', return_value="table") as table:
+            assert result.summary == "2025-01-01 - Country with Holidays : JP"
+            table.assert_not_called()
+            assert result.table == "table"
+            assert result.table == "table"
+            table.assert_called_once()
+
+    def test_country_ids_are_sorted_and_unique(self):
+        holidays = [make_holiday("JP", "a", "2025-01-01"), make_holiday("HK", "b", "2025-01-01"),
+                    make_holiday("JP", "c", "2025-01-01")]
+        assert HolidayResult(date(2025, 1, 1), 2025, holidays).country_ids_string == "HK, JP"
+
+    def test_identical_queries_are_memoized(self, calendar):
+        calendar.check_holidays = MagicMock(return_value=[make_holiday("HK", "a", "2025-01-01")])
+        first = calendar.get_holiday_result(date(2025, 1, 1))
+        second = calendar.get_holiday_result(date(2025, 1, 1))
+        assert first is second
+        calendar.check_holidays.assert_called_once()
+
+    def test_show_holiday_no_holiday(self, calendar):
+        calendar.check_holidays = MagicMock(return_value=[])
+        assert calendar.show_holiday(date(2025, 1, 2)) == "No holiday for 2025-01-02"
+
+    def test_show_holiday_renders_table_only_when_consumed(self, calendar, capsys):
+        calendar.check_holidays = MagicMock(return_value=[make_holiday("HK", "a", "2025-01-02")])
+        with patch.object(Calendarific, 'create_holiday_table', return_value="table") as table, \
+                patch('logging.getLogger') as get_logger:
+            get_logger.return_value.isEnabledFor.return_value = False
+            assert calendar.show_holiday(date(2025, 1, 2)) == "2025-01-02 - Country with Holidays : HK"
+            table.assert_not_called()
+            calendar.show_holiday(date(2025, 1, 2), show_table=True)
+            table.assert_called_once()
+        assert "table" in capsys.readouterr().out
+
+    def test_holiday_dates_combine_countries_and_locations(self, calendar):
+        calendar.countries = [{"code": "HK"}, {"code": "JP", "locations": "Tokyo"}]
+        holidays = {"HK": [make_holiday("HK", "New Year", "2025-01-01")],
+                    "JP": [make_holiday("JP", "Ganjitsu", "2025-01-01"),
+                           make_holiday("JP", "Local", "2025-02-03", locations="Osaka"),
+                           make_holiday("JP", "Citizens' Day", "2025-10-01", locations="Tokyo")]}
+        calendar.get_holidays_by_country = MagicMock(side_effect=lambda code, year: holidays[code])
+        assert calendar.get_holiday_dates(2025) == {date(2025, 1, 1), date(2025, 10, 1)}
+
+
+# ---------------------------------------------------------------------------
+# HolidayCorpus
+# ---------------------------------------------------------------------------
+
+def raw_holiday(country_id, name, iso, types, locations="All"):
+    return {"name": name, "country": {"id": country_id.lower(), "name": f"Country {country_id}"},
+            "date": {"iso": iso}, "type": types, "primary_type": types[0], "locations": locations}
+
+
+@pytest.fixture
+def corpus_folder(tmp_path):
+    FileHelper.write_json_atomic(str(tmp_path / "calendar_data_2025_HK.json"), {"response": {"holidays": [
+        raw_holiday("HK", "New Year", "2025-01-01", ["National holiday"]),
+        raw_holiday("HK", "Ching Ming", "2025-04-04", ["Observance"]),
+    ]}})
+    FileHelper.write_json_atomic(str(tmp_path / "calendar_data_2025_US.json.gz"), {"response": {"holidays": [
+        raw_holiday("US", "New Year", "2025-01-01", ["National holiday"]),
+        raw_holiday("US", "Lincoln's Birthday", "2025-02-12", ["Local holiday"], "US-CT, US-NY"),
+    ]}}, "gzip")
+    (tmp_path / "unrelated.json").write_text("{}")
+    return str(tmp_path)
+
+
+class TestHolidayCorpus:
+    def test_load_reads_every_cache_file(self, corpus_folder):
+        corpus = HolidayCorpus.load(corpus_folder)
+        assert len(corpus) == 4
+        assert corpus.count_by_country() == {"HK": 2, "US": 2}
+
+    def test_too_many_types_raises(self, tmp_path):
+        # 64 types fill the mask; the 65th arrives as a primary type only
+        holidays = [raw_holiday("HK", f"Day {index}", "2025-01-01", [f"Type {index}"]) for index in range(64)]
+        holidays.append({**raw_holiday("HK", "Extra", "2025-01-02", ["Type 0"]), "primary_type": "Type 64"})
+        FileHelper.write_json_atomic(str(tmp_path / "calendar_data_2025_HK.json"),
+                                     {"response": {"holidays": holidays}})
+        with pytest.raises(ValueError):
+            HolidayCorpus.load(str(tmp_path))
+
+    def test_filters(self, corpus_folder):
+        corpus = HolidayCorpus.load(corpus_folder)
+        assert len(corpus.filter(types=["National holiday"])) == 2
+        assert len(corpus.filter(countries=["us"], location="US-CA")) == 1
+        assert len(corpus.filter(location="US-NY")) == 4
+        assert corpus.filter(start=date(2025, 2, 1), end=date(2025, 3, 1)).unique_dates() == [date(2025, 2, 12)]
+
+    def test_iter_rows_round_trips(self, corpus_folder):
+        rows = list(HolidayCorpus.load(corpus_folder).filter(countries=["US"], types=["Local holiday"]).iter_rows())
+        assert rows == [{"Country ID": "US", "Country Name": "Country US", "Name": "Lincoln's Birthday",
+                         "Date ISO": "2025-02-12", "Type": "Local holiday", "Primary Type": "Local holiday",
+                         "Locations": "US-CT, US-NY"}]
+
+    def test_export_csv_streams_all_rows(self, corpus_folder, tmp_path):
+        output = tmp_path / "export.csv"
+        assert HolidayCorpus.export_csv(corpus_folder, str(output)) == 4
+        assert output.read_text().splitlines()[0] == ",".join(HolidayCorpus.CSV_HEADERS)
@@ -0,0 +1,429 @@
+import time
+import asyncio
+import concurrent.futures
+import threading
+import pytest
+import dns.resolver
+from unittest.mock import MagicMock, patch
+
+from utilities.DNS_Resolver import DNS_Resolver
+from utilities.DNS_Cache import DNS_Cache
+from utilities.DNS_Monitor import DNS_Monitor
+from utilities.Histogram import StreamingHistogram
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(autouse=True)
+def empty_pool():
+    DNS_Resolver._resolvers.clear()
+    DNS_Resolver._async_resolvers.clear()
+    DNS_Resolver._server_latency.clear()
+    DNS_Resolver._current_ip_cache.clear()
+    DNS_Resolver._persistent_cache = None
+    yield
+    DNS_Resolver._persistent_cache = None
+    DNS_Resolver._resolvers.clear()
+    DNS_Resolver._async_resolvers.clear()
+    DNS_Resolver._server_latency.clear()
+    DNS_Resolver._current_ip_cache.clear()
+
+
+def fake_answer(addresses, ttl=300):
+    answer = MagicMock()
+    answer.__iter__.return_value = iter(addresses)
+    answer.expiration = time.time() + ttl
+    return answer
+
+
+def fake_async_resolver(answers: dict, delay: float = 0.05):
+    """Build an async resolver whose resolve() returns or raises answers[(host, rdtype)]."""
+    async def resolve(host, rdtype):
+        await asyncio.sleep(delay)
+        outcome = answers[(host, rdtype)]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return fake_answer(outcome)
+
+    resolver = MagicMock()
+    resolver.resolve = resolve
+    return resolver
+
+
+# ---------------------------------------------------------------------------
+# Resolver pool
+# ---------------------------------------------------------------------------
+
+class TestResolverPool:
+    def test_same_resolver_per_server(self):
+        assert DNS_Resolver.get_resolver('1.1.1.1') is DNS_Resolver.get_resolver('1.1.1.1')
+
+    def test_separate_resolver_and_cache_per_server(self):
+        first = DNS_Resolver.get_resolver('1.1.1.1')
+        second = DNS_Resolver.get_resolver('8.8.8.8')
+        assert first is not second
+        assert first.cache is not second.cache
+        assert first.nameservers == ['1.1.1.1']
+        assert isinstance(first.cache, dns.resolver.LRUCache)
+
+    def test_concurrent_creation_yields_one_resolver(self):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(DNS_Resolver.get_resolver('9.9.9.9')))
+                   for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len({id(r) for r in results}) == 1
+
+
+# ---------------------------------------------------------------------------
+# resolve_ip
+# ---------------------------------------------------------------------------
+
+class TestResolveIp:
+    def test_invalid_server_returns_empty(self):
+        assert DNS_Resolver.resolve_ip('github.com', 'not-an-ip') == []
+
+    def test_invalid_host_returns_empty(self):
+        assert DNS_Resolver.resolve_ip('not a host', '1.1.1.1') == []
+
+    def test_does_not_override_system_resolver(self):
+        dns_resolver = DNS_Resolver.get_resolver('1.1.1.1')
+        with patch.object(dns_resolver, 'resolve', return_value=fake_answer(['140.82.112.3'])), \
+                patch('dns.resolver.override_system_resolver') as override:
+            assert DNS_Resolver.resolve_ip('github.com', '1.1.1.1') == ['140.82.112.3']
+        override.assert_not_called()
+
+    def test_nxdomain_returns_empty(self):
+        dns_resolver = DNS_Resolver.get_resolver('1.1.1.1')
+        with patch.object(dns_resolver, 'resolve', MagicMock(side_effect=dns.resolver.NXDOMAIN())):
+            assert DNS_Resolver.resolve_ip('missing.example.com', '1.1.1.1') == []
+
+
+# ---------------------------------------------------------------------------
+# resolve_many
+# ---------------------------------------------------------------------------
+
+class TestResolveMany:
+    def test_async_resolver_shares_sync_cache(self):
+        assert DNS_Resolver.get_async_resolver('1.1.1.1').cache is DNS_Resolver.get_resolver('1.1.1.1').cache
+
+    def test_structured_results_and_error_categories(self):
+        resolver = fake_async_resolver({
+            ("github.com", "A"): ["140.82.112.3"],
+            ("github.com", "AAAA"): dns.resolver.NoAnswer(),
+            ("missing.example.com", "A"): dns.resolver.NXDOMAIN(),
+            ("missing.example.com", "AAAA"): dns.resolver.NXDOMAIN(),
+        })
+        with patch.object(DNS_Resolver, 'get_async_resolver', return_value=resolver):
+            results = DNS_Resolver.resolve_many(["github.com", "missing.example.com"], ["1.1.1.1"], ["A", "AAAA"])
+
+        by_key = {(r["host"], r["rdtype"]): r for r in results}
+        assert by_key[("github.com", "A")]["addresses"] == ["140.82.112.3"]
+        assert by_key[("github.com", "A")]["server"] == "1.1.1.1"
+        assert 0 < by_key[("github.com", "A")]["ttl"] <= 300
+        assert by_key[("github.com", "AAAA")]["error"] == "no_answer"
+        assert by_key[("missing.example.com", "A")]["error"] == "nxdomain"
+
+    def test_queries_run_concurrently(self):
+        hosts = [f"host{i}.example.com" for i in range(20)]
+        resolver = fake_async_resolver({(host, "A"): ["192.0.2.1"] for host in hosts})
+        with patch.object(DNS_Resolver, 'get_async_resolver', return_value=resolver):
+            start_time = time.time()
+            results = DNS_Resolver.resolve_many(hosts)
+        assert all(r["success"] for r in results)
+        assert time.time() - start_time < 0.5  # 20 x 50 ms sequentially would be 1 s
+
+    def test_invalid_input_is_categorized(self):
+        results = DNS_Resolver.resolve_many(["not a host"], ["1.1.1.1"])
+        assert results[0]["error"] == "invalid"
+
+
+# ---------------------------------------------------------------------------
+# resolve_race
+# ---------------------------------------------------------------------------
+
+def servers_patch(resolvers: dict):
+    return patch.object(DNS_Resolver, 'get_async_resolver', side_effect=lambda dns_srv, use_cache=True: resolvers[dns_srv])
+
+
+class TestResolveRace:
+    def test_fastest_server_wins(self):
+        resolvers = {
+            "192.0.2.1": fake_async_resolver({("github.com", "A"): ["140.82.112.3"]}, delay=1.0),
+            "192.0.2.2": fake_async_resolver({("github.com", "A"): ["140.82.112.4"]}, delay=0.01),
+        }
+        with servers_patch(resolvers):
+            start_time = time.time()
+            result = DNS_Resolver.resolve_race("github.com", list(resolvers), stagger=0.05)
+        assert result["server"] == "192.0.2.2"
+        assert result["attempts"] == 2
+        assert time.time() - start_time < 0.5
+
+    def test_failure_starts_next_server_without_waiting(self):
+        resolvers = {
+            "192.0.2.1": fake_async_resolver({("github.com", "A"): dns.resolver.NoNameservers()}, delay=0.01),
+            "192.0.2.2": fake_async_resolver({("github.com", "A"): ["140.82.112.4"]}, delay=0.01),
+        }
+        with servers_patch(resolvers):
+            start_time = time.time()
+            result = DNS_Resolver.resolve_race("github.com", list(resolvers), stagger=5)
+        assert result["addresses"] == ["140.82.112.4"]
+        assert time.time() - start_time < 1
+
+    def test_verify_reports_disagreement(self):
+        resolvers = {
+            "192.0.2.1": fake_async_resolver({("github.com", "A"): ["140.82.112.3"]}, delay=0.01),
+            "192.0.2.2": fake_async_resolver({("github.com", "A"): ["140.82.112.4"]}, delay=0.02),
+        }
+        with servers_patch(resolvers):
+            result = DNS_Resolver.resolve_race("github.com", list(resolvers), stagger=0, verify=True)
+        assert result["consistent"] is False
+
+    def test_all_failures_return_last_error(self):
+        resolvers = {"192.0.2.1": fake_async_resolver({("github.com", "A"): dns.resolver.NXDOMAIN()}, delay=0)}
+        with servers_patch(resolvers):
+            result = DNS_Resolver.resolve_race("github.com", list(resolvers))
+        assert not result["success"]
+        assert result["error"] == "nxdomain"
+
+    def test_rank_servers_prefers_lower_latency(self):
+        DNS_Resolver.record_latency("192.0.2.1", 80, True)
+        DNS_Resolver.record_latency("192.0.2.2", 10, True)
+        DNS_Resolver.record_latency("192.0.2.3", 5, False)
+        assert DNS_Resolver.rank_servers(["192.0.2.1", "192.0.2.2", "192.0.2.3", "192.0.2.4"]) == \
+            ["192.0.2.4", "192.0.2.2", "192.0.2.1", "192.0.2.3"]
+
+    def test_resolve_ip_races_server_lists(self):
+        with patch.object(DNS_Resolver, 'resolve_race', return_value={"addresses": ["192.0.2.10"]}) as race:
+            assert DNS_Resolver.resolve_ip("github.com", ["192.0.2.1", "192.0.2.2"]) == ["192.0.2.10"]
+        race.assert_called_once_with("github.com", ["192.0.2.1", "192.0.2.2"])
+
+
+# ---------------------------------------------------------------------------
+# get_current_ip
+# ---------------------------------------------------------------------------
+
+ECHO_URLS = ["https://echo1.example.com/ip", "https://echo2.example.com/ip", "https://echo3.example.com/ip"]
+
+
+def fake_fetch(answers: dict):
+    """Build a _fetch_public_ip replacement returning answers[url] = (ip, delay)."""
+    def fetch(url, timeout):
+        ip, delay = answers[url]
+        time.sleep(delay)
+        return ip
+    return fetch
+
+
+class TestGetCurrentIp:
+    def test_returns_on_quorum_without_waiting_for_stragglers(self):
+        answers = dict(zip(ECHO_URLS, [("203.0.113.7", 0.01), ("203.0.113.7", 0.02), ("203.0.113.7", 2)]))
+        with patch.object(DNS_Resolver, '_fetch_public_ip', side_effect=fake_fetch(answers)):
+            start_time = time.time()
+            assert DNS_Resolver.get_current_ip(ECHO_URLS) == "203.0.113.7"
+        assert time.time() - start_time < 1
+
+    def test_tolerates_one_broken_endpoint(self):
+        answers = dict(zip(ECHO_URLS, [("203.0.113.7", 0), (None, 0), ("203.0.113.7", 0)]))
+        with patch.object(DNS_Resolver, '_fetch_public_ip', side_effect=fake_fetch(answers)):
+            assert DNS_Resolver.get_current_ip(ECHO_URLS) == "203.0.113.7"
+
+    def test_disagreement_below_quorum_returns_none(self):
+        answers = dict(zip(ECHO_URLS, [("203.0.113.7", 0), ("203.0.113.8", 0), (None, 0)]))
+        with patch.object(DNS_Resolver, '_fetch_public_ip', side_effect=fake_fetch(answers)):
+            assert DNS_Resolver.get_current_ip(ECHO_URLS) is None
+
+    def test_result_is_cached(self):
+        answers = dict(zip(ECHO_URLS, [("203.0.113.7", 0)] * 3))
+        with patch.object(DNS_Resolver, '_fetch_public_ip', side_effect=fake_fetch(answers)) as fetch:
+            DNS_Resolver.get_current_ip(ECHO_URLS, quorum=3)
+            calls = fetch.call_count
+            assert DNS_Resolver.get_current_ip(ECHO_URLS, quorum=3) == "203.0.113.7"
+        assert fetch.call_count == calls
+
+    def test_empty_resolvers_returns_none(self):
+        assert DNS_Resolver.get_current_ip([]) is None
+
+    def test_async_returns_on_quorum_and_cancels_stragglers(self):
+        answers = dict(zip(ECHO_URLS, [("203.0.113.9", 0.01), ("203.0.113.9", 0.02), ("203.0.113.9", 2)]))
+        cancelled = []
+
+        async def fetch(client, url, timeout):
+            ip, delay = answers[url]
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(url)
+                raise
+            return ip
+
+        with patch.object(DNS_Resolver, '_fetch_public_ip_async', side_effect=fetch):
+            start_time = time.time()
+            assert asyncio.run(DNS_Resolver.get_current_ip_async(ECHO_URLS, cache_ttl=0)) == "203.0.113.9"
+        assert time.time() - start_time < 1
+        assert cancelled == [ECHO_URLS[2]]
+
+    def test_concurrent_callers_share_one_discovery_per_key(self):
+        other_urls = ["https://echo4.example.com/ip", "https://echo5.example.com/ip"]
+        answers = {**dict(zip(ECHO_URLS, [("203.0.113.7", 0.3)] * 3)),
+                   **dict(zip(other_urls, [("203.0.113.8", 0.3)] * 2))}
+        with patch.object(DNS_Resolver, '_fetch_public_ip', side_effect=fake_fetch(answers)) as fetch:
+            start_time = time.time()
+            with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+                results = [executor.submit(DNS_Resolver.get_current_ip, urls, 2)
+                           for urls in (ECHO_URLS, ECHO_URLS, other_urls)]
+            assert [future.result() for future in results] == ["203.0.113.7", "203.0.113.7", "203.0.113.8"]
+        assert time.time() - start_time < 0.5  # Different keys are not serialized
+        assert fetch.call_count == 5  # The second caller reused the first discovery
+
+    def test_resolve_ip_async(self):
+        resolvers = {"192.0.2.1": fake_async_resolver({("github.com", "A"): ["140.82.112.3"]}, delay=0.01)}
+        with servers_patch(resolvers):
+            assert asyncio.run(DNS_Resolver.resolve_ip_async("github.com", "192.0.2.1")) == ["140.82.112.3"]
+
+
+# ---------------------------------------------------------------------------
+# DNS_Cache (persistent answers)
+# ---------------------------------------------------------------------------
+
+class TestPersistentCache:
+    def test_answers_survive_reload(self, tmp_path):
+        cache = DNS_Cache(str(tmp_path / "dns_cache.json"))
+        cache.put("GitHub.com.", "A", "1.1.1.1", ["140.82.112.3"], 300)
+        cache.flush(force=True)
+
+        reloaded = DNS_Cache(str(tmp_path / "dns_cache.json"))
+        assert reloaded.load() == 1
+        assert reloaded.get("github.com", "A", "1.1.1.1")["addresses"] == ["140.82.112.3"]
+        assert reloaded.get("github.com", "A", "8.8.8.8") is None
+
+    def test_expired_answer_only_served_stale_within_window(self, tmp_path):
+        cache = DNS_Cache(str(tmp_path / "dns_cache.json"), serve_stale=60)
+        cache.put("github.com", "A", "1.1.1.1", ["140.82.112.3"], 0)
+        assert cache.get("github.com", "A", "1.1.1.1") is None
+        assert cache.get("github.com", "A", "1.1.1.1", allow_stale=True)["stale"] is True
+
+        cache.serve_stale = 0
+        assert cache.get("github.com", "A", "1.1.1.1", allow_stale=True) is None
+
+    def test_flush_respects_interval(self, tmp_path):
+        cache = DNS_Cache(str(tmp_path / "dns_cache.json"), flush_interval=3600)
+        cache.put("github.com", "A", "1.1.1.1", ["140.82.112.3"], 300)
+        assert not (tmp_path / "dns_cache.json").exists()
+        assert cache.flush(force=True)
+
+    def test_resolve_ip_serves_fresh_answer_without_query(self, tmp_path):
+        DNS_Resolver.enable_persistent_cache(str(tmp_path / "dns_cache.json"))
+        DNS_Resolver._persistent_cache.put("github.com", "A", "1.1.1.1", ["140.82.112.3"], 300)
+        dns_resolver = DNS_Resolver.get_resolver('1.1.1.1')
+        with patch.object(dns_resolver, 'resolve') as resolve:
+            assert DNS_Resolver.resolve_ip("github.com", "1.1.1.1") == ["140.82.112.3"]
+        resolve.assert_not_called()
+
+    def test_resolve_ip_serves_stale_on_timeout(self, tmp_path):
+        DNS_Resolver.enable_persistent_cache(str(tmp_path / "dns_cache.json"), serve_stale=60)
+        DNS_Resolver._persistent_cache.put("github.com", "A", "1.1.1.1", ["140.82.112.3"], 0)
+        dns_resolver = DNS_Resolver.get_resolver('1.1.1.1')
+        with patch.object(dns_resolver, 'resolve', side_effect=dns.resolver.LifetimeTimeout(timeout=5, errors={})):
+            assert DNS_Resolver.resolve_ip("github.com", "1.1.1.1") == ["140.82.112.3"]
+
+
+# ---------------------------------------------------------------------------
+# StreamingHistogram / DNS_Monitor
+# ---------------------------------------------------------------------------
+
+class TestStreamingHistogram:
+    def test_percentiles_within_bucket_error(self):
+        histogram = StreamingHistogram()
+        for value in range(1, 1001):
+            histogram.record(value)
+        snapshot = histogram.snapshot()
+        assert snapshot["count"] == 1000
+        assert 500 <= snapshot["p50"] <= 500 * 1.2
+        assert 990 <= snapshot["p99"] <= 1000
+        assert snapshot["max"] == 1000
+
+    def test_empty_histogram(self):
+        assert StreamingHistogram().snapshot()["p95"] is None
+
+    def test_memory_is_fixed(self):
+        histogram = StreamingHistogram()
+        buckets = len(histogram.counts)
+        for value in range(10000):
+            histogram.record(value % 97)
+        assert len(histogram.counts) == buckets
+
+
+class TestDnsMonitor:
+    def result(self, server, duration_ms, error=None):
+        return {"host": "github.com", "rdtype": "A", "server": server, "success": error is None,
+                "addresses": [], "ttl": None, "duration_ms": duration_ms, "error": error}
+
+    def test_snapshot_rates_and_ranking(self):
+        monitor = DNS_Monitor(["github.com"], ["192.0.2.1", "192.0.2.2"])
+        for _ in range(9):
+            monitor.record(self.result("192.0.2.1", 40))
+            monitor.record(self.result("192.0.2.2", 10))
+        monitor.record(self.result("192.0.2.1", 5000, "timeout"))
+        monitor.record(self.result("192.0.2.2", 12, "nxdomain"))
+
+        servers = monitor.snapshot()["servers"]
+        assert servers["192.0.2.1"]["timeout_rate"] == 0.1
+        assert servers["192.0.2.1"]["latency_ms"]["count"] == 9
+        assert servers["192.0.2.2"]["nxdomain_rate"] == 0.1
+        assert monitor.ranked_servers() == ["192.0.2.2", "192.0.2.1"]
+
+    def test_probe_bypasses_caches_and_exports(self, tmp_path):
+        export_file = tmp_path / "dns_monitor.json"
+        monitor = DNS_Monitor(["github.com"], ["192.0.2.1"], export_file=str(export_file))
+        with patch.object(DNS_Resolver, 'resolve_many', return_value=[self.result("192.0.2.1", 20)]) as resolve:
+            monitor.probe()
+        assert resolve.call_args.kwargs["use_cache"] is False
+        assert export_file.exists()
+
+
+# ---------------------------------------------------------------------------
+# Dual stack
+# ---------------------------------------------------------------------------
+
+class TestDualStack:
+    def test_a_and_aaaa_are_queried_concurrently_and_tagged(self):
+        resolver = fake_async_resolver({
+            ("github.com", "A"): ["140.82.112.3"],
+            ("github.com", "AAAA"): ["2001:db8::1"],
+        }, delay=0.2)
+        with patch.object(DNS_Resolver, 'get_async_resolver', return_value=resolver):
+            start_time = time.time()
+            addresses = DNS_Resolver.resolve_dual_stack("github.com", "1.1.1.1")
+        assert time.time() - start_time < 0.35
+        assert [(a["address"], a["family"]) for a in addresses] == [("140.82.112.3", 4), ("2001:db8::1", 6)]
+        assert all(a["ttl"] for a in addresses)
+
+    def test_missing_aaaa_still_returns_ipv4(self):
+        resolver = fake_async_resolver({
+            ("github.com", "A"): ["140.82.112.3"],
+            ("github.com", "AAAA"): dns.resolver.NoAnswer(),
+        }, delay=0)
+        with patch.object(DNS_Resolver, 'get_async_resolver', return_value=resolver):
+            assert [a["family"] for a in DNS_Resolver.resolve_dual_stack("github.com", "1.1.1.1")] == [4]
+
+    def test_public_ipv4_and_ipv6_in_parallel(self):
+        answers = {("v4",): "203.0.113.7", ("v6",): "2001:db8::7"}
+
+        def fake_get_current_ip(resolvers, quorum, timeout):
+            time.sleep(0.2)
+            return answers[tuple(resolvers)]
+
+        with patch.object(DNS_Resolver, 'get_current_ip', side_effect=fake_get_current_ip):
+            start_time = time.time()
+            result = DNS_Resolver.get_current_ips(["v4"], ["v6"])
+        assert result == {"ipv4": "203.0.113.7", "ipv6": "2001:db8::7"}
+        assert time.time() - start_time < 0.35
+
+    def test_wrong_family_is_rejected(self):
+        with patch.object(DNS_Resolver, 'get_current_ip', return_value="203.0.113.7"):
+            assert DNS_Resolver.get_current_ips(resolvers_v6=["v6"]) == {"ipv4": None, "ipv6": None}
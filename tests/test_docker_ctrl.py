@@ -396,6 +396,26 @@ class TestStatus:
         ctrl.status()
         assert 'exited' in capsys.readouterr().out
 
+    def test_running_container_reports_health(self, ctrl, capsys):
+        mock_image = MagicMock()
+        mock_image.attrs = {'RepoTags': ['myapp:latest']}
+        mock_container = MagicMock()
+        mock_container.status = 'running'
+        mock_container.attrs = {'State': {'Health': {'Status': 'unhealthy', 'FailingStreak': 3, 'Log': [
+            {'ExitCode': 0, 'Output': 'Running: last tick 30 s ago, 0 jobs running\n'},
+            {'ExitCode': 1, 'Output': 'Stale heartbeat: last tick 400 s ago (limit 90 s)\n'}]}}}
+        ctrl._image_exist = MagicMock(return_value=mock_image)
+        ctrl._container_exist = MagicMock(return_value=mock_container)
+        ctrl.status()
+        out = capsys.readouterr().out
+        assert 'unhealthy' in out
+        assert 'Stale heartbeat' in out
+
+    def test_container_without_healthcheck(self, ctrl):
+        mock_container = MagicMock()
+        mock_container.attrs = {'State': {'Status': 'running'}}
+        assert ctrl._container_health(mock_container) is None
+
 
 # ---------------------------------------------------------------------------
 # _interactive_session()
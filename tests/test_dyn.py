@@ -0,0 +1,324 @@
+import json
+import time
+import pytest
+import requests
+from unittest.mock import MagicMock, patch
+
+from utilities.Dyn import Dyn_Updater
+from utilities.Dyn_Providers import Dyn_Providers
+from utilities.KeyManager import KeyManager
+from utilities.DNS_Resolver import DNS_Resolver
+from utilities.DDNS_Sync import DDNS_Sync
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def dyn_config(tmp_path):
+    return {"dyn_endpoint": "https://members.dyndns.example/nic/update",
+            "dyn_state_file": str(tmp_path / "dyn_state.json")}
+
+
+@pytest.fixture
+def dyn(dyn_config):
+    with patch('utilities.Dyn.KeyManager'):
+        return Dyn_Updater(dyn_config)
+
+
+def provider_response(text, status_code=200, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.reason = "OK" if status_code == 200 else "Error"
+    response.text = text
+    response.headers = headers or {}
+    return response
+
+
+# ---------------------------------------------------------------------------
+# Change detection
+# ---------------------------------------------------------------------------
+
+class TestChangeDetection:
+    def test_first_update_is_sent_and_recorded(self, dyn, dyn_config):
+        with patch.object(dyn.session, 'get', return_value=provider_response("good 203.0.113.7")) as urlopen:
+            result = dyn.update("home.example.com", "203.0.113.7")
+        assert result["success"] and not result.get("skipped")
+        urlopen.assert_called_once()
+        state = json.load(open(dyn_config["dyn_state_file"]))
+        assert state["home.example.com/A"]["ip"] == "203.0.113.7"
+
+    def test_unchanged_ip_is_skipped_across_instances(self, dyn, dyn_config):
+        with patch.object(dyn.session, 'get', return_value=provider_response("good 203.0.113.7")):
+            dyn.update("home.example.com", "203.0.113.7")
+
+        with patch('utilities.Dyn.KeyManager'):
+            restarted = Dyn_Updater(dyn_config)
+        with patch.object(restarted.session, 'get') as urlopen:
+            result = restarted.update("home.example.com", "203.0.113.7")
+        assert result["skipped"] is True
+        urlopen.assert_not_called()
+
+    def test_changed_ip_and_force_are_sent(self, dyn):
+        with patch.object(dyn.session, 'get', return_value=provider_response("good 203.0.113.7")) as urlopen:
+            dyn.update("home.example.com", "203.0.113.7")
+            dyn.update("home.example.com", "203.0.113.8")
+            dyn.update("home.example.com", "203.0.113.8", force=True)
+        assert urlopen.call_count == 3
+
+    def test_ipv4_and_ipv6_are_tracked_separately(self, dyn):
+        with patch.object(dyn.session, 'get', return_value=provider_response("good")) as urlopen:
+            dyn.update("home.example.com", "203.0.113.7")
+            dyn.update("home.example.com", "2001:db8::7")
+            assert dyn.update("home.example.com", "203.0.113.7")["skipped"] is True
+            assert dyn.update("home.example.com", "2001:db8::7")["skipped"] is True
+        assert urlopen.call_count == 2
+
+    def test_failed_update_is_not_recorded(self, dyn):
+        with patch.object(dyn.session, 'get', return_value=provider_response("badauth")):
+            dyn.update("home.example.com", "203.0.113.7")
+        assert "home.example.com/A" not in dyn.state
+
+    def test_dns_verification_skips_update(self, dyn):
+        dyn.verify_dns = "192.0.2.53"
+        answer = [{"host": "home.example.com", "success": True, "addresses": ["203.0.113.7"]}]
+        with patch.object(DNS_Resolver, 'resolve_many', return_value=answer) as resolve_many, \
+                patch.object(dyn.session, 'get') as urlopen:
+            result = dyn.update("home.example.com", "203.0.113.7")
+        assert result["skipped"] is True
+        resolve_many.assert_called_once_with(["home.example.com"], ["192.0.2.53"], ['A'])
+        urlopen.assert_not_called()
+        assert dyn.state["home.example.com/A"]["status"] == "verified"
+
+    def test_invalid_input(self, dyn):
+        assert dyn.update("not a host", "203.0.113.7")["success"] is False
+        assert dyn.update("home.example.com", "999.0.0.1")["success"] is False
+
+
+# ---------------------------------------------------------------------------
+# Batch updates
+# ---------------------------------------------------------------------------
+
+class TestUpdateMany:
+    def test_parse_response_per_host(self):
+        results = Dyn_Updater.parse_response("good 203.0.113.7\nnochg 203.0.113.7\nnohost\n", ["a.example.com",
+                                             "b.example.com", "c.example.com"])
+        assert [(r["host"], r["code"], r["success"]) for r in results] == [
+            ("a.example.com", "good", True), ("b.example.com", "nochg", True), ("c.example.com", "nohost", False)]
+        assert results[0]["ip"] == "203.0.113.7"
+
+    def test_single_line_applies_to_every_host(self):
+        results = Dyn_Updater.parse_response("911", ["a.example.com", "b.example.com"])
+        assert [r["code"] for r in results] == ["911", "911"]
+
+    def test_hosts_are_batched(self, dyn):
+        dyn.batch_size = 2
+        hosts = [f"h{i}.example.com" for i in range(5)]
+
+        def answer(url, **kwargs):
+            count = url.split("hostname=")[1].split("&")[0].count(",") + 1
+            return provider_response("\n".join(["good 203.0.113.7"] * count))
+
+        with patch.object(dyn.session, 'get', side_effect=answer) as urlopen:
+            results = dyn.update_many(hosts, "203.0.113.7")
+        assert urlopen.call_count == 3
+        assert "hostname=h0.example.com,h1.example.com&" in urlopen.call_args_list[0].args[0]
+        assert all(r["success"] and r["code"] == "good" for r in results)
+
+    def test_current_hosts_are_skipped_and_failures_reported(self, dyn):
+        dyn._record_state("a.example.com", "203.0.113.7", "good")
+        with patch.object(dyn.session, 'get', return_value=provider_response("good 203.0.113.7\nabuse")) as urlopen:
+            results = dyn.update_many(["a.example.com", "b.example.com", "c.example.com", "bad host"], "203.0.113.7")
+        assert "hostname=b.example.com,c.example.com&" in urlopen.call_args.args[0]
+        by_host = {r["host"]: r for r in results}
+        assert by_host["a.example.com"]["skipped"] is True
+        assert by_host["b.example.com"]["code"] == "good"
+        assert by_host["c.example.com"]["error"] == "abuse"
+        assert by_host["bad host"]["success"] is False
+        assert "c.example.com" not in dyn.state
+
+    def test_dns_verification_resolves_pending_hosts_in_one_batch(self, dyn):
+        dyn.verify_dns = ["192.0.2.53", "192.0.2.54"]
+        dyn._record_state("a.example.com", "2001:db8::7", "good")
+        answer = [{"host": "b.example.com", "success": True, "addresses": ["2001:db8::7"]},
+                  {"host": "c.example.com", "success": True, "addresses": ["2001:db8::1"]},
+                  {"host": "c.example.com", "success": False, "addresses": []}]
+        with patch.object(DNS_Resolver, 'resolve_many', return_value=answer) as resolve_many, \
+                patch.object(dyn.session, 'get', return_value=provider_response("good 2001:db8::7")) as urlopen:
+            results = dyn.update_many(["a.example.com", "b.example.com", "c.example.com"], "2001:db8::7")
+        resolve_many.assert_called_once_with(["b.example.com", "c.example.com"], ["192.0.2.53", "192.0.2.54"],
+                                             ['AAAA'])
+        assert "hostname=c.example.com&" in urlopen.call_args.args[0]
+        assert [r["skipped"] for r in results] == [True, True, False]
+
+
+# ---------------------------------------------------------------------------
+# HTTP client and backoff
+# ---------------------------------------------------------------------------
+
+class TestBackoff:
+    def test_requests_use_timeouts(self, dyn):
+        with patch.object(dyn.session, 'get', return_value=provider_response("good 203.0.113.7")) as get:
+            dyn.update("home.example.com", "203.0.113.7")
+        assert get.call_args.kwargs["timeout"] == (5.0, 15.0)
+
+    @pytest.mark.parametrize("answer, backoff", [("911", 1800), ("abuse", 86400), ("badauth", 86400)])
+    def test_provider_codes_suspend_updates(self, dyn, answer, backoff):
+        with patch.object(dyn.session, 'get', return_value=provider_response(answer)) as get:
+            dyn.update("home.example.com", "203.0.113.7")
+            result = dyn.update("home.example.com", "203.0.113.8")
+        assert get.call_count == 1
+        assert result["suspended"] is True
+        assert backoff - 5 < dyn.suspended_until() - time.time() <= backoff
+
+    def test_retry_after_is_honoured(self, dyn):
+        with patch.object(dyn.session, 'get', return_value=provider_response("", 429, {"Retry-After": "120"})):
+            dyn.update("home.example.com", "203.0.113.7")
+        assert 115 < dyn.suspended_until() - time.time() <= 120
+
+    def test_suspension_survives_restart(self, dyn, dyn_config):
+        with patch.object(dyn.session, 'get', return_value=provider_response("abuse")):
+            dyn.update("home.example.com", "203.0.113.7")
+        with patch('utilities.Dyn.KeyManager'):
+            assert Dyn_Updater(dyn_config).suspended_until() is not None
+
+    def test_timeout_is_reported(self, dyn):
+        with patch.object(dyn.session, 'get', side_effect=requests.Timeout("read timed out")):
+            result = dyn.update("home.example.com", "203.0.113.7")
+        assert result["success"] is False
+        assert result["error"].startswith("Timeout")
+
+
+# ---------------------------------------------------------------------------
+# DDNS_Sync pipeline
+# ---------------------------------------------------------------------------
+
+class TestDdnsSync:
+    @pytest.fixture
+    def sync(self, dyn_config):
+        config = {**dyn_config, "ddns_hostnames": ["a.example.com", "b.example.com"],
+                  "ddns_ip_resolvers": ["https://echo.example.com/ip"]}
+        updater = MagicMock()
+        updater.update_many.side_effect = lambda hosts, ip: [{"host": h, "success": True, "code": "good"}
+                                                             for h in hosts]
+        return DDNS_Sync(config, updater)
+
+    def resolved(self, mapping):
+        return [{"host": host, "addresses": addresses} for host, addresses in mapping.items()]
+
+    def test_only_stale_hosts_are_updated(self, sync):
+        with patch.object(DNS_Resolver, 'get_current_ip', return_value="203.0.113.7"), \
+                patch.object(DNS_Resolver, 'resolve_many', return_value=self.resolved(
+                    {"a.example.com": ["203.0.113.7"], "b.example.com": ["203.0.113.1"]})):
+            result = sync.run()
+        sync.updater.update_many.assert_called_once_with(["b.example.com"], "203.0.113.7")
+        assert result["success"] and result["stale"] == ["b.example.com"]
+        assert set(result["timings"]) == {"discover", "resolve", "update", "total"}
+
+    def test_converged_cycle_makes_no_provider_call(self, sync):
+        with patch.object(DNS_Resolver, 'get_current_ip', return_value="203.0.113.7"), \
+                patch.object(DNS_Resolver, 'resolve_many', return_value=self.resolved(
+                    {"a.example.com": ["203.0.113.7"], "b.example.com": ["203.0.113.7"]})):
+            result = sync.run()
+        sync.updater.update_many.assert_not_called()
+        assert result["success"] and result["updates"] == []
+
+    def test_ipv6_checks_aaaa_records(self, sync):
+        with patch.object(DNS_Resolver, 'get_current_ip', return_value="2001:db8::7"), \
+                patch.object(DNS_Resolver, 'resolve_many', return_value=[]) as resolve_many:
+            sync.run()
+        assert resolve_many.call_args.args[2] == ['AAAA']
+
+    def test_no_public_ip_stops_cycle(self, sync):
+        with patch.object(DNS_Resolver, 'get_current_ip', return_value=None):
+            result = sync.run()
+        assert result["success"] is False and "error" in result
+        sync.updater.update_many.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# Multiple providers
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def providers_config(tmp_path):
+    return {"dyn_read_timeout": 7,
+            "dyn_providers": {
+                "fast": {"dyn_endpoint": "https://fast.example/nic/update",
+                         "dyn_state_file": str(tmp_path / "fast.json")},
+                "slow": {"dyn_endpoint": "https://slow.example/nic/update",
+                         "dyn_state_file": str(tmp_path / "slow.json"), "dyn_min_interval": 2}},
+            "dyn_hosts": {"a.example.com": "fast", "b.example.com": "slow", "c.example.com": "fast"}}
+
+
+@pytest.fixture
+def providers(providers_config):
+    key_manager = MagicMock()
+    key_manager.get_many.side_effect = lambda items: {item: f"secret-{item}" for item in items}
+    return Dyn_Providers(providers_config, key_manager)
+
+
+class TestDynProviders:
+    def test_each_provider_gets_its_own_credentials(self, providers):
+        assert providers.updaters["fast"].session.auth == ("secret-fast_username", "secret-fast_token")
+        assert providers.updaters["slow"].session.auth == ("secret-slow_username", "secret-slow_token")
+
+    def test_provider_settings_fall_back_to_shared_values(self, providers):
+        assert providers.updaters["fast"].timeout == (5.0, 7.0)
+        assert providers.updaters["fast"].session is not providers.updaters["slow"].session
+        assert providers.updaters["slow"].min_interval == 2
+
+    def test_unknown_provider_is_rejected(self, providers_config):
+        providers_config["dyn_hosts"]["d.example.com"] = "missing"
+        with pytest.raises(KeyError):
+            Dyn_Providers(providers_config, MagicMock())
+
+    def test_hosts_are_grouped_per_provider(self, providers):
+        def answer(url, **kwargs):
+            count = url.split("hostname=")[1].split("&")[0].count(",") + 1
+            return provider_response("\n".join(["good 203.0.113.7"] * count))
+
+        with patch.object(providers.updaters["fast"].session, 'get', side_effect=answer) as fast, \
+                patch.object(providers.updaters["slow"].session, 'get', side_effect=answer) as slow:
+            results = providers.update_many(["a.example.com", "b.example.com", "c.example.com", "x.example.com"],
+                                            "203.0.113.7")
+        assert "hostname=a.example.com,c.example.com&" in fast.call_args.args[0]
+        assert "hostname=b.example.com&" in slow.call_args.args[0]
+        assert [r["provider"] for r in results] == ["fast", "slow", "fast", None]
+        assert [r["success"] for r in results] == [True, True, True, False]
+
+    def test_slow_provider_does_not_delay_others(self, providers):
+        finished = {}
+
+        def answer(name, delay):
+            def get(url, **kwargs):
+                time.sleep(delay)
+                finished[name] = time.time()
+                return provider_response("good 203.0.113.7")
+            return get
+
+        with patch.object(providers.updaters["fast"].session, 'get', side_effect=answer("fast", 0)), \
+                patch.object(providers.updaters["slow"].session, 'get', side_effect=answer("slow", 0.3)):
+            start = time.time()
+            providers.update_many(["a.example.com", "b.example.com"], "203.0.113.7")
+        assert finished["fast"] - start < 0.2
+        assert time.time() - start < 0.5
+
+    def test_min_interval_spaces_requests(self, dyn):
+        dyn.min_interval = 0.2
+        with patch.object(dyn.session, 'get', return_value=provider_response("good 203.0.113.7")):
+            start = time.time()
+            dyn.update("a.example.com", "203.0.113.7")
+            dyn.update("b.example.com", "203.0.113.7")
+        assert time.time() - start >= 0.2
+
+
+def test_key_manager_get_many_reads_store_once(tmp_path):
+    key_manager = KeyManager(str(tmp_path / "Token.key"), password="master")
+    key_manager.add("dyn_username", "user")
+    key_manager.add("dyn_token", "token")
+    with patch.object(key_manager, '_read_keys_from_file', wraps=key_manager._read_keys_from_file) as read:
+        values = key_manager.get_many(["dyn_username", "dyn_token", "missing"])
+    assert values == {"dyn_username": "user", "dyn_token": "token", "missing": None}
+    read.assert_called_once()
@@ -0,0 +1,54 @@
+import sys
+import json
+import time
+import subprocess
+
+import healthcheck
+
+
+def write_heartbeat(tmp_path, **fields):
+    file_name = tmp_path / "heartbeat.json"
+    file_name.write_text(json.dumps({"state": "running", "tick": time.time(), "max_age": 90, "running": 0,
+                                     "jobs": {}, **fields}))
+    return str(file_name)
+
+
+class TestCheck:
+    def test_fresh_heartbeat_is_healthy(self, tmp_path):
+        healthy, message = healthcheck.check(write_heartbeat(tmp_path, running=2))
+        assert healthy
+        assert "2 jobs running" in message
+
+    def test_stale_heartbeat_is_unhealthy(self, tmp_path):
+        healthy, message = healthcheck.check(write_heartbeat(tmp_path, tick=time.time() - 120))
+        assert not healthy
+        assert "Stale" in message
+
+    def test_max_age_override(self, tmp_path):
+        assert not healthcheck.check(write_heartbeat(tmp_path, tick=time.time() - 20), max_age=10)[0]
+
+    def test_missing_stopped_and_corrupt_files(self, tmp_path):
+        assert not healthcheck.check(str(tmp_path / "missing.json"))[0]
+        assert not healthcheck.check(write_heartbeat(tmp_path, state="stopped"))[0]
+        corrupt = tmp_path / "corrupt.json"
+        corrupt.write_text("{")
+        assert not healthcheck.check(str(corrupt))[0]
+
+    def test_failed_jobs_are_reported_but_healthy(self, tmp_path):
+        healthy, message = healthcheck.check(write_heartbeat(tmp_path, jobs={"ddns_sync": {"last_status": "failed"}}))
+        assert healthy
+        assert "ddns_sync" in message
+
+    def test_file_from_environment(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("HEARTBEAT_FILE", write_heartbeat(tmp_path, state="standby"))
+        assert healthcheck.check() == (True, "Standby: last tick 0 s ago, 0 jobs running")
+
+
+def test_exit_code_without_importing_utilities(tmp_path):
+    script = healthcheck.__file__
+    fresh = subprocess.run([sys.executable, script, "--file", write_heartbeat(tmp_path)], capture_output=True)
+    stale = subprocess.run([sys.executable, "-X", "importtime", script, "--file",
+                            write_heartbeat(tmp_path, tick=0)], capture_output=True, text=True)
+    assert fresh.returncode == 0
+    assert stale.returncode == 1
+    assert "utilities" not in stale.stderr
@@ -0,0 +1,814 @@
+import os
+import json
+import time
+import pickle
+import asyncio
+import sqlite3
+import threading
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch
+from apscheduler.executors.asyncio import AsyncIOExecutor
+from apscheduler.executors.pool import ThreadPoolExecutor, ProcessPoolExecutor
+from apscheduler.triggers.combining import AndTrigger, OrTrigger
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.schedulers.base import STATE_PAUSED, STATE_RUNNING
+from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED, JobExecutionEvent, \
+    JobSubmissionEvent
+
+from utilities.Scheduler import Scheduler
+from utilities.JobGuard import JobGuard, JobTimeoutError, run_guarded, run_guarded_async
+from utilities.SQLiteJobStore import SQLiteJobStore
+from utilities.LeaderLease import LeaderLease
+from utilities.BusinessDayTrigger import BusinessDayTrigger
+
+
+def job():
+    pass
+
+
+@pytest.fixture(autouse=True)
+def heartbeat_file(tmp_path, monkeypatch):
+    """Keep heartbeats written by started schedulers out of src/DATA."""
+    file_name = str(tmp_path / "heartbeat.json")
+    monkeypatch.setenv("HEARTBEAT_FILE", file_name)
+    return file_name
+
+
+@pytest.fixture
+def scheduler():
+    schedule = Scheduler({
+        "scheduler_executors": {"io": {"type": "thread", "max_workers": 20},
+                                "cpu": {"type": "process", "max_workers": 2}},
+        "scheduler_job_defaults": {"coalesce": True},
+        "scheduler_jobs": {"heavy": {"executor": "cpu", "max_instances": 2}},
+    })
+    yield schedule
+    if schedule.scheduler.running:
+        schedule.scheduler.shutdown(wait=False)
+
+
+# ---------------------------------------------------------------------------
+# Executors and per-job settings
+# ---------------------------------------------------------------------------
+
+class TestExecutors:
+    def test_named_executors_and_default(self, scheduler):
+        executors = scheduler.scheduler._executors
+        assert set(executors) == {"default", "io", "cpu"}
+        assert isinstance(executors["io"], ThreadPoolExecutor)
+        assert isinstance(executors["cpu"], ProcessPoolExecutor)
+
+    def test_invalid_executor_type_raises(self):
+        with pytest.raises(KeyError):
+            Scheduler({"scheduler_executors": {"gpu": {"type": "cuda"}}})
+
+    def test_job_defaults_are_merged(self, scheduler):
+        scheduler.scheduler.start(paused=True)
+        scheduler.add(job, interval=5, job_id="plain")
+        plain = scheduler.scheduler.get_job("plain")
+        assert plain.coalesce is True and plain.max_instances == 1 and plain.executor == "default"
+
+    def test_per_job_settings_from_config(self, scheduler):
+        scheduler.add(job, interval=5, job_id="heavy")
+        heavy = scheduler.scheduler.get_job("heavy")
+        assert heavy.executor == "cpu" and heavy.max_instances == 2
+
+    def test_arguments_override_config(self, scheduler):
+        scheduler.add(job, schedule_type='cron', schedule_time="08:30", job_id="heavy", executor="io",
+                      max_instances=5, coalesce=False)
+        heavy = scheduler.scheduler.get_job("heavy")
+        assert heavy.executor == "io" and heavy.max_instances == 5 and heavy.coalesce is False
+
+    def test_unknown_executor_raises(self, scheduler):
+        with pytest.raises(KeyError):
+            scheduler.add(job, interval=5, executor="missing")
+
+    def test_no_config_keeps_previous_defaults(self):
+        plain = Scheduler()
+        plain.scheduler.start(paused=True)
+        plain.add(job, interval=5)
+        added = plain.scheduler.get_job("interval_task_5")
+        plain.scheduler.shutdown(wait=False)
+        assert added.coalesce is False and added.max_instances == 1
+
+
+# ---------------------------------------------------------------------------
+# Triggers
+# ---------------------------------------------------------------------------
+
+class TestTriggers:
+    def test_single_time_keeps_job_id(self, scheduler):
+        scheduler.add(job, schedule_type='cron', schedule_time="08:30")
+        assert isinstance(scheduler.scheduler.get_job("cron_task_8_30").trigger, CronTrigger)
+
+    def test_several_times_share_one_job(self, scheduler):
+        scheduler.add(job, schedule_type='cron', schedule_time="08:30, 12:30,18:00")
+        trigger = scheduler.scheduler.get_job("cron_task_8_30_12_30_18_0").trigger
+        assert isinstance(trigger, OrTrigger)
+        assert len(trigger.triggers) == 2  # 08:30 and 12:30 share one cron trigger
+        start = datetime(2026, 1, 5, 7, 0, tzinfo=trigger.triggers[0].timezone)
+        fire_times = []
+        for _ in range(3):
+            start = trigger.get_next_fire_time(None, start)
+            fire_times.append(start.strftime("%H:%M"))
+            start += timedelta(seconds=1)
+        assert fire_times == ["08:30", "12:30", "18:00"]
+
+    def test_invalid_time_raises(self, scheduler):
+        with pytest.raises(ValueError):
+            scheduler.add(job, schedule_type='cron', schedule_time="08:30,25:00")
+
+    def test_cron_expression(self, scheduler):
+        scheduler.add(job, schedule_type='cron', cron="*/15 8-18 * * mon-fri")
+        trigger = scheduler.scheduler.get_job("cron_task_15_8_18_mon_fri").trigger
+        assert str(trigger.fields[CronTrigger.FIELD_NAMES.index("minute")]) == "*/15"
+
+    def test_second_level_interval(self, scheduler):
+        scheduler.add(job, interval=0, seconds=30)
+        assert scheduler.scheduler.get_job("interval_task_0_30s").trigger.interval == timedelta(seconds=30)
+
+    def test_zero_interval_raises(self, scheduler):
+        with pytest.raises(ValueError):
+            scheduler.add(job, interval=0)
+
+    def test_combined_trigger(self, scheduler):
+        scheduler.add(job, schedule_type='combined', combine='and',
+                      triggers=[{"type": "cron", "expression": "0 9 * * *"}, {"type": "interval", "minutes": 60}])
+        assert isinstance(scheduler.scheduler.get_job("combined_task_job").trigger, AndTrigger)
+
+    def test_jitter_from_config_and_argument(self):
+        schedule = Scheduler({"scheduler_jitter": 20})
+        schedule.add(job, interval=5)
+        schedule.add(job, interval=10, jitter=3)
+        assert schedule.scheduler.get_job("interval_task_5").trigger.jitter == 20
+        assert schedule.scheduler.get_job("interval_task_10").trigger.jitter == 3
+
+
+# ---------------------------------------------------------------------------
+# Persistent job store
+# ---------------------------------------------------------------------------
+
+calls = []
+
+
+def record_call(trigger_notification: bool = False):
+    calls.append(trigger_notification)
+
+
+def store_config(tmp_path, **extra):
+    return {"scheduler_job_store": "y", "scheduler_job_store_file": str(tmp_path / "jobs.sqlite"), **extra}
+
+
+def set_next_run_time(file_name, job_id, seconds_ago):
+    with sqlite3.connect(file_name) as connection:
+        connection.execute("UPDATE apscheduler_jobs SET next_run_time = ? WHERE id = ?",
+                           (time.time() - seconds_ago, job_id))
+
+
+class TestJobStore:
+    @pytest.fixture(autouse=True)
+    def clear_calls(self):
+        calls.clear()
+
+    def run_once(self, config, *jobs, wait=0.0):
+        schedule = Scheduler(config)
+        for job_kwargs in jobs:
+            schedule.add(record_call, **job_kwargs)
+        schedule.start()
+        time.sleep(wait)
+        schedule.scheduler.shutdown(wait=True)
+        return schedule
+
+    def test_jobs_are_persisted(self, tmp_path):
+        self.run_once(store_config(tmp_path), {"interval": 5, "job_id": "persisted"})
+        assert set(SQLiteJobStore(str(tmp_path / "jobs.sqlite")).next_run_times()) == {"persisted"}
+
+    def test_missed_run_within_grace_is_caught_up(self, tmp_path):
+        config = store_config(tmp_path)
+        self.run_once(config, {"interval": 5, "job_id": "recover", "misfire_grace_time": 600})
+        set_next_run_time(config["scheduler_job_store_file"], "recover", 120)
+
+        schedule = self.run_once(config, {"interval": 5, "job_id": "recover", "misfire_grace_time": 600}, wait=0.3)
+        assert calls == [False]
+        assert schedule.find_catchups() == ["recover"]
+
+    def test_missed_run_past_grace_is_dropped(self, tmp_path):
+        config = store_config(tmp_path)
+        self.run_once(config, {"interval": 5, "job_id": "late", "misfire_grace_time": 30})
+        set_next_run_time(config["scheduler_job_store_file"], "late", 120)
+
+        self.run_once(config, {"interval": 5, "job_id": "late", "misfire_grace_time": 30}, wait=0.3)
+        assert calls == []
+
+    def test_catchups_run_through_the_job_within_cap(self, tmp_path):
+        config = store_config(tmp_path, scheduler_catchup_concurrency=1)
+        jobs = [{"interval": 5, "job_id": f"job_{index}"} for index in range(3)]
+        first = Scheduler(config)
+        for job_kwargs in jobs:
+            first.add(sleep_briefly, **job_kwargs)
+        first.start()
+        first.scheduler.shutdown(wait=True)
+        for index in range(3):
+            set_next_run_time(config["scheduler_job_store_file"], f"job_{index}", 10)
+
+        schedule = Scheduler(config)
+        for job_kwargs in jobs:
+            schedule.add(sleep_briefly, **job_kwargs)
+        assert sorted(schedule.find_catchups()) == ["job_0", "job_1", "job_2"]
+        schedule.start()
+        deadline = time.time() + 3
+        while sum(job["runs"] for job in schedule.get_metrics()["jobs"].values()) < 3 and time.time() < deadline:
+            time.sleep(0.05)
+        schedule.stop(1)
+
+        metrics = schedule.get_metrics()
+        assert sorted(metrics["jobs"]) == ["job_0", "job_1", "job_2"]  # No separate catch-up jobs
+        assert all(job["runs"] == 1 for job in metrics["jobs"].values())
+        assert metrics["totals"]["max_running"] == 1
+
+    def test_catchup_does_not_overlap_a_running_job(self, tmp_path):
+        config = store_config(tmp_path)
+        schedule = Scheduler(config)
+        schedule.add(sleep_briefly, interval=5, job_id="slow")
+        schedule.start()
+        schedule.scheduler.modify_job("slow", next_run_time=datetime.now(timezone.utc))
+        time.sleep(0.05)
+        schedule.persisted_run_times["slow"] = datetime.now(timezone.utc)
+        schedule.run_catchups(["slow"])
+        time.sleep(0.4)
+        schedule.stop(1)
+
+        metrics = schedule.get_metrics()
+        assert list(metrics["jobs"]) == ["slow"] and metrics["totals"]["max_running"] == 1
+        assert metrics["jobs"]["slow"]["runs"] + metrics["jobs"]["slow"]["max_instances_skipped"] == 2
+
+    def test_removed_jobs_are_pruned(self, tmp_path):
+        config = store_config(tmp_path)
+        self.run_once(config, {"interval": 5, "job_id": "old"}, {"interval": 10, "job_id": "kept"})
+        self.run_once(config, {"interval": 10, "job_id": "kept"})
+        assert set(SQLiteJobStore(config["scheduler_job_store_file"]).next_run_times()) == {"kept"}
+
+    def test_unpicklable_job_stays_in_memory(self, tmp_path):
+        schedule = Scheduler(store_config(tmp_path))
+        schedule.add(lambda: None, interval=5, job_id="inline")
+        assert schedule.added_jobs["inline"][1] == "memory"
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+def sleep_briefly(seconds: float = 0.2):
+    time.sleep(seconds)
+
+
+def fail():
+    raise RuntimeError("boom")
+
+
+class TestMetrics:
+    @pytest.fixture
+    def running(self):
+        schedule = Scheduler()
+        schedule.start()
+        yield schedule
+        schedule.scheduler.shutdown(wait=True)
+
+    def test_no_runs_yet(self):
+        assert Scheduler().get_metrics() == {"jobs": {}, "totals": {"running": 0, "max_running": 0}}
+
+    def test_outcomes_durations_and_lag(self, running):
+        running.scheduler.add_job(sleep_briefly, 'date', id="ok", args=[0.05])
+        running.scheduler.add_job(fail, 'date', id="broken")
+        time.sleep(0.4)
+
+        ok, broken = running.get_metrics("ok"), running.get_metrics("broken")
+        assert (ok["runs"], ok["failures"], ok["last_status"]) == (1, 0, "success")
+        assert (broken["runs"], broken["failures"], broken["last_status"]) == (1, 1, "failed")
+        assert 40 <= ok["duration_ms"]["max"] < 400
+        assert ok["lag_ms"]["count"] == 1 and ok["running"] == 0
+
+    def test_max_instances_and_concurrency_high_water_mark(self, running):
+        running.scheduler.add_job(sleep_briefly, 'interval', minutes=5, id="slow",
+                                  next_run_time=datetime.now(timezone.utc))
+        running.scheduler.add_job(sleep_briefly, 'date', id="other")
+        time.sleep(0.1)
+        running.scheduler.modify_job("slow", next_run_time=datetime.now(timezone.utc))
+        time.sleep(0.4)
+
+        metrics = running.get_metrics()
+        assert metrics["jobs"]["slow"]["max_instances_skipped"] == 1
+        assert metrics["jobs"]["slow"]["max_running"] == 1
+        assert metrics["totals"]["max_running"] == 2
+        assert metrics["totals"]["running"] == 0
+
+    def test_no_op_job_is_not_left_running(self, running):
+        running.scheduler.add_job(job, 'interval', seconds=1, id="no_op", next_run_time=datetime.now(timezone.utc))
+        time.sleep(2.5)
+        running.scheduler.pause()
+        time.sleep(0.1)
+
+        metrics = running.get_metrics()
+        assert metrics["jobs"]["no_op"]["runs"] >= 2
+        assert metrics["jobs"]["no_op"]["running"] == 0 and metrics["totals"]["running"] == 0
+
+    def test_outcome_before_submission_and_missed_runs(self):
+        schedule = Scheduler()
+        listener = schedule._Scheduler__job_listener
+        run_time = datetime.now(timezone.utc)
+        listener(JobExecutionEvent(EVENT_JOB_EXECUTED, "fast", "default", run_time))
+        listener(JobSubmissionEvent(EVENT_JOB_SUBMITTED, "fast", "default", [run_time]))
+        listener(JobSubmissionEvent(EVENT_JOB_SUBMITTED, "late", "default", [run_time]))
+        listener(JobExecutionEvent(EVENT_JOB_MISSED, "late", "default", run_time))
+
+        metrics = schedule.get_metrics()
+        assert metrics["jobs"]["fast"]["runs"] == 1 and metrics["jobs"]["late"]["missed"] == 1
+        assert metrics["totals"]["running"] == 0
+        assert not schedule._submitted and not schedule._finished
+
+    def test_trigger_is_looked_up_once_per_job(self, running):
+        with patch.object(running.scheduler, 'get_job', wraps=running.scheduler.get_job) as get_job:
+            running.scheduler.add_job(sleep_briefly, 'date', id="quick", args=[0])
+            time.sleep(0.2)
+        assert get_job.call_count == 1
+
+    def test_reset(self, running):
+        running.scheduler.add_job(sleep_briefly, 'date', id="ok", args=[0])
+        time.sleep(0.2)
+        running.reset_metrics()
+        assert running.get_metrics("ok")["runs"] == 0
+
+
+# ---------------------------------------------------------------------------
+# Graceful stop
+# ---------------------------------------------------------------------------
+
+class TestStop:
+    def test_stop_waits_for_running_jobs(self):
+        schedule = Scheduler()
+        schedule.start()
+        schedule.scheduler.add_job(sleep_briefly, 'date', id="in_flight", args=[0.3])
+        time.sleep(0.1)
+
+        start = time.time()
+        assert schedule.stop(drain_timeout=2) is True
+        assert 0.1 < time.time() - start < 1
+        assert schedule.get_metrics("in_flight")["runs"] == 1
+        assert not schedule.scheduler.running
+
+    def test_stop_with_fast_jobs_returns_at_once(self):
+        schedule = Scheduler()
+        for index in range(5):
+            schedule.scheduler.add_job(job, 'interval', seconds=1, id=f"no_op_{index}")
+        schedule.start()
+        time.sleep(1.5)
+
+        start = time.time()
+        assert schedule.stop(drain_timeout=3) is True
+        assert time.time() - start < 1
+
+    def test_stop_gives_up_after_drain_timeout(self):
+        schedule = Scheduler()
+        schedule.start()
+        schedule.scheduler.add_job(sleep_briefly, 'date', id="stuck", args=[0.6])
+        time.sleep(0.1)
+
+        start = time.time()
+        assert schedule.stop(drain_timeout=0.1) is False
+        assert time.time() - start < 0.4
+
+
+# ---------------------------------------------------------------------------
+# Timeouts and overlap policies
+# ---------------------------------------------------------------------------
+
+outcomes = []
+
+
+def run_in_background(guard, *args):
+    worker = threading.Thread(target=lambda: outcomes.append(guard.run(*args)))
+    worker.start()
+    return worker
+
+
+class TestJobGuard:
+    @pytest.fixture(autouse=True)
+    def clear_outcomes(self):
+        outcomes.clear()
+
+    def test_result_and_errors_pass_through(self):
+        guard = JobGuard("plain")
+        assert guard.run(lambda value: value * 2, 21) == 42
+        with pytest.raises(RuntimeError):
+            guard.run(fail)
+
+    def test_hard_timeout_abandons_run(self):
+        guard = JobGuard("hung", soft_timeout=0.05, hard_timeout=0.15)
+        start = time.time()
+        with pytest.raises(JobTimeoutError):
+            guard.run(sleep_briefly, 1)
+        assert time.time() - start < 0.5
+        assert guard.stats["soft_timeouts"] == 1 and guard.stats["hard_timeouts"] == 1
+
+    def test_overrun_is_detected(self):
+        guard = JobGuard("overrun", interval=0.05)
+        guard.run(sleep_briefly, 0.1)
+        assert guard.stats["overruns"] == 1
+
+    def test_queue_runs_after_previous(self):
+        guard = JobGuard("queued", overlap="queue")
+        finished = []
+        first = run_in_background(guard, lambda: (time.sleep(0.2), finished.append("first")))
+        time.sleep(0.05)
+        second = run_in_background(guard, lambda: finished.append("second"))
+        first.join(), second.join()
+        assert finished == ["first", "second"]
+        assert guard.stats["queued"] == 1 and guard.max_instances == 2
+
+    def test_replace_abandons_previous(self):
+        guard = JobGuard("replaced", overlap="replace")
+        first = run_in_background(guard, sleep_briefly, 1)
+        time.sleep(0.05)
+        start = time.time()
+        second = run_in_background(guard, lambda: "new")
+        first.join(0.5)
+        assert time.time() - start < 0.3
+        second.join()
+        assert sorted(outcomes, key=str) == [None, "new"]
+        assert guard.stats["replaced"] == 1
+
+    def test_invalid_policy_raises(self):
+        with pytest.raises(KeyError):
+            JobGuard("bad", overlap="ignore")
+
+    def test_scheduler_wraps_configured_jobs(self):
+        schedule = Scheduler({"scheduler_jobs": {"guarded": {"hard_timeout": 30, "overlap": "queue"}}})
+        schedule.scheduler.start(paused=True)
+        schedule.add(job, interval=5, job_id="guarded")
+        schedule.add(job, interval=5, job_id="unguarded")
+        guarded, unguarded = schedule.scheduler.get_job("guarded"), schedule.scheduler.get_job("unguarded")
+        schedule.scheduler.shutdown(wait=False)
+
+        assert guarded.func is run_guarded and guarded.args == ("guarded", job)
+        assert guarded.max_instances == 2
+        assert JobGuard.get("guarded").interval == 300
+        assert unguarded.func is job
+
+
+# ---------------------------------------------------------------------------
+# asyncio mode
+# ---------------------------------------------------------------------------
+
+async def sleep_async(seconds: float = 0.2, value=None):
+    await asyncio.sleep(seconds)
+    return value
+
+
+class TestAsyncioMode:
+    def test_coroutine_jobs_share_the_event_loop(self):
+        schedule = Scheduler({"scheduler_mode": "asyncio"})
+        assert isinstance(schedule.scheduler._executors["default"], AsyncIOExecutor)
+        ran = []
+
+        async def tick():
+            await asyncio.sleep(0.3)
+            ran.append(threading.current_thread().name)
+
+        for index in range(5):
+            schedule.add(tick, interval=60, job_id=f"tick_{index}")
+        for scheduled in schedule.scheduler.get_jobs():
+            scheduled.modify(next_run_time=datetime.now(timezone.utc))
+        start = time.time()
+        schedule.start()
+        while len(ran) < 5 and time.time() - start < 2:
+            time.sleep(0.05)
+        assert schedule.stop(1)
+
+        assert ran == ["scheduler_event_loop"] * 5
+        assert time.time() - start < 1  # Concurrent on one loop, not one after the other
+        assert schedule.get_metrics()["totals"]["max_running"] == 5
+
+    def test_shared_http_client_is_closed_on_stop(self):
+        schedule = Scheduler({"scheduler_mode": "asyncio"})
+        clients = []
+
+        async def use_client():
+            clients.append(schedule.http_client)
+
+        schedule.add(use_client, interval=60, job_id="http")
+        schedule.scheduler.get_job("http").modify(next_run_time=datetime.now(timezone.utc))
+        schedule.start()
+        deadline = time.time() + 2
+        while not clients and time.time() < deadline:
+            time.sleep(0.05)
+        assert schedule.stop(1)
+
+        assert clients == [schedule.http_client] and schedule.http_client.is_closed
+        assert Scheduler().http_client is None
+
+    def test_invalid_mode_raises(self):
+        with pytest.raises(KeyError):
+            Scheduler({"scheduler_mode": "gevent"})
+
+    def test_coroutine_jobs_are_guarded_async(self):
+        schedule = Scheduler({"scheduler_mode": "asyncio", "scheduler_jobs": {"probe": {"hard_timeout": 5}}})
+        schedule.add(sleep_async, interval=60, job_id="probe")
+        assert schedule.scheduler.get_job("probe").func is run_guarded_async
+
+
+class TestJobGuardAsync:
+    def test_hard_timeout_cancels_run(self):
+        guard = JobGuard("hung_async", soft_timeout=0.05, hard_timeout=0.15)
+        cancelled = []
+
+        async def hang():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def scenario():
+            with pytest.raises(JobTimeoutError):
+                await guard.run_async(hang)
+            await asyncio.sleep(0)
+
+        asyncio.run(scenario())
+        assert cancelled == [True]
+        assert guard.stats["soft_timeouts"] == 1 and guard.stats["hard_timeouts"] == 1
+
+    def test_replace_cancels_previous(self):
+        guard = JobGuard("replaced_async", overlap="replace")
+
+        async def scenario():
+            first = asyncio.create_task(guard.run_async(sleep_async, 5, "old"))
+            await asyncio.sleep(0.05)
+            return await asyncio.gather(first, guard.run_async(sleep_async, 0, "new"))
+
+        assert asyncio.run(scenario()) == [None, "new"]
+        assert guard.stats["replaced"] == 1
+
+    def test_queue_runs_after_previous(self):
+        guard = JobGuard("queued_async", overlap="queue")
+
+        async def scenario():
+            finished = []
+
+            async def record(name, seconds):
+                await asyncio.sleep(seconds)
+                finished.append(name)
+
+            await asyncio.gather(guard.run_async(record, "first", 0.1), guard.run_async(record, "second", 0))
+            return finished
+
+        assert asyncio.run(scenario()) == ["first", "second"]
+        assert guard.stats["queued"] == 1
+
+
+# ---------------------------------------------------------------------------
+# Coordination between replicas
+# ---------------------------------------------------------------------------
+
+class TestLeaderLease:
+    def test_one_holder_until_released(self, tmp_path):
+        first = LeaderLease(str(tmp_path / "lease.sqlite"), owner="replica-1")
+        second = LeaderLease(str(tmp_path / "lease.sqlite"), owner="replica-2")
+        assert first.acquire() and first.acquire()  # Renewal by the holder
+        assert not second.acquire() and not second.is_leader
+        assert second.holder()[0] == "replica-1"
+
+        first.release()
+        assert second.acquire() and not first.acquire()
+
+    def test_expired_lease_is_taken_over(self, tmp_path):
+        first = LeaderLease(str(tmp_path / "lease.sqlite"), ttl=0.1, owner="replica-1")
+        second = LeaderLease(str(tmp_path / "lease.sqlite"), ttl=0.1, owner="replica-2")
+        assert first.acquire()
+        time.sleep(0.15)
+        assert not first.is_leader
+        assert second.acquire()
+
+
+def coordinated_scheduler(tmp_path, replica_id: str) -> Scheduler:
+    schedule = Scheduler({"scheduler_coordination": "y", "scheduler_lease_file": str(tmp_path / "lease.sqlite"),
+                          "scheduler_lease_ttl": 0.6, "scheduler_replica_id": replica_id,
+                          "scheduler_heartbeat_file": str(tmp_path / f"heartbeat_{replica_id}.json")})
+    schedule.add(job, interval=5, job_id="shared")
+    return schedule
+
+
+class TestCoordination:
+    def test_only_leader_runs_and_standby_takes_over(self, tmp_path):
+        first, second = coordinated_scheduler(tmp_path, "replica-1"), coordinated_scheduler(tmp_path, "replica-2")
+        first.start()
+        second.start()
+        try:
+            assert first.is_leader and first.scheduler.state == STATE_RUNNING
+            assert not second.is_leader and second.scheduler.state == STATE_PAUSED
+
+            first.stop(1)
+            deadline = time.time() + 2
+            while not second.is_leader and time.time() < deadline:
+                time.sleep(0.05)
+            assert second.is_leader and second.scheduler.state == STATE_RUNNING
+        finally:
+            second.stop(1)
+
+    def test_takeover_skips_runs_due_while_standing_by(self, tmp_path):
+        schedule = coordinated_scheduler(tmp_path, "replica-1")
+        schedule.scheduler.start(paused=True)
+        stale = datetime.now(timezone.utc) - timedelta(minutes=3)
+        schedule.scheduler.get_job("shared").modify(next_run_time=stale)
+        schedule.lease.acquire()
+        schedule._take_over()
+        try:
+            assert schedule.scheduler.get_job("shared").next_run_time > datetime.now(timezone.utc)
+        finally:
+            schedule.scheduler.shutdown(wait=False)
+
+    def test_without_coordination_always_leader(self):
+        assert Scheduler().is_leader
+
+
+# ---------------------------------------------------------------------------
+# Business days
+# ---------------------------------------------------------------------------
+
+UTC = timezone.utc
+HOLIDAYS = {2025: {date(2025, 12, 25), date(2025, 12, 26)}}  # Thursday and Friday
+
+
+def daily_at_nine():
+    return CronTrigger(hour=9, minute=0, timezone=UTC)
+
+
+def fire_times(trigger, start: datetime, count: int) -> list[datetime]:
+    times, previous, now = [], None, start
+    for _ in range(count):
+        previous = trigger.get_next_fire_time(previous, now)
+        times.append(previous)
+        now = previous
+    return times
+
+
+class TestBusinessDayTrigger:
+    def test_skip_drops_weekends_and_holidays(self):
+        trigger = BusinessDayTrigger(daily_at_nine(), HOLIDAYS, "skip")
+        runs = fire_times(trigger, datetime(2025, 12, 23, 10, tzinfo=UTC), 3)
+        assert [run.date() for run in runs] == [date(2025, 12, 24), date(2025, 12, 29), date(2025, 12, 30)]
+        assert all(run.hour == 9 for run in runs)
+
+    def test_shift_merges_into_next_business_day(self):
+        trigger = BusinessDayTrigger(daily_at_nine(), HOLIDAYS, "shift")
+        runs = fire_times(trigger, datetime(2025, 12, 24, 10, tzinfo=UTC), 2)
+        assert runs == [datetime(2025, 12, 29, 9, tzinfo=UTC), datetime(2025, 12, 30, 9, tzinfo=UTC)]
+
+    def test_shift_keeps_earlier_run_on_target_day(self):
+        trigger = BusinessDayTrigger(CronTrigger(day_of_week="sat", hour=12, timezone=UTC), {}, "shift")
+        monday = BusinessDayTrigger(CronTrigger(day_of_week="sat,mon", hour=12, timezone=UTC), {}, "shift")
+        assert trigger.get_next_fire_time(None, datetime(2025, 12, 26, tzinfo=UTC)) == \
+            datetime(2025, 12, 29, 12, tzinfo=UTC)
+        assert fire_times(monday, datetime(2025, 12, 26, tzinfo=UTC), 2)[1] == datetime(2026, 1, 5, 12, tzinfo=UTC)
+
+    def test_sub_minute_interval_jumps_over_weekend(self):
+        every_ten_seconds = IntervalTrigger(seconds=10, start_date=datetime(2025, 1, 1, tzinfo=UTC))
+        friday_night = datetime(2025, 12, 19, 23, 59, 50, tzinfo=UTC)
+        for policy in BusinessDayTrigger.POLICIES:
+            trigger = BusinessDayTrigger(every_ten_seconds, HOLIDAYS, policy)
+            assert trigger.get_next_fire_time(friday_night, friday_night) == datetime(2025, 12, 22, tzinfo=UTC)
+
+    def test_weekend_only_cron(self, caplog):
+        weekends = CronTrigger(day_of_week="sat,sun", hour=12, timezone=UTC)
+        start = time.time()
+        assert BusinessDayTrigger(weekends, {}, "shift").get_next_fire_time(None, datetime(2025, 12, 20, tzinfo=UTC)) \
+            == datetime(2025, 12, 22, 12, tzinfo=UTC)
+        assert not caplog.records
+        assert BusinessDayTrigger(weekends, {}, "skip").get_next_fire_time(None, datetime(2025, 12, 20, tzinfo=UTC)) \
+            is None
+        assert time.time() - start < 0.5
+
+    def test_custom_weekend_and_unknown_years(self):
+        trigger = BusinessDayTrigger(daily_at_nine(), {}, "skip", weekend_days=(4, 5))  # Friday and Saturday
+        assert trigger.get_next_fire_time(None, datetime(2026, 1, 2, 10, tzinfo=UTC)).date() == date(2026, 1, 4)
+
+    def test_is_picklable(self):
+        trigger = pickle.loads(pickle.dumps(BusinessDayTrigger(daily_at_nine(), HOLIDAYS, "shift")))
+        assert trigger.policy == "shift" and trigger.holidays[2025] == frozenset(HOLIDAYS[2025])
+
+    def test_invalid_policy_raises(self):
+        with pytest.raises(KeyError):
+            BusinessDayTrigger(daily_at_nine(), policy="later")
+
+
+class TestBusinessDayJobs:
+    def test_calendar_is_loaded_once_and_refreshed(self):
+        schedule = Scheduler({"calendarific_endpoint": "https://calendarific.example/api/v2/holidays"})
+        empty_calendar = lambda years: {year: frozenset() for year in years}
+        with patch.object(Scheduler, "_load_holidays", side_effect=empty_calendar) as load:
+            schedule.add(job, schedule_type="cron", schedule_time="09:00", business_days="skip")
+            schedule.add(job, schedule_type="cron", schedule_time="17:00", business_days="shift")
+            this_year = datetime.now().year
+            assert load.call_count == 1 and sorted(schedule.holidays) == [this_year, this_year + 1]
+
+            schedule.scheduler.start(paused=True)
+            schedule.holidays.pop(this_year + 1)
+            schedule.refresh_business_calendar()
+            trigger = schedule.scheduler.get_job("cron_task_17_0").trigger
+            refresh = schedule.scheduler.get_job("business_calendar_refresh")
+            schedule.scheduler.shutdown(wait=False)
+
+        assert isinstance(trigger, BusinessDayTrigger) and trigger.policy == "shift"
+        assert sorted(trigger.holidays) == [this_year, this_year + 1]
+        assert refresh.next_run_time.month == 12 and refresh.next_run_time.day == 1
+
+    def test_without_calendarific_only_weekends(self):
+        schedule = Scheduler({"scheduler_jobs": {"weekdays": {"business_days": "skip"}}})
+        schedule.add(job, schedule_type="cron", schedule_time="09:00", job_id="weekdays")
+        assert schedule.holidays == {}
+        assert str(schedule.scheduler.get_job("weekdays").trigger).startswith("business_days[skip")
+
+
+# ---------------------------------------------------------------------------
+# Heartbeat
+# ---------------------------------------------------------------------------
+
+def read_heartbeat(file_name: str) -> dict:
+    with open(file_name) as heartbeat:
+        return json.load(heartbeat)
+
+
+class TestHeartbeat:
+    def test_written_on_start_with_jobs_and_queues(self, heartbeat_file):
+        schedule = Scheduler({"scheduler_heartbeat_interval": 10})
+        schedule.add(fail, interval=5, job_id="broken")
+        schedule.scheduler.get_job("broken").modify(next_run_time=datetime.now(timezone.utc))
+        schedule.start()
+        deadline = time.time() + 2
+        while schedule.get_metrics("broken").get("last_status") is None and time.time() < deadline:
+            time.sleep(0.05)
+        schedule.write_heartbeat()
+        heartbeat = read_heartbeat(heartbeat_file)
+        schedule.stop(1)
+
+        assert heartbeat["state"] == "running" and heartbeat["max_age"] == 30
+        assert time.time() - heartbeat["tick"] < 5
+        assert heartbeat["jobs"]["broken"]["last_status"] == "failed"
+        assert heartbeat["jobs"]["broken"]["next_run"] is not None
+        assert Scheduler.HEARTBEAT_JOB_ID not in heartbeat["jobs"]
+        assert set(heartbeat["queues"]["default"]) == {"instances", "queued"}
+        assert read_heartbeat(heartbeat_file)["state"] == "stopped"
+        assert Scheduler.HEARTBEAT_JOB_ID not in schedule.get_metrics()["jobs"]
+
+    def test_queue_depths_from_pool_sizes(self):
+        schedule = Scheduler({"scheduler_executors": {"io": {"type": "thread", "max_workers": 1}},
+                              "scheduler_heartbeat_interval": 0})
+        schedule.start()
+        for index in range(3):
+            schedule.scheduler.add_job(sleep_briefly, 'date', id=f"slow_{index}", args=[0.3], executor="io")
+        time.sleep(0.1)
+        depths = schedule.queue_depths()
+        schedule.stop(2)
+
+        assert depths["io"] == {"instances": 3, "queued": 2}
+        assert depths["default"] == {"instances": 0, "queued": 0}
+
+    def test_standby_replica_keeps_its_own_heartbeat(self, tmp_path):
+        leader, standby = coordinated_scheduler(tmp_path, "replica-1"), coordinated_scheduler(tmp_path, "replica-2")
+        leader.start()
+        standby.start()
+        try:
+            standby._renew_lease()
+            assert read_heartbeat(standby.heartbeat_file)["state"] == "standby"
+            assert read_heartbeat(leader.heartbeat_file)["state"] == "running"
+        finally:
+            standby.stop(1)
+            leader.stop(1)
+
+    def test_shutdown_while_heartbeat_runs(self):
+        # shutdown(wait=True) holds the job store lock while waiting for the heartbeat job to finish
+        schedule = Scheduler({"scheduler_heartbeat_interval": 10})
+        schedule.add(job, interval=5, job_id="shared")
+        in_heartbeat = threading.Event()
+        get_metrics = schedule.get_metrics
+
+        def slow_metrics(*args):
+            in_heartbeat.set()
+            time.sleep(0.3)
+            return get_metrics(*args)
+
+        schedule.get_metrics = slow_metrics
+        schedule.start()
+        assert in_heartbeat.wait(2)
+        stopper = threading.Thread(target=schedule.shutdown, daemon=True)
+        stopper.start()
+        stopper.join(5)
+        assert not stopper.is_alive()
+        assert read_heartbeat(schedule.heartbeat_file)["state"] == "stopped"
+
+    def test_disabled(self, heartbeat_file):
+        schedule = Scheduler({"scheduler_heartbeat_interval": 0})
+        schedule.start()
+        schedule.stop(1)
+        assert not os.path.exists(heartbeat_file)